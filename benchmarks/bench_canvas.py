@@ -0,0 +1,137 @@
+"""Measures pointer redraw cost of the Compass and ElevationIndicator widgets.
+
+Feeds synthetic position updates at a fixed rate (as a tracking feed would)
+and reports how many updates arrived, how many actually redrew the canvas and
+how many canvas item IDs were consumed. With --trail the compass also draws
+the sky-track trail, whose item count must not grow with the session length.
+Needs a display.
+
+    python benchmarks/bench_canvas.py --rate 20 --duration 5 [--trail]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+from position_trail import TrailBuffer
+from rotor_control_gui import Compass, ElevationIndicator
+
+
+def next_item_id(canvas):
+    # Tk item IDs only ever grow, so a throwaway item shows how many were consumed
+    item = canvas.create_line(0, 0, 0, 0)
+    canvas.delete(item)
+    return item
+
+
+def run_feed(root, compass, elevation, rate, duration, bursts, slew):
+    """Sends ``bursts`` updates every 1/rate s while the pointer slews at ``slew`` deg/s."""
+    period_ms = max(1, int(1000 / rate))
+    start = time.perf_counter()
+    state = {"updates": 0}
+
+    def tick():
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            root.quit()
+            return
+        for i in range(bursts):
+            az = (elapsed * slew + i * 0.01) % 360
+            el = 45 + 40 * math.sin(elapsed / 3)
+            compass.update_azimuth(az)
+            elevation.update_elevation(el)
+            compass.add_trail_point(elapsed, az, el)
+            state["updates"] += 1
+        root.after(period_ms, tick)
+
+    root.after(0, tick)
+    root.mainloop()
+    return state["updates"], time.perf_counter() - start
+
+
+def run_move_in_place(compass, count):
+    """Cost per redraw of moving the persistent pointer, without coalescing."""
+    start = time.perf_counter()
+    for i in range(count):
+        compass.update_azimuth(i % 360)
+        compass.flush()
+    compass.update_idletasks()
+    return (time.perf_counter() - start) / count
+
+
+def run_delete_create(compass, count):
+    """Cost per redraw of the old delete-and-recreate approach, for comparison."""
+    start = time.perf_counter()
+    item = None
+    for i in range(count):
+        if item:
+            compass.delete(item)
+        angle_rad = math.radians(i % 360)
+        x_end = compass.center + compass.radius * 0.9 * math.sin(angle_rad)
+        y_end = compass.center - compass.radius * 0.9 * math.cos(angle_rad)
+        item = compass.create_line(compass.center, compass.center, x_end, y_end,
+                                   arrow=tk.LAST, fill='red', width=3)
+    compass.delete(item)
+    compass.update_idletasks()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20.0, help="Feed rate in Hz")
+    parser.add_argument("--bursts", type=int, default=1, help="Updates per feed tick")
+    parser.add_argument("--slew", type=float, default=6.0, help="Simulated slew rate in deg/s")
+    parser.add_argument("--duration", type=float, default=5.0, help="Feed duration in seconds")
+    parser.add_argument("--epsilon", type=float, default=0.1, help="Pointer epsilon in degrees")
+    parser.add_argument("--count", type=int, default=5000, help="Iterations of the raw redraw tests")
+    parser.add_argument("--trail", action="store_true", help="Draw the position trail on the compass")
+    parser.add_argument("--trail-window", type=float, default=600.0, help="Trail length in (feed) seconds")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    compass = Compass(root, size=300, epsilon=args.epsilon)
+    if args.trail:
+        compass.enable_trail(TrailBuffer(window=args.trail_window))
+    compass.pack()
+    elevation = ElevationIndicator(root, size=250, epsilon=args.epsilon)
+    elevation.pack()
+    root.update()
+
+    first_id = next_item_id(compass)
+    updates, elapsed = run_feed(root, compass, elevation, args.rate, args.duration, args.bursts, args.slew)
+    items_consumed = next_item_id(compass) - first_id - 1
+
+    results = {
+        "rate_hz": args.rate,
+        "bursts": args.bursts,
+        "duration_s": round(elapsed, 3),
+        "updates": updates,
+        "updates_per_s": round(updates / elapsed, 1),
+        "compass_redraws_per_s": round(compass.redraw_count / elapsed, 1),
+        "compass_skipped": compass.skipped_count,
+        "elevation_redraws_per_s": round(elevation.redraw_count / elapsed, 1),
+        "elevation_skipped": elevation.skipped_count,
+        "item_ids_consumed": items_consumed,
+        "trail_items": len(compass.trail_items),
+        "trail_points_kept": len(compass.trail) if compass.trail is not None else 0,
+        "move_in_place_us": round(run_move_in_place(compass, args.count) * 1e6, 2),
+        "delete_create_us": round(run_delete_create(compass, args.count) * 1e6, 2),
+    }
+    root.destroy()
+
+    for key, value in results.items():
+        print(f"{key:>26}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
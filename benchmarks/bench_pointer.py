@@ -0,0 +1,127 @@
+"""Display-error benchmark for the dead-reckoned pointers.
+
+Runs a SimulatedRotor on a virtual clock through a sequence of slews with
+idle time between them, polled every --poll seconds, and "draws" at --fps.
+Compares what the pointer would show against where the rotor really is:
+
+- hold: the pointer jumps to each reading and waits there (the old display)
+- dead_reckoned: trajectory.MotionEstimator fills in between readings
+
+Also counts the animation frames (frames between readings) drawn while the
+rotor sat idle, which should be close to none.
+No display needed; results are JSON, comparable like bench_rotor.py:
+
+    python benchmarks/bench_pointer.py --poll 2 --output after.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_rotor import compare, git_revision
+from rotor_simulator import SimulatedRotor
+from trajectory import MotionEstimator, SlewModel
+
+# Just the fields MotionEstimator reads from a PositionSnapshot
+Snapshot = namedtuple("Snapshot", "timestamp connected azimuth elevation latency commanded")
+
+# (start time, az, el): a set-point is sent at each start time
+MOVES = ((1.0, 90.0, 30.0), (30.0, 10.0, 60.0), (60.0, 350.0, 5.0), (70.0, 200.0, 45.0), (110.0, 200.0, 45.0))
+
+
+def run(args):
+    clock = [0.0]
+    rotor = SimulatedRotor(az_slew=args.slew, el_slew=args.slew, clock=lambda: clock[0])
+    motion = MotionEstimator(SlewModel(args.assumed_slew or args.slew, args.assumed_slew or args.slew))
+    end = MOVES[-1][0] + 20.0
+    frame = 1.0 / args.fps
+    errors = {"hold": [], "dead_reckoned": []}
+    held = rotor.position()
+    moves = list(MOVES)
+    commanded = None
+    next_poll = 0.0
+    animating = False
+    frames = idle_frames = 0  # Animation frames only; the redraw for each reading is not counted
+    while clock[0] <= end:
+        now = clock[0]
+        if moves and now >= moves[0][0]:
+            _, az, el = moves.pop(0)
+            rotor.set_target(az, el)
+            commanded = (az, el)
+            motion.command(az, el, timestamp=now)
+            redraw = True
+        else:
+            redraw = False
+        if now >= next_poll:
+            held = rotor.position()
+            motion.update_from_snapshot(Snapshot(now, True, held[0], held[1], 0.0, commanded))
+            motion.slew.update(now, held[0], held[1], commanded)  # The planner does this in the GUI
+            redraw = True
+            next_poll += args.poll
+        truth = rotor.position()
+        predicted = motion.predict(now)
+        for name, shown in (("hold", held), ("dead_reckoned", predicted[:2])):
+            errors[name].append(math.hypot(shown[0] - truth[0], shown[1] - truth[1]))
+        if animating and not redraw:
+            frames += 1
+            if not rotor.moving:
+                idle_frames += 1
+        # Like animate_pointers(): every reading or command draws, and the loop goes on while moving
+        if redraw or animating:
+            animating = predicted[2]
+        clock[0] = now + frame
+
+    results = {}
+    for name, samples in errors.items():
+        ordered = sorted(samples)
+        results[name] = {
+            "mean_deg": round(sum(samples) / len(samples), 3),
+            "p95_deg": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+            "max_deg": round(ordered[-1], 3),
+        }
+    results["frames"] = {"drawn": frames, "while_idle": idle_frames,
+                         "possible": len(errors["hold"])}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slew", type=float, default=6.0, help="Rotor slew rate in deg/s")
+    parser.add_argument("--assumed-slew", type=float, help="Slew rate the estimator starts from (default: --slew)")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between position polls")
+    parser.add_argument("--fps", type=float, default=30.0, help="Display frames per second")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenario": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "display": run(args),
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
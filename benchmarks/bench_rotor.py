@@ -0,0 +1,223 @@
+"""Latency/throughput benchmark suite for the rotor control path.
+
+Runs against the built-in rotor simulator by default (or any rotctld given
+with --host/--port) and measures:
+
+- latency: command round-trip percentiles over the persistent connection,
+  and optionally via the legacy rotctl subprocess (--rotctl PATH)
+- throughput: sustained position polls per second through the RotorWorker
+- ui_blocking: time the Tk-side queue drain spends per tick, and tick lag
+- memory: Python heap growth over a soak run with polling and logging
+
+Results are written as JSON so runs can be compared between versions:
+
+    python benchmarks/bench_rotor.py --output before.json
+    python benchmarks/bench_rotor.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_pipeline import LogPipeline
+from poll_scheduler import AdaptivePollScheduler
+from rotctld_client import RotctldClient
+from rotor_simulator import SimulatedRotctld, SimulatedRotor
+from rotor_worker import PositionSnapshot, RotorWorker
+
+
+def percentiles(samples):
+    """Summarises a list of seconds as millisecond percentiles."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(0.50), 3),
+        "p90_ms": round(pick(0.90), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+
+def bench_latency(host, port, count, rotctl=None, rotctl_count=20):
+    results = {}
+    client = RotctldClient(host, port)
+    client.execute("p")  # Connect outside the measurement
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.execute("p")
+        samples.append(time.perf_counter() - start)
+    client.close()
+    results["persistent"] = percentiles(samples)
+
+    if rotctl:
+        samples = []
+        for _ in range(rotctl_count):
+            start = time.perf_counter()
+            subprocess.run([rotctl, "-m", "2", "-r", f"{host}:{port}", "p"], capture_output=True, timeout=10)
+            samples.append(time.perf_counter() - start)
+        results["subprocess"] = percentiles(samples)
+    return results
+
+
+def run_worker(host, port, duration, tick=0.1, on_tick=None):
+    """Polls as fast as possible for ``duration`` s while a fake Tk tick drains the results."""
+    results = queue.Queue()
+    scheduler = AdaptivePollScheduler(fast_interval=0.0, slow_interval=0.0, jitter=0.0)
+    worker = RotorWorker(results, scheduler)
+    worker.start()
+    worker.configure(host, port, "", "tcp")
+    worker.set_polling(True)
+
+    snapshots = 0
+    drain_times = []
+    tick_lags = []
+    deadline = time.perf_counter() + duration
+    next_tick = time.perf_counter() + tick
+    while time.perf_counter() < deadline:
+        time.sleep(max(0.0, next_tick - time.perf_counter()))
+        tick_lags.append(max(0.0, time.perf_counter() - next_tick))
+        next_tick += tick
+        # Same work as RotorControlGUI.process_rotor_results, minus the widgets
+        start = time.perf_counter()
+        latest = None
+        while True:
+            try:
+                result = results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, PositionSnapshot):
+                snapshots += 1
+                latest = result
+        if on_tick is not None:
+            on_tick(latest)
+        drain_times.append(time.perf_counter() - start)
+
+    worker.stop()
+    return snapshots, drain_times, tick_lags
+
+
+def bench_throughput(host, port, duration):
+    snapshots, drain_times, tick_lags = run_worker(host, port, duration)
+    return (
+        {"duration_s": duration, "polls": snapshots, "polls_per_s": round(snapshots / duration, 1)},
+        {"drain": percentiles(drain_times), "tick_lag": percentiles(tick_lags)},
+    )
+
+
+def bench_memory(host, port, duration, log_lines_per_tick=20):
+    pipeline = LogPipeline(capacity=10000)
+    counter = [0]
+
+    def on_tick(_):
+        # Emulate rotctld -vvvv chatter plus the widget flush
+        for _ in range(log_lines_per_tick):
+            counter[0] += 1
+            pipeline.push(f"rot_get_position called, line {counter[0]}")
+        pipeline.drain(500)
+
+    tracemalloc.start()
+    run_worker(host, port, min(2.0, duration), on_tick=on_tick)  # Warm up caches and the connection
+    baseline, _ = tracemalloc.get_traced_memory()
+    run_worker(host, port, duration, on_tick=on_tick)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    growth = current - baseline
+    return {
+        "duration_s": duration,
+        "baseline_bytes": baseline,
+        "final_bytes": current,
+        "peak_bytes": peak,
+        "growth_bytes": growth,
+        "growth_bytes_per_hour": int(growth / duration * 3600),
+    }
+
+
+def compare(current, baseline, prefix=""):
+    """Prints the relative change of every numeric result against a previous run."""
+    for key, value in current.items():
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            compare(value, old or {}, name + ".")
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            change = (value - old) / abs(old) * 100
+            print(f"{name:>40}: {old:>12} -> {value:<12} ({change:+.1f}%)")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", help="Benchmark an existing rotctld instead of the simulator")
+    parser.add_argument("--port", type=int, default=4533)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated serial latency per command (s)")
+    parser.add_argument("--count", type=int, default=2000, help="Round trips for the latency test")
+    parser.add_argument("--rotctl", help="Path to rotctl(.exe) to also measure the subprocess path")
+    parser.add_argument("--duration", type=float, default=5.0, help="Throughput test duration (s)")
+    parser.add_argument("--soak", type=float, default=30.0, help="Memory soak duration (s), 0 to skip")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    simulator = None
+    host, port = args.host, args.port
+    if host is None:
+        simulator = SimulatedRotctld(SimulatedRotor(latency=args.latency), port=0)
+        host, port = "127.0.0.1", simulator.start()
+
+    try:
+        throughput, ui_blocking = bench_throughput(host, port, args.duration)
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "target": "simulator" if simulator else f"{host}:{port}",
+                "simulated_latency_s": args.latency if simulator else None,
+            },
+            "latency": bench_latency(host, port, args.count, args.rotctl),
+            "throughput": throughput,
+            "ui_blocking": ui_blocking,
+        }
+        if args.soak > 0:
+            results["memory"] = bench_memory(host, port, args.soak)
+    finally:
+        if simulator:
+            simulator.stop()
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Sky-scan timing benchmark: the scheduled ScanRunner against a naive sleep loop.
+
+Runs the same raster against a SimulatedRotctld (in-process, real time) twice:
+
+- naive: command, poll until arrived, time.sleep(dwell), repeat; each
+  point starts whenever the previous one happened to finish
+- scheduled: sky_scan.ScanRunner with its monotonic timetable
+
+and reports how far each point's dwell started from the planned timetable
+and how far the scan as a whole ended from it. Results are JSON, comparable
+like bench_rotor.py:
+
+    python benchmarks/bench_scan.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_rotor import compare, git_revision
+from command_script import response_position
+from rotor_simulator import SimulatedRotctld, SimulatedRotor
+from rotor_worker import RotorWorker
+from sky_scan import ScanRunner, plan, raster
+from trajectory import SlewModel, TrajectoryPlanner, WrapTable
+
+
+def stats(offsets):
+    ordered = sorted(abs(o) for o in offsets)
+    return {
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 2),
+        "p95_ms": round(1000 * ordered[int(0.95 * (len(ordered) - 1))], 2),
+        "max_ms": round(1000 * ordered[-1], 2),
+    }
+
+
+def run_naive(worker, points, args):
+    planned = plan(points, (0.0, 0.0), SlewModel(args.slew, args.slew), settle=args.settle)
+    origin = time.monotonic()
+    starts = []
+    for p in planned:
+        worker.call(["P", f"{p.azimuth:.2f}", f"{p.point.elevation:.2f}"], tag="bench").result(timeout=30)
+        while True:
+            position = response_position(worker.call(["p"], tag="bench").result(timeout=30))
+            if position and abs(position[0] - p.azimuth) <= 1 and abs(position[1] - p.point.elevation) <= 1:
+                break
+            time.sleep(args.poll)
+        starts.append(time.monotonic() - origin - p.planned)
+        time.sleep(p.point.dwell)
+    end = time.monotonic() - origin - (planned[-1].planned + planned[-1].point.dwell)
+    return dict(stats(starts), end_drift_ms=round(1000 * end, 2))
+
+
+def run_scheduled(worker, points, args, results_path):
+    planner = TrajectoryPlanner(WrapTable(0, 360), SlewModel(args.slew, args.slew))
+    runner = ScanRunner(worker, points, results_path, planner, poll_interval=args.poll, settle=args.settle)
+    summary = runner.start((0.0, 0.0)).result(timeout=3600)
+    if summary.error:
+        raise RuntimeError(summary.error)
+    with open(results_path) as f:
+        rows = f.read().splitlines()[1:]
+    starts = [float(row.split(",")[7]) - float(row.split(",")[4]) for row in rows]
+    return dict(stats(starts), end_drift_ms=round(1000 * summary.drift, 2),
+                end_error_max_ms=round(max(float(row.split(",")[10]) for row in rows), 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slew", type=float, default=30.0, help="Simulated slew rate in deg/s")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated serial latency in seconds")
+    parser.add_argument("--dwell", type=float, default=0.3)
+    parser.add_argument("--poll", type=float, default=0.1, help="Arrival poll interval in seconds")
+    parser.add_argument("--settle", type=float, default=0.5, help="Slack per move in the timetable")
+    parser.add_argument("--pattern", default="0 60 10 0 20 10", help="Raster AZ_FROM AZ_TO AZ_STEP EL_FROM EL_TO EL_STEP")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    points = raster(*map(float, args.pattern.split()), args.dwell)
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenario": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "points": len(points),
+        },
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("naive", "scheduled"):
+            server = SimulatedRotctld(SimulatedRotor(az_slew=args.slew, el_slew=args.slew, min_az=0, max_az=360,
+                                                     latency=args.latency), port=0)
+            server.start()
+            worker = RotorWorker(queue.Queue())
+            worker.configure("127.0.0.1", server.port, "", "tcp")
+            worker.start()
+            try:
+                if mode == "naive":
+                    results[mode] = run_naive(worker, points, args)
+                else:
+                    results[mode] = run_scheduled(worker, points, args, os.path.join(tmp, "scan.csv"))
+            finally:
+                worker.stop()
+                server.stop()
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Startup-time benchmark.
+
+Every measurement runs in a fresh interpreter so module caches don't hide
+anything:
+
+- imports: time to import the GUI module and the headless service
+  (the headless one must stay free of tkinter, pyserial and NumPy)
+- discovery: the COM port scan + Hamlib search that used to block startup
+- first_position: cold start of ``rotor_control --headless --once`` against
+  the rotor simulator, until the first position is printed
+
+Results are JSON, comparable between versions like bench_rotor.py:
+
+    python benchmarks/bench_startup.py --output before.json
+    python benchmarks/bench_startup.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_rotor import compare, git_revision, percentiles
+from rotor_simulator import SimulatedRotctld, SimulatedRotor
+
+HEAVY_MODULES = ("tkinter", "serial", "numpy", "sgp4")
+
+_IMPORT_PROBE = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps([elapsed, sorted(m for m in {heavy!r} if m in sys.modules)]))
+"""
+
+
+def run_python(code, timeout=60):
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=timeout)
+
+
+def bench_import(module, runs):
+    samples = []
+    loaded = []
+    for _ in range(runs):
+        process = run_python(_IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES))
+        if process.returncode != 0:
+            return {"error": process.stderr.strip().splitlines()[-1]}
+        elapsed, loaded = json.loads(process.stdout)
+        samples.append(elapsed)
+    result = percentiles(samples)
+    result["heavy_modules_loaded"] = loaded
+    return result
+
+
+def bench_discovery(runs):
+    code = ("import time, port_discovery; started = time.perf_counter(); "
+            "port_discovery.discover(None); print(time.perf_counter() - started)")
+    samples = []
+    for _ in range(runs):
+        process = run_python(code)
+        if process.returncode != 0:
+            return {"error": process.stderr.strip().splitlines()[-1]}
+        samples.append(float(process.stdout))
+    return percentiles(samples)
+
+
+def bench_first_position(runs, latency):
+    simulator = SimulatedRotctld(SimulatedRotor(latency=latency), port=0)
+    port = simulator.start()
+    config = {
+        "host": "127.0.0.1", "port": str(port), "rotctl_transport": "tcp",
+        "proxy_port": 0, "telemetry_file": "", "log_file": "",
+    }
+    first_position = []
+    total = []
+    failures = 0
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            config_file = os.path.join(directory, "config.json")
+            with open(config_file, "w") as f:
+                json.dump(config, f)
+            command = [sys.executable, os.path.join(ROOT, "rotor_control.py"),
+                       "--headless", "--once", "--timeout", "10", "--config", config_file]
+            for _ in range(runs):
+                started = time.perf_counter()
+                process = subprocess.Popen(command, cwd=directory, stdout=subprocess.PIPE, text=True)
+                for line in process.stdout:
+                    if line.startswith("Azimuth="):
+                        first_position.append(time.perf_counter() - started)
+                        break
+                else:
+                    failures += 1
+                process.stdout.read()
+                process.wait()
+                total.append(time.perf_counter() - started)
+    finally:
+        simulator.stop()
+    return {"first_position": percentiles(first_position), "process_total": percentiles(total), "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per measurement")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated serial latency per command (s)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "simulated_latency_s": args.latency,
+        },
+        "imports": {
+            "gui": bench_import("rotor_control_gui", args.runs),
+            "headless": bench_import("rotor_headless", args.runs),
+        },
+        "discovery": bench_discovery(args.runs),
+        "cold_start": bench_first_position(args.runs, args.latency),
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
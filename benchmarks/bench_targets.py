@@ -0,0 +1,138 @@
+"""Target lookup benchmark: per-query trigonometry against the precomputed index.
+
+Resolves a mix of 4-character locators, 6-character locators and callsigns
+(a synthetic country file, unless --cty points at a real cty.dat) three ways:
+
+- scalar: the pre-index way, parse and compute every query on its own in pure Python
+- batch: all queries in one vectorised NumPy call
+- index: TargetIndex.lookup() on the precomputed index, one query at a time
+
+and times building, saving and re-loading the index. Results are JSON,
+comparable like bench_rotor.py:
+
+    python benchmarks/bench_targets.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_rotor import compare, git_revision
+import target_lookup
+from target_lookup import Station, TargetIndex, great_circle, locators_to_latlon
+
+
+def scalar_bearing(station, locator):
+    """One locator the straightforward way, for reference."""
+    lon = (ord(locator[0]) - 65) * 20 - 180 + (ord(locator[2]) - 48) * 2
+    lat = (ord(locator[1]) - 65) * 10 - 90 + (ord(locator[3]) - 48)
+    if len(locator) >= 6:
+        lon += (ord(locator[4]) - 65) * 2 / 24 + 1 / 24
+        lat += (ord(locator[5]) - 65) / 24 + 1 / 48
+    else:
+        lon, lat = lon + 1, lat + 0.5
+    lat0, lon0, lat1 = math.radians(station.latitude), math.radians(station.longitude), math.radians(lat)
+    dlon = math.radians(lon) - lon0
+    azimuth = math.degrees(math.atan2(math.sin(dlon) * math.cos(lat1),
+                                      math.cos(lat0) * math.sin(lat1) - math.sin(lat0) * math.cos(lat1) * math.cos(dlon)))
+    a = math.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat1) * math.sin(dlon / 2) ** 2
+    return azimuth % 360, 2 * target_lookup.EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def synthetic_cty(path, entities=340, prefixes=60):
+    rng = random.Random(1)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    with open(path, "w") as f:
+        for n in range(entities):
+            primary = letters[n % 26] + letters[n // 26 % 26] + str(n % 10)
+            f.write(f"Entity {n}:  14:  28:  EU:  {rng.uniform(-60, 70):.2f}:  {rng.uniform(-180, 180):.2f}:  0.0:  {primary}:\n")
+            aliases = [primary + letters[i % 26] + str(i % 10) for i in range(prefixes)]
+            f.write("    " + ",".join(aliases) + ";\n")
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--cty", help="cty.dat to use instead of a synthetic one")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    station = Station(48.1, 11.6, 520.0)
+    rng = random.Random(2)
+    squares = target_lookup.all_squares()
+    locators = [rng.choice(squares) + (rng.choice("ABCDEFGHIJKLMNOPQRSTUVWX") * 2 if rng.random() < 0.3 else "")
+                for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cty = args.cty
+        if not cty:
+            cty = os.path.join(tmp, "cty.dat")
+            synthetic_cty(cty)
+        calls = [prefix + "1ABC" for prefix, _, _, _, _ in target_lookup.parse_cty(cty)]
+        calls = [rng.choice(calls) for _ in range(args.queries)]
+        index_path = os.path.join(tmp, "targets.npz")
+
+        build_s, index = timed(lambda: TargetIndex.build(station, cty), 3)
+        index.save(index_path)
+        load_s, loaded = timed(lambda: TargetIndex.load(index_path, station, cty), 3)
+        assert loaded is not None
+
+        scalar_s, _ = timed(lambda: [scalar_bearing(station, loc) for loc in locators], 1)
+        batch_s, _ = timed(lambda: great_circle(station, *locators_to_latlon(locators)), 1)
+        index_s, _ = timed(lambda: [index.lookup(loc) for loc in locators], 1)
+        call_s, found = timed(lambda: [index.lookup(call) for call in calls], 1)
+
+    per_query = 1e6 / args.queries
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "queries": args.queries,
+        },
+        "index": {
+            "build_ms": round(build_s * 1000, 2),
+            "load_ms": round(load_s * 1000, 2),
+            "prefixes": len(index.prefixes),
+        },
+        "locators": {
+            "scalar_us_per_query": round(scalar_s * per_query, 3),
+            "batch_us_per_query": round(batch_s * per_query, 3),
+            "index_us_per_query": round(index_s * per_query, 3),
+        },
+        "callsigns": {
+            "index_us_per_query": round(call_s * per_query, 3),
+            "resolved": sum(f is not None for f in found),
+        },
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
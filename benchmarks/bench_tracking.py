@@ -0,0 +1,151 @@
+"""Tracking-error benchmark for the trajectory planner.
+
+Flies a synthetic overhead pass that crosses north past a SimulatedRotor on
+a virtual clock, so a 10 minute pass takes well under a second, and compares
+three ways of commanding it:
+
+- as_is: the old behaviour, the satellite bearing sent straight to the rotor
+- wrap: the planner's turn selection (one wrap for the whole pass), no lead
+- lead: turn selection plus lead set-points
+
+Each run reports the pointing error between the polled position and the true
+target position, and the degrees the rotor slewed in total (a long way round
+shows up there). Results are JSON, comparable like bench_rotor.py:
+
+    python benchmarks/bench_tracking.py --output before.json
+    python benchmarks/bench_tracking.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_rotor import compare, git_revision
+from rotor_simulator import SimulatedRotor
+from trajectory import SlewModel, TrajectoryPlanner, WrapTable, bearing, pointing_error
+
+
+def synthetic_pass(duration, start_az, sweep, max_el, sharpness=8.0):
+    """Unwrapped (az, el) of an overhead-ish pass; the azimuth rate peaks at culmination like a real LEO."""
+    def position_at(t):
+        t = min(max(t, 0.0), duration)
+        phase = 2 * t / duration - 1  # -1 at AOS, 1 at LOS
+        azimuth = start_az + sweep * (0.5 + math.atan(sharpness * phase) / (2 * math.atan(sharpness)))
+        return azimuth, max_el * math.cos(phase * math.pi / 2)
+    return position_at
+
+
+def run_mode(mode, args):
+    clock = [-args.park]  # Set-points before AOS aim at the AOS position, as the tracker's do
+    rotor = SimulatedRotor(az_slew=args.slew, el_slew=args.slew, min_az=args.min_az, max_az=args.max_az,
+                           clock=lambda: clock[0])
+    assumed = args.slew if args.assumed_slew is None else args.assumed_slew
+    planner = TrajectoryPlanner(WrapTable(args.min_az, args.max_az), SlewModel(assumed, assumed),
+                                latency=args.latency, interval=args.interval, lead_enabled=(mode == "lead"))
+    position_at = synthetic_pass(args.duration, args.start_az, args.sweep, args.max_el)
+    planner.update(clock[0], *rotor.position())
+    offset = 0.0
+    if mode != "as_is":
+        samples = [position_at(t)[0] for t in range(0, int(args.duration) + 1, 10)]
+        offset = planner.pass_offset(samples, current=rotor.position())
+
+    def target_at(t):
+        azimuth, elevation = position_at(t)
+        if offset is None:
+            # Doesn't fit on one turn, as PassTracker does: nearest turn per set-point
+            return planner.wraps.nearest(bearing(azimuth), planner.current[0]), elevation
+        return azimuth + offset, elevation
+
+    step = 0.01
+    pending = []       # (apply at, az, el): commands still in the queue / on the wire
+    next_command = next_poll = clock[0]
+    errors = []
+    travelled = 0.0
+    last = rotor.position()
+    rejected = 0
+    while clock[0] <= args.duration:
+        now = clock[0]
+        if now >= next_command:
+            if mode == "lead":
+                azimuth, elevation = planner.lead_setpoint(target_at, now)
+            else:
+                azimuth, elevation = target_at(now)
+                if mode == "as_is":
+                    azimuth = bearing(azimuth)
+            planner.target = (azimuth, elevation)
+            pending.append((now + args.latency, azimuth, elevation))
+            next_command += args.interval
+        while pending and pending[0][0] <= now:
+            _, azimuth, elevation = pending.pop(0)
+            if not rotor.set_target(azimuth, elevation):
+                rejected += 1
+        if now >= next_poll:
+            position = rotor.position()
+            planner.update(now, *position)
+            if now >= 0:
+                errors.append(pointing_error(position, target_at(now)))
+                travelled += abs(position[0] - last[0]) + abs(position[1] - last[1])
+            last = position
+            next_poll += args.poll
+        clock[0] = now + step
+
+    ordered = sorted(errors)
+    return {
+        "rms_deg": round(math.sqrt(sum(e * e for e in errors) / len(errors)), 3),
+        "mean_deg": round(sum(errors) / len(errors), 3),
+        "p95_deg": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        "max_deg": round(ordered[-1], 3),
+        "travelled_deg": round(travelled, 1),
+        "rejected_setpoints": rejected,
+        "learned_az_slew": round(planner.slew.az_rate, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slew", type=float, default=6.0, help="Rotor slew rate in deg/s")
+    parser.add_argument("--assumed-slew", type=float, help="Slew rate the planner starts from (default: --slew)")
+    parser.add_argument("--min-az", type=float, default=0.0)
+    parser.add_argument("--max-az", type=float, default=450.0, help="Use 360 for a rotor without overlap")
+    parser.add_argument("--latency", type=float, default=0.2, help="Command latency in seconds")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between set-points")
+    parser.add_argument("--poll", type=float, default=0.5, help="Seconds between position polls")
+    parser.add_argument("--duration", type=float, default=600.0, help="Pass length in seconds")
+    parser.add_argument("--start-az", type=float, default=300.0, help="AOS azimuth")
+    parser.add_argument("--sweep", type=float, default=140.0, help="Azimuth travelled over the pass")
+    parser.add_argument("--max-el", type=float, default=75.0)
+    parser.add_argument("--park", type=float, default=120.0, help="Seconds to reach the AOS position")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a previous JSON result file")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scenario": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "tracking": {mode: run_mode(mode, args) for mode in ("as_is", "wrap", "lead")},
+    }
+
+    print(json.dumps(results, indent=4))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        compare({k: v for k, v in results.items() if k != "meta"}, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Batch command scripts for the Manual Command panel.
+
+A script is plain text, one rotctld command per line (``P 180 45``, ``S``,
+``M 8 50``, ...) plus a few directives that run on our side:
+
+    # comment                 ignored, as are blank lines
+    wait 2.5                  pause for 2.5 s (``sleep`` works too)
+    dwell 10 [tolerance]      wait until the rotor reaches the last P
+                              set-point (within ``tolerance`` degrees,
+                              default 1), then hold for 10 s
+
+Runs of consecutive commands are pipelined to rotctld over the worker's
+persistent connection, ``window`` lines per write, so a long routine costs
+one round trip per batch rather than a process spawn per line. The runner
+lives on its own thread and can be cancelled between any two replies.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from command_queue import SETPOINT_COMMANDS, command_name
+from trajectory import setpoint_error
+
+# kind is "command", "wait" or "dwell"; line is the 1-based source line
+ScriptStep = namedtuple("ScriptStep", "line kind args")
+
+# Outcome of a run; elapsed in seconds
+ScriptSummary = namedtuple("ScriptSummary", "commands errors elapsed cancelled error")
+
+WAIT_DIRECTIVES = ("wait", "sleep")
+
+
+def parse_script(text):
+    """Returns the ScriptSteps of ``text``; raises ValueError naming the offending line."""
+    steps = []
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        args = line.split()
+        directive = args[0].lower()
+        if directive in WAIT_DIRECTIVES or directive == "dwell":
+            expected = (1,) if directive != "dwell" else (1, 2)
+            if len(args) - 1 not in expected:
+                raise ValueError(f"Line {number}: '{args[0]}' takes {' or '.join(map(str, expected))} argument(s)")
+            try:
+                values = [float(value) for value in args[1:]]
+            except ValueError:
+                raise ValueError(f"Line {number}: '{args[0]}' needs numbers, got '{' '.join(args[1:])}'")
+            if any(value < 0 for value in values):
+                raise ValueError(f"Line {number}: '{args[0]}' can't wait a negative time")
+            steps.append(ScriptStep(number, "dwell" if directive == "dwell" else "wait", values))
+        else:
+            steps.append(ScriptStep(number, "command", args))
+    return steps
+
+
+def response_position(response):
+    """(az, el) from the reply to a ``p`` command, or None if it failed or isn't a position."""
+    if not response.ok:
+        return None
+    values = response.values
+    try:
+        return (float(response.get("Azimuth", values[0] if values else None)),
+                float(response.get("Elevation", values[1] if len(values) > 1 else None)))
+    except (TypeError, ValueError):
+        return None
+
+
+def load_script(path):
+    with open(path) as f:
+        return parse_script(f.read())
+
+
+def group_steps(steps, window=16):
+    """Splits steps into units of work: a list of up to ``window`` consecutive commands, or one directive."""
+    groups = []
+    batch = []
+    for step in steps:
+        if step.kind == "command":
+            batch.append(step)
+            if len(batch) >= window:
+                groups.append(batch)
+                batch = []
+            continue
+        if batch:
+            groups.append(batch)
+            batch = []
+        groups.append(step)
+    if batch:
+        groups.append(batch)
+    return groups
+
+
+class ScriptRunner:
+    """Runs parsed steps through a RotorWorker on a background thread.
+
+    Replies arrive on the worker's results queue as CommandResult tuples
+    tagged ``tag``, so they stream into the log like any other command. With ``stop_on_error`` the script
+    ends at the first failed command; lines already pipelined behind it in
+    the same batch have been sent by then.
+    """
+    def __init__(self, worker, steps, tag="script", window=16, arrival_tolerance=1.0,
+                 arrival_timeout=180.0, poll_interval=0.25, stop_on_error=True, stop_on_cancel=True):
+        self.worker = worker
+        self.steps = list(steps)
+        self.tag = tag
+        self.window = max(1, int(window))
+        self.arrival_tolerance = arrival_tolerance
+        self.arrival_timeout = arrival_timeout
+        self.poll_interval = poll_interval
+        self.stop_on_error = stop_on_error
+        self.stop_on_cancel = stop_on_cancel
+        self.completed = 0       # Steps finished so far, for progress display
+        self.current_line = None
+        self.setpoint = None     # Last (az, el) the script commanded, for dwell
+        self.poll_error = None   # Why the last arrival poll failed, if it did
+        self._cancel = threading.Event()
+        self._pending = None     # Future of the batch in flight
+        self._future = None
+
+    @property
+    def total(self):
+        return len(self.steps)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        """Starts the script and returns a Future for its ScriptSummary."""
+        self._future = Future()
+        threading.Thread(target=self._run, name="command-script", daemon=True).start()
+        return self._future
+
+    def cancel(self):
+        """Stops after the reply currently in flight; with ``stop_on_cancel`` the rotor is stopped too."""
+        if self._cancel.is_set():
+            return
+        self._cancel.set()
+        pending = self._pending
+        if pending is not None:
+            pending.cancel()  # Only works while the batch is still queued
+        if self.stop_on_cancel:
+            self.worker.submit(["S"], tag=self.tag)
+
+    def _run(self):
+        started = time.monotonic()
+        commands = errors = 0
+        error = None
+        try:
+            for group in group_steps(self.steps, self.window):
+                if self._cancel.is_set():
+                    break
+                if isinstance(group, list):
+                    sent, failed = self._run_commands(group)
+                    commands += sent
+                    errors += len(failed)
+                    if failed and self.stop_on_error and not self._cancel.is_set():
+                        error = f"stopped after an error on line {failed[0].line}"
+                        break
+                elif group.kind == "wait":
+                    self.current_line = group.line
+                    self._cancel.wait(group.args[0])
+                    self.completed += 1
+                else:
+                    self.current_line = group.line
+                    if not self._dwell(*group.args):
+                        if not self._cancel.is_set():
+                            error = (f"line {group.line}: rotor did not reach {self.setpoint} "
+                                     f"within {self.arrival_timeout:.0f} s")
+                            if self.poll_error:
+                                error += f" (last poll failed: {self.poll_error})"
+                        break
+                    self.completed += 1
+        except Exception as e:
+            error = str(e)
+        self._future.set_result(ScriptSummary(commands, errors, time.monotonic() - started,
+                                              self._cancel.is_set(), error))
+
+    def _run_commands(self, batch):
+        failed = []
+
+        def received(index, response):
+            # Called on the worker thread as each reply arrives
+            step = batch[index]
+            self.current_line = step.line
+            self.completed += 1
+            if not response.ok:
+                failed.append(step)
+            elif command_name(step.args) in SETPOINT_COMMANDS and len(step.args) >= 3:
+                try:
+                    self.setpoint = (float(step.args[1]), float(step.args[2]))
+                except ValueError:
+                    pass
+
+        self._pending = self.worker.call_batch([step.args for step in batch], self.tag, received)
+        try:
+            while True:
+                try:
+                    responses = self._pending.result(timeout=0.1)
+                    break
+                except FutureTimeout:
+                    if self._cancel.is_set() and self._pending.cancel():
+                        return 0, []
+        except CancelledError:
+            return 0, []
+        finally:
+            self._pending = None
+        return len(responses), failed
+
+    def _dwell(self, seconds, tolerance=None):
+        # Waits for arrival at the last set-point, then holds; False if cancelled or it never arrives
+        tolerance = self.arrival_tolerance if tolerance is None else tolerance
+        if self.setpoint is not None:
+            deadline = time.monotonic() + self.arrival_timeout
+            while not self._arrived(tolerance):
+                if self._cancel.wait(self.poll_interval) or time.monotonic() > deadline:
+                    return False
+        return not self._cancel.wait(seconds)
+
+    def _arrived(self, tolerance):
+        try:
+            response = self.worker.call(["p"], tag=f"{self.tag}_poll").result(timeout=30)
+        except (CancelledError, FutureTimeout):
+            return False
+        except Exception as e:
+            self.poll_error = str(e)  # Worker-side failure: not arrived, and said so if it never does
+            return False
+        self.poll_error = None
+        position = response_position(response)
+        if position is None:
+            return False
+        return setpoint_error(position[0], self.setpoint[0]) <= tolerance and abs(position[1] - self.setpoint[1]) <= tolerance
@@ -0,0 +1,110 @@
+"""Fake SPID Rot2Prog controller on a pseudo-terminal (POSIX only).
+
+Lets the native backend be exercised without hardware:
+
+    python fake_rot2prog.py --slew 6
+
+prints the pty device path to use as the COM port. The fake answers status
+and stop frames with 12 byte status replies and slews towards set-points at
+a fixed rate, using the same SimulatedRotor model as rotor_simulator.py.
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from rot2prog import K_SET, K_STATUS, K_STOP, MAX_AZ, MAX_EL, MIN_AZ, MIN_EL, build_status_frame, parse_command_frame
+from rotor_simulator import SimulatedRotor
+
+FRAME_SIZE = 13
+
+
+class FakeRot2Prog:
+    """Rot2Prog protocol responder behind the slave end of a pty."""
+    def __init__(self, slew_rate=6.0, resolution=10, reply_delay=0.0, rotor=None):
+        self.rotor = rotor or SimulatedRotor(az_slew=slew_rate, el_slew=slew_rate, min_az=MIN_AZ,
+                                             max_az=MAX_AZ, min_el=MIN_EL, max_el=MAX_EL)
+        self.resolution = resolution
+        self.reply_delay = reply_delay
+        self.frames_received = 0
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+
+    @property
+    def device(self):
+        return os.ttyname(self._slave)
+
+    def start(self):
+        import tty
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name="fake-rot2prog", daemon=True)
+        self._thread.start()
+        return self.device
+
+    def stop(self):
+        self._running = False
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def position(self):
+        return self.rotor.position()
+
+    def _serve(self):
+        buffer = b""
+        while self._running:
+            try:
+                data = os.read(self._master, 64)
+            except OSError:
+                break
+            buffer += data
+            while len(buffer) >= FRAME_SIZE:
+                frame, buffer = buffer[:FRAME_SIZE], buffer[FRAME_SIZE:]
+                try:
+                    command, az, el = parse_command_frame(frame)
+                except ValueError:
+                    buffer = b""  # Lost sync, drop everything like the real controller
+                    break
+                self.frames_received += 1
+                if command == K_SET:
+                    self.rotor.set_target(az, el)
+                    continue
+                if command == K_STOP:
+                    self.rotor.stop()
+                if command in (K_STATUS, K_STOP):
+                    if self.reply_delay:
+                        time.sleep(self.reply_delay)
+                    az, el = self.rotor.position()
+                    reply = build_status_frame(az, el, self.resolution, self.resolution)
+                    os.write(self._master, reply)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Rot2Prog rotor on a pty")
+    parser.add_argument("--slew", type=float, default=6.0, help="Slew rate in deg/s")
+    parser.add_argument("--resolution", type=int, default=10, help="Pulses per degree (PH/PV)")
+    args = parser.parse_args()
+
+    fake = FakeRot2Prog(slew_rate=args.slew, resolution=args.resolution)
+    print(f"Fake Rot2Prog listening on {fake.start()}  (Ctrl+C to quit)")
+    try:
+        while True:
+            time.sleep(1)
+            az, el = fake.position()
+            print(f"az={az:7.1f} el={el:6.1f} frames={fake.frames_received}")
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Bounded, batched logging between producer threads and the Tk log widget.
+
+Any thread may push lines; they land in a fixed-size ring buffer and, in full,
+in a size-rotated log file. The Tk thread drains the ring in batches on its own
+schedule, so no other thread ever touches the widget and memory stays bounded
+over multi-day sessions.
+"""
+
+import logging
+import logging.handlers
+import re
+import threading
+from collections import deque
+
+# rotctld -vvvv output is trace noise unless it looks like a problem
+_PROBLEM_RE = re.compile(r"error|fail|warn|timeout|denied|cannot|can't", re.IGNORECASE)
+
+
+def classify_rotctld_line(line):
+    """Returns the logging level to use for one line of rotctld output."""
+    return logging.WARNING if _PROBLEM_RE.search(line) else logging.DEBUG
+
+
+class LogPipeline:
+    """Thread-safe ring buffer of log lines with a rotating file sink.
+
+    Lines below INFO are always written to the file but only reach the ring
+    (and therefore the widget) while ``show_verbose`` is set.
+    """
+    def __init__(self, capacity=10000, log_file=None, max_bytes=1048576, backup_count=5, show_verbose=False):
+        self.show_verbose = show_verbose
+        self.log_file = log_file
+        self.dropped = 0  # Lines pushed out of the ring before the widget saw them
+        self._ring = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._handler = None
+        self._file_logger = None
+        if log_file:
+            self._handler = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True
+            )
+            self._handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s"))
+            self._file_logger = logging.getLogger("rotor_control.log_pipeline")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.DEBUG)
+            for old_handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(old_handler)
+                old_handler.close()
+            self._file_logger.addHandler(self._handler)
+
+    def push(self, message, level=logging.INFO):
+        """Records a line; safe to call from any thread."""
+        if self._file_logger is not None:
+            self._file_logger.log(level, message)
+        if level < logging.INFO and not self.show_verbose:
+            return
+        with self._lock:
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+            self._ring.append(message)
+
+    def drain(self, limit=None):
+        """Removes up to ``limit`` buffered lines, returning (lines, dropped_since_last_drain)."""
+        with self._lock:
+            count = len(self._ring) if limit is None else min(limit, len(self._ring))
+            lines = [self._ring.popleft() for _ in range(count)]
+            dropped, self.dropped = self.dropped, 0
+        return lines, dropped
+
+    def pending(self):
+        return len(self._ring)
+
+    def close(self):
+        if self._handler is not None:
+            self._file_logger.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+            self._file_logger = None
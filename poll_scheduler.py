@@ -0,0 +1,120 @@
+"""Adaptive polling schedule for the rotor position.
+
+Polls fast while the rotor is moving or a set-point is still pending, slowly
+once it has been idle for a while, and backs off exponentially (with jitter)
+while polls keep failing. The fast rate is never allowed to use more than a
+set share of the serial link's capacity.
+"""
+
+import random
+import time
+
+# One Rot2Prog status exchange: 13 byte command frame plus 12 byte reply
+POLL_BYTES = 25
+
+
+def link_poll_floor(baud_rate, max_duty=0.5, poll_bytes=POLL_BYTES):
+    """Shortest poll interval (s) that keeps a poll below ``max_duty`` of the serial link."""
+    try:
+        baud_rate = float(baud_rate)
+    except (TypeError, ValueError):
+        return 0.0
+    if baud_rate <= 0 or max_duty <= 0:
+        return 0.0
+    # 8N1 framing: 10 bits on the wire per byte
+    return poll_bytes * 10 / baud_rate / max_duty
+
+
+class AdaptivePollScheduler:
+    """Decides how long to wait before the next position poll.
+
+    Feed it every poll outcome (record_position/record_error) and every
+    set-point (set_target), then ask next_interval() for the delay in seconds.
+    """
+    def __init__(self, fast_interval=0.3, slow_interval=5.0, idle_after=3.0, motion_threshold=0.2,
+                 arrival_tolerance=1.0, target_timeout=120.0, backoff_base=1.0, backoff_max=30.0,
+                 jitter=0.2, min_interval=0.0, clock=time.monotonic, rng=random.random):
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.idle_after = idle_after              # Seconds without motion before dropping to the slow rate
+        self.motion_threshold = motion_threshold  # Degrees between polls that count as moving
+        self.arrival_tolerance = arrival_tolerance
+        self.target_timeout = target_timeout      # Give up waiting for a set-point that is never reached
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.min_interval = min_interval          # Floor imposed by the serial link, see link_poll_floor
+        self.clock = clock
+        self.rng = rng
+        self.consecutive_errors = 0
+        self.last_position = None
+        self.last_motion = None
+        self.target = None
+        self.target_set_at = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a scheduler from the poll_* keys of rotor_config.json (milliseconds)."""
+        return cls(
+            fast_interval=float(config.get("poll_fast_ms", 300)) / 1000,
+            slow_interval=float(config.get("poll_slow_ms", 5000)) / 1000,
+            idle_after=float(config.get("poll_idle_after_ms", 3000)) / 1000,
+            motion_threshold=float(config.get("poll_motion_threshold", 0.2)),
+            backoff_base=float(config.get("poll_backoff_base_ms", 1000)) / 1000,
+            backoff_max=float(config.get("poll_backoff_max_ms", 30000)) / 1000,
+            jitter=float(config.get("poll_jitter", 0.2)),
+            min_interval=link_poll_floor(config.get("baud_rate"), float(config.get("poll_max_link_duty", 0.5))),
+        )
+
+    @property
+    def moving(self):
+        if self.last_motion is None:
+            return False
+        return self.clock() - self.last_motion < self.idle_after
+
+    def set_target(self, azimuth, elevation):
+        self.target = (float(azimuth), float(elevation))
+        self.target_set_at = self.clock()
+        self.note_motion()
+
+    def clear_target(self):
+        self.target = None
+        self.target_set_at = None
+
+    def note_motion(self):
+        """Marks the rotor as moving, e.g. after an M or K command."""
+        self.last_motion = self.clock()
+
+    def record_position(self, azimuth, elevation):
+        self.consecutive_errors = 0
+        if azimuth is None or elevation is None:
+            return
+        if self.last_position is not None:
+            last_az, last_el = self.last_position
+            delta = max(abs((azimuth - last_az + 180) % 360 - 180), abs(elevation - last_el))
+            if delta >= self.motion_threshold:
+                self.note_motion()
+        self.last_position = (azimuth, elevation)
+
+        if self.target is not None:
+            target_az, target_el = self.target
+            arrived = (abs((azimuth - target_az + 180) % 360 - 180) <= self.arrival_tolerance
+                       and abs(elevation - target_el) <= self.arrival_tolerance)
+            if arrived or self.clock() - self.target_set_at > self.target_timeout:
+                self.clear_target()
+
+    def record_error(self):
+        self.consecutive_errors += 1
+
+    def next_interval(self):
+        if self.consecutive_errors:
+            # Exponential backoff: base, 2*base, 4*base, ... capped at backoff_max. The exponent is
+            # clamped too: a rotor left unplugged overnight runs up thousands of errors
+            interval = min(self.backoff_max, self.backoff_base * 2 ** min(self.consecutive_errors - 1, 32))
+        elif self.target is not None or self.moving:
+            interval = self.fast_interval
+        else:
+            interval = self.slow_interval
+        if self.jitter:
+            interval *= 1 + self.jitter * (2 * self.rng() - 1)
+        return max(interval, self.min_interval)
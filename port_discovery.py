@@ -0,0 +1,241 @@
+"""Serial port and Hamlib discovery, off the startup path.
+
+Enumerating COM ports and probing install directories can take a noticeable
+time on Windows, so the GUI starts from the results cached in its config and
+refreshes them with discover_async() in the background. pyserial is only
+imported when ports are actually enumerated.
+
+PortWatcher keeps the port list current after that. It checks a cheap
+signature of the serial devices every interval: the /dev listing on
+Linux/macOS, the SERIALCOMM registry key on Windows. It only re-enumerates
+when the signature changed, and publishes the difference as a PortChange.
+Each USB adapter is fingerprinted by VID/PID/serial number, so a rotor
+adapter that comes back under a new name (COM4 -> COM11, ttyUSB0 ->
+ttyUSB1) can be found again.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+HAMLIB_SEARCH_PATHS = [
+    "C:\\Program Files\\hamlib-w64-4.6.3\\bin",
+    "C:\\Program Files\\hamlib\\bin",
+    "C:\\Program Files (x86)\\hamlib\\bin",
+]
+
+# hamlib_path is None when no rotctld.exe was found; com_ports is None without pyserial
+Discovery = namedtuple("Discovery", "com_ports hamlib_path hamlib_configured")
+
+
+# fingerprint is None for ports that can't move (built-in UARTs, no USB ids)
+PortInfo = namedtuple("PortInfo", "device description fingerprint")
+
+# Published on the watcher's events queue; ports is the full list of device names, in enumeration order
+PortChange = namedtuple("PortChange", "timestamp ports added removed")
+
+# /dev entries that are serial ports (Linux USB/ACM/onboard, Bluetooth, macOS call-out/dial-in)
+SERIAL_DEVICE_PREFIXES = ("ttyUSB", "ttyACM", "ttyAMA", "ttyS", "rfcomm", "cu.", "tty.")
+
+
+def is_hamlib_dir(path):
+    return bool(path) and os.path.exists(os.path.join(path, "rotctld.exe"))
+
+
+def list_com_ports():
+    """Returns the device names of all serial ports, or None if pyserial is missing."""
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+    return [port.device for port in list_ports.comports()]
+
+
+def port_fingerprint(port):
+    """VID:PID:serial of a USB serial port (VID:PID@location without a serial number), or None."""
+    if getattr(port, "vid", None) is None:
+        return None
+    ids = f"{port.vid:04X}:{port.pid or 0:04X}"
+    if port.serial_number:
+        return f"{ids}:{port.serial_number}"
+    return f"{ids}@{port.location}" if port.location else ids
+
+
+def list_port_info():
+    """Returns PortInfo for all serial ports, or None if pyserial is missing."""
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+    return [PortInfo(port.device, port.description, port_fingerprint(port)) for port in list_ports.comports()]
+
+
+def device_signature():
+    """Cheap token that changes when serial devices come or go; None if there is no cheap way to tell."""
+    if sys.platform == "win32":
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"HARDWARE\DEVICEMAP\SERIALCOMM") as key:
+                values = []
+                while True:
+                    try:
+                        values.append(winreg.EnumValue(key, len(values))[:2])
+                    except OSError:
+                        break
+            return tuple(sorted(values))
+        except OSError:
+            return ()  # The key only exists while some serial port does
+    try:
+        names = [n for n in os.listdir("/dev") if n.startswith(SERIAL_DEVICE_PREFIXES)]
+    except OSError:
+        return None
+    try:
+        # Two adapters swapped within one interval keep their ttyUSBn names but not their ids
+        names += os.listdir("/dev/serial/by-id")
+    except OSError:
+        pass
+    return tuple(sorted(names))
+
+
+def replace_port(command, device):
+    """A rotctld/rotctl command line with its ``-r`` (rig file) argument pointed at ``device``."""
+    command = list(command)
+    for i, arg in enumerate(command[:-1]):
+        if arg == "-r":
+            command[i + 1] = device
+    return command
+
+
+def find_hamlib(configured_path, search_paths=HAMLIB_SEARCH_PATHS):
+    """Returns (path, configured): the Hamlib bin directory and whether it was the configured one."""
+    if is_hamlib_dir(configured_path):
+        return configured_path, True
+    for path in search_paths:
+        if is_hamlib_dir(path):
+            return path, False
+    return None, False
+
+
+def discover(configured_hamlib_path, scan_ports=True):
+    hamlib_path, configured = find_hamlib(configured_hamlib_path)
+    return Discovery(list_com_ports() if scan_ports else None, hamlib_path, configured)
+
+
+def discover_async(configured_hamlib_path, scan_ports=True):
+    """Runs discover() on a background thread and returns a Future for its Discovery."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(discover(configured_hamlib_path, scan_ports))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="port-discovery", daemon=True).start()
+    return future
+
+
+class PortWatcher:
+    """Background serial port watcher with a cached enumeration.
+
+    ``ports`` and find() answer from the cache and never block; the thread
+    re-enumerates only when device_signature() changes (or every
+    ``full_scan_interval`` when there is no signature), and puts a
+    PortChange on ``events`` whenever the port list changed.
+    """
+    def __init__(self, events, interval=1.0, full_scan_interval=10.0, signature=device_signature, lister=list_port_info):
+        self.events = events
+        self.interval = interval
+        self.full_scan_interval = full_scan_interval
+        self.signature = signature
+        self.lister = lister
+        self.ports = None           # [PortInfo, ...] from the last enumeration; None until then or without pyserial
+        self.scans = 0
+        self.checks = 0
+        self._signature = None
+        self._scanned_at = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register_metrics(self, registry):
+        registry.counter("serial_port_scans", "Full serial port enumerations").set_function(lambda: self.scans)
+        registry.gauge("serial_ports", "Serial ports present").set_function(lambda: len(self.ports or ()))
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="port-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def rescan(self):
+        """Asks the thread for a full enumeration now (the Refresh button)."""
+        with self._lock:
+            self._scanned_at = None
+        self._wake.set()
+
+    def refresh(self):
+        """Brings the cache up to date on the calling thread; cheap when nothing changed. Returns the ports."""
+        with self._lock:
+            self.checks += 1
+            signature = self.signature()
+            now = time.monotonic()
+            if self._scanned_at is not None:
+                if signature is None:
+                    if now - self._scanned_at < self.full_scan_interval:
+                        return self.ports
+                elif signature == self._signature:
+                    return self.ports
+            ports = self.lister()
+            self.scans += 1
+            self._signature, self._scanned_at = signature, now
+            old = self.ports
+            self.ports = ports
+        if ports is None:
+            return None
+        before = {p.device for p in old or ()}
+        after = [p.device for p in ports]
+        added = [d for d in after if d not in before]
+        removed = sorted(before.difference(after))
+        if old is None or added or removed:
+            self.events.put(PortChange(time.time(), after, added, removed))
+        return ports
+
+    def fingerprint(self, device):
+        """Fingerprint of the adapter currently at ``device``, from the cache."""
+        for port in self.ports or ():
+            if port.device == device:
+                return port.fingerprint
+        return None
+
+    def find(self, fingerprint):
+        """Device name the adapter with ``fingerprint`` has now, from the cache; None while it is gone."""
+        if not fingerprint:
+            return None
+        for port in self.ports or ():
+            if port.fingerprint == fingerprint:
+                return port.device
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                pass  # A driver hiccup during enumeration; the next round will do
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,326 @@
+"""Push-based position streaming for dashboards, loggers and automation.
+
+Every position/status change is published once, as a compact JSON message,
+to any number of subscribers that never touch the rotor link themselves:
+
+- UDP multicast: one datagram per message to a local group (TTL 1 by default,
+  so it stays on the LAN segment); listeners just join the group
+- HTTP on one local port:
+  ``/events``   Server-Sent Events, for EventSource in a browser or curl
+  ``/ws``       WebSocket (text frames), for anything that prefers those
+  ``/position`` the latest message, for a one-off look
+
+Messages only go out when something visible changed (position by at least
+``resolution`` degrees, connection state, set-point or error), so a parked
+rotor costs nothing. While nothing changes the last message is repeated every
+``heartbeat`` seconds with the same ``seq``, so a subscriber can tell a quiet
+rotor from a dead publisher:
+
+    {"seq":42,"t":1700000000.123,"ok":1,"az":123.4,"el":45.0,"tgt":[130.0,45.0]}
+    {"seq":43,"t":1700000003.512,"ok":0,"err":"Connection refused"}
+"""
+
+import base64
+import hashlib
+import http.server
+import json
+import socket
+import struct
+import threading
+from collections import deque
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _round(value, resolution):
+    return None if value is None else round(round(value / resolution) * resolution, 6)
+
+
+class PositionPublisher:
+    """RotorWorker listener that turns snapshots into change-only messages for its sinks.
+
+    A sink is anything with ``send(data)``, called with the encoded message on
+    the worker thread; it must not block.
+    """
+    def __init__(self, resolution=0.1, heartbeat=10.0):
+        self.resolution = resolution
+        self.heartbeat = heartbeat
+        self.sinks = []
+        self.seq = 0
+        self.published = 0
+        self.latest = None       # Encoded last message, for new subscribers
+        self._state = None
+        self._sent_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(float(config.get("stream_resolution", 0.1)), float(config.get("stream_heartbeat_s", 10)))
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def register_metrics(self, registry):
+        """Exposes the message count on a metrics.MetricsRegistry."""
+        registry.counter("rotor_stream_messages", "Position messages published (heartbeats excluded)").set_function(
+            lambda: self.published)
+
+    def update_from_snapshot(self, snapshot):
+        if snapshot.connected:
+            if snapshot.azimuth is None:
+                return
+            commanded = snapshot.commanded
+            state = (1, _round(snapshot.azimuth, self.resolution), _round(snapshot.elevation, self.resolution),
+                     None if commanded is None else tuple(_round(v, self.resolution) for v in commanded), None)
+        else:
+            state = (0, None, None, None, snapshot.error)
+        self.publish(state, snapshot.timestamp)
+
+    def publish(self, state, timestamp):
+        with self._lock:
+            if state == self._state:
+                if self.heartbeat <= 0 or timestamp - self._sent_at < self.heartbeat:
+                    return
+                data = self.latest  # Heartbeat: same message, same seq
+            else:
+                self.seq += 1
+                ok, azimuth, elevation, target, error = state
+                message = {"seq": self.seq, "t": round(timestamp, 3), "ok": ok}
+                if ok:
+                    message["az"], message["el"] = azimuth, elevation
+                    if target is not None:
+                        message["tgt"] = list(target)
+                elif error:
+                    message["err"] = str(error)
+                data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+                self.latest = data
+                self._state = state
+                self.published += 1
+            self._sent_at = timestamp
+        for sink in self.sinks:
+            sink.send(data)
+
+
+class MulticastSink:
+    """Sends each message as one UDP datagram to a multicast group."""
+    def __init__(self, group="239.255.45.34", port=4535, ttl=1, interface=None):
+        self.group = group
+        self.port = int(port)
+        self.ttl = int(ttl)
+        self.interface = interface  # Local address of the NIC to send from; None lets the OS pick
+        self.sent = 0
+        self.errors = 0
+        self._socket = None
+
+    def register_metrics(self, registry):
+        registry.counter("rotor_stream_multicast_errors", "Multicast datagrams that could not be sent").set_function(
+            lambda: self.errors)
+
+    @property
+    def running(self):
+        return self._socket is not None
+
+    def start(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # Subscribers on this PC too
+            if self.interface:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        self._socket = sock
+
+    def send(self, data):
+        sock = self._socket
+        if sock is None:
+            return
+        try:
+            sock.sendto(data, (self.group, self.port))
+            self.sent += 1
+        except OSError:
+            self.errors += 1  # No route or buffer full: this message is lost, the next one will do
+
+    def stop(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class _Subscriber:
+    """Per-client outbox; a slow client loses its oldest messages, never blocks the publisher."""
+    def __init__(self, size):
+        self.messages = deque(maxlen=size)
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def push(self, data):
+        with self.condition:
+            if len(self.messages) == self.messages.maxlen:
+                self.dropped += 1
+            self.messages.append(data)
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def wait(self, timeout):
+        """Returns the pending messages (possibly none after ``timeout``), or None once closed."""
+        with self.condition:
+            if not self.messages and not self.closed:
+                self.condition.wait(timeout)
+            if self.closed:
+                return None
+            messages = list(self.messages)
+            self.messages.clear()
+            return messages
+
+
+def websocket_frame(payload, opcode=0x1):
+    """One unmasked, unfragmented server-to-client WebSocket frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class _StreamHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        stream = self.server.stream
+        if path == "/position":
+            body = stream.latest() or b"{}"
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/events":
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.close_connection = True
+            self._serve(lambda data: b"data: " + data + b"\n\n", b": keepalive\n\n")
+        elif path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+            key = self.headers.get("Sec-WebSocket-Key", "")
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept)
+            self.end_headers()
+            self.close_connection = True
+            # Client frames (pongs, close) are not read; a gone client shows up as a failed write
+            self._serve(websocket_frame, websocket_frame(b"", opcode=0x9))
+        else:
+            self.send_error(404)
+
+    def _serve(self, frame, keepalive):
+        stream = self.server.stream
+        subscriber = stream.subscribe()
+        try:
+            self.wfile.flush()
+            while True:
+                messages = subscriber.wait(stream.keepalive)
+                if messages is None:
+                    break
+                self.wfile.write(b"".join(frame(m) for m in messages) if messages else keepalive)
+                self.wfile.flush()
+        except OSError:
+            pass  # Client went away
+        finally:
+            stream.unsubscribe(subscriber)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StreamServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    block_on_close = False
+
+
+class StreamServer:
+    """SSE / WebSocket / JSON endpoint at http://host:port for ``publisher``'s messages."""
+    def __init__(self, publisher, host="127.0.0.1", port=4536, queue_size=64, keepalive=15.0):
+        self.publisher = publisher
+        self.host = host
+        self.port = int(port)
+        self.queue_size = queue_size
+        self.keepalive = keepalive  # Seconds of silence before a keepalive, which also finds dead clients
+        self.dropped = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        publisher.add_sink(self)
+
+    def register_metrics(self, registry):
+        registry.gauge("rotor_stream_clients", "SSE and WebSocket subscribers").set_function(
+            lambda: self.client_count)
+        registry.counter("rotor_stream_dropped", "Messages a slow subscriber never got").set_function(
+            lambda: self.dropped + sum(s.dropped for s in list(self._subscribers)))
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    @property
+    def client_count(self):
+        return len(self._subscribers)
+
+    def latest(self):
+        return self.publisher.latest
+
+    def subscribe(self):
+        subscriber = _Subscriber(self.queue_size)
+        latest = self.latest()
+        if latest is not None:
+            subscriber.push(latest)  # Nobody should wait for the rotor to move to learn where it is
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        self.dropped += subscriber.dropped
+
+    def send(self, data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(data)
+
+    def start(self):
+        self._server = _StreamServer((self.host, self.port), _StreamHandler)
+        self._server.stream = self
+        # Pick up the real port when started on port 0
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="position-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscriber in subscribers:
+                subscriber.close()
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,149 @@
+"""Bounded position history for the sky-track trail on the compass.
+
+The last ``window`` seconds of positions are kept as a ring of time buckets.
+Each bucket is drawn as one canvas line, so the canvas always holds the same
+number of items however long the session runs:
+
+- a new position only touches the newest bucket's line (one coords() call)
+- when a bucket fills up it is frozen, and the line of the oldest bucket is
+  recycled for the next one instead of creating a new item
+- each bucket is decimated to ``points_per_bucket`` points with
+  Largest-Triangle-Three-Buckets (LTTB), which keeps the corners of a slew and
+  drops the points of a straight run
+
+Positions are decimated in the polar plot's own plane (zenith in the middle,
+horizon at the rim), so what is kept is what is visible.
+"""
+
+import math
+from collections import namedtuple
+
+TrailPoint = namedtuple("TrailPoint", "timestamp azimuth elevation")
+
+
+def sky_xy(azimuth, elevation):
+    """Polar-plot position of az/el: unit radius at the horizon, 0 at the zenith, north up."""
+    if elevation > 90.0:
+        # Flip-mode rotors report 90-180 for the back half of the sky
+        azimuth, elevation = azimuth + 180.0, 180.0 - elevation
+    radius = (90.0 - max(0.0, min(90.0, elevation))) / 90.0
+    angle = math.radians(azimuth)
+    return radius * math.sin(angle), -radius * math.cos(angle)
+
+
+def lttb(points, threshold, key=lambda p: p):
+    """Largest-Triangle-Three-Buckets downsampling of an ordered 2-D polyline.
+
+    Keeps the first and last points and, from each of ``threshold - 2`` runs of
+    the rest, the point that forms the largest triangle with the previously
+    kept point and the average of the next run. ``key`` maps a point to (x, y).
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+    xy = [key(p) for p in points]
+    kept = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Average of the next run (or the last point for the final run)
+        next_start, next_end = end, min(int((i + 2) * every) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        span = next_end - next_start
+        avg_x = sum(xy[j][0] for j in range(next_start, next_end)) / span
+        avg_y = sum(xy[j][1] for j in range(next_start, next_end)) / span
+        ax, ay = xy[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (xy[j][1] - ay) - (ax - xy[j][0]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(points[best])
+        a = best
+    kept.append(points[-1])
+    return kept
+
+
+class _Bucket:
+    __slots__ = ("start", "points", "decimated")
+
+    def __init__(self, start, points):
+        self.start = start
+        self.points = points
+        self.decimated = None  # Cached once the bucket is frozen
+
+
+class TrailBuffer:
+    """The last ``window`` seconds of positions as ``buckets`` slots, one canvas line each.
+
+    add() and clear() return the slots whose line has to be redrawn; points()
+    gives the decimated (az, el) list for a slot.
+    """
+    def __init__(self, window=600.0, buckets=40, points_per_bucket=8, max_gap=30.0, min_move=0.05):
+        self.window = float(window)
+        self.buckets = max(2, int(buckets))
+        self.points_per_bucket = max(3, int(points_per_bucket))
+        self.span = self.window / self.buckets
+        self.max_gap = max_gap  # Positions further apart than this are not joined up
+        self.min_move = min_move
+        self._slots = [None] * self.buckets
+        self._head = None
+        self._last = None
+
+    def __len__(self):
+        return sum(len(bucket.points) for bucket in self._slots if bucket is not None)
+
+    def add(self, timestamp, azimuth, elevation):
+        point = TrailPoint(timestamp, azimuth, elevation)
+        last = self._last
+        if (last is not None and 0 <= timestamp - last.timestamp <= self.max_gap
+                and timestamp - self._slots[self._head].start < self.span
+                and abs(azimuth - last.azimuth) < self.min_move and abs(elevation - last.elevation) < self.min_move):
+            # Parked: nothing new to draw, just keep the trail joined up and alive
+            self._slots[self._head].points[-1] = self._last = point
+            return []
+        if last is not None and timestamp < last.timestamp:
+            dirty = self.clear()  # Clock went backwards (a new replay); start over
+            last = None
+        else:
+            dirty = []
+        head = None if self._head is None else self._slots[self._head]
+        if head is not None and timestamp - head.start < self.span and timestamp - last.timestamp <= self.max_gap:
+            head.points.append(point)
+            dirty.append(self._head)
+        else:
+            if head is not None:
+                head.decimated = self._decimate(head.points)  # Frozen from now on
+            # Carry the previous point over so consecutive buckets join up
+            joined = last is not None and timestamp - last.timestamp <= self.max_gap
+            self._head = 0 if self._head is None else (self._head + 1) % self.buckets
+            self._slots[self._head] = _Bucket(timestamp, [last, point] if joined else [point])
+            dirty.append(self._head)
+        self._last = point
+        # Buckets can outlive the window when gaps started extra ones
+        for slot, bucket in enumerate(self._slots):
+            if bucket is not None and bucket.points[-1].timestamp < timestamp - self.window:
+                self._slots[slot] = None
+                dirty.append(slot)
+        return dirty
+
+    def points(self, slot):
+        """Decimated [(az, el), ...] of one slot, oldest first; empty for an unused slot."""
+        bucket = self._slots[slot]
+        if bucket is None:
+            return []
+        decimated = bucket.decimated if bucket.decimated is not None else self._decimate(bucket.points)
+        return [(p.azimuth, p.elevation) for p in decimated]
+
+    def clear(self):
+        dirty = [slot for slot, bucket in enumerate(self._slots) if bucket is not None]
+        self._slots = [None] * self.buckets
+        self._head = None
+        self._last = None
+        return dirty
+
+    def _decimate(self, points):
+        return lttb(points, self.points_per_bucket, key=lambda p: sky_xy(p.azimuth, p.elevation))
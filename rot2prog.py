@@ -0,0 +1,260 @@
+"""In-process driver for SPID Rot2Prog rotors (hamlib model 901).
+
+Speaks the Rot2Prog binary frame protocol directly over pyserial, so no
+rotctld/rotctl processes or TCP hop sit between the application and the
+rotor. Rot2ProgBackend.execute() accepts the same commands as RotctldClient
+and returns the same RotctlResponse objects, so the rotor worker and the
+proxy can use either one.
+"""
+
+import struct
+import threading
+
+from rotctld_client import MODE_CHARS, RotctldError, RotctlResponse
+
+# Frame layout: 'W', 4 position digits + resolution for azimuth and elevation, K, END
+_COMMAND = struct.Struct("<c4sB4sBBB")
+# Status reply: 'W', 4 azimuth digits (0-9, not ASCII), PH, 4 elevation digits, PV, END
+_STATUS = struct.Struct("<c4BB4BBB")
+
+K_STOP = 0x0F
+K_STATUS = 0x1F
+K_SET = 0x2F
+END = 0x20
+
+STATUS_FRAME = _COMMAND.pack(b"W", b"\0\0\0\0", 0, b"\0\0\0\0", 0, K_STATUS, END)
+STOP_FRAME = _COMMAND.pack(b"W", b"\0\0\0\0", 0, b"\0\0\0\0", 0, K_STOP, END)
+
+# Mechanical limits hamlib reports for the Rot2Prog
+MIN_AZ, MAX_AZ = -180.0, 540.0
+MIN_EL, MAX_EL = -20.0, 210.0
+
+ROTCTLD_PROTOCOL_VERSION = 1
+# Hamlib models this driver can stand in for
+HAMLIB_MODELS = ("901", "903")
+
+serial = None  # pyserial, imported on first use so startup doesn't pay for it
+
+
+def load_serial():
+    """Imports pyserial on first use; returns the module, or None if it isn't installed."""
+    global serial
+    if serial is None:
+        try:
+            import serial as module
+        except ImportError:
+            return None
+        serial = module
+    return serial
+
+
+def open_serial(port, baud_rate, timeout, write_timeout):
+    """Opens a pyserial port, turning a missing pyserial or a bad port into OSError."""
+    if load_serial() is None:
+        raise OSError("pyserial is required for native Rot2Prog rotors")
+    try:
+        return serial.Serial(port, int(baud_rate), timeout=timeout, write_timeout=write_timeout)
+    except serial.SerialException as e:
+        raise OSError(f"Could not open {port}: {e}") from e
+
+
+def split_command(command):
+    """Returns (name, args, text) for a rotctl-style command, mode prefix and backslash stripped."""
+    args = command.split() if isinstance(command, str) else [str(arg) for arg in command]
+    if args and args[0][:1] in MODE_CHARS:
+        args[0] = args[0][1:]
+        if not args[0]:
+            args = args[1:]
+    if not args:
+        raise ValueError("Empty rotor command")
+    name = args[0][1:] if args[0].startswith("\\") else args[0]
+    return name, args[1:], " ".join(args)
+
+
+def build_set_frame(azimuth, elevation, az_resolution, el_resolution):
+    """Returns the 13 byte set-position frame for the given resolutions (pulses per degree)."""
+    u_az = int(round(az_resolution * (360 + azimuth)))
+    u_el = int(round(el_resolution * (360 + elevation)))
+    return _COMMAND.pack(b"W", b"%04d" % u_az, az_resolution, b"%04d" % u_el, el_resolution, K_SET, END)
+
+
+def parse_status_frame(frame):
+    """Returns (azimuth, elevation, az_resolution, el_resolution) from a 12 byte status reply."""
+    if len(frame) != _STATUS.size:
+        raise ValueError(f"Rot2Prog status frame must be {_STATUS.size} bytes, got {len(frame)}")
+    start, h1, h2, h3, h4, ph, v1, v2, v3, v4, pv, end = _STATUS.unpack(frame)
+    if start != b"W" or end != END:
+        raise ValueError(f"Malformed Rot2Prog status frame: {frame.hex()}")
+    azimuth = h1 * 100 + h2 * 10 + h3 + h4 / 10 - 360
+    elevation = v1 * 100 + v2 * 10 + v3 + v4 / 10 - 360
+    return azimuth, elevation, ph, pv
+
+
+def build_status_frame(azimuth, elevation, az_resolution=10, el_resolution=10):
+    """Inverse of parse_status_frame, used by fake rotors."""
+    az_tenths = int(round((azimuth + 360) * 10))
+    el_tenths = int(round((elevation + 360) * 10))
+    az_digits = [az_tenths // 1000, az_tenths // 100 % 10, az_tenths // 10 % 10, az_tenths % 10]
+    el_digits = [el_tenths // 1000, el_tenths // 100 % 10, el_tenths // 10 % 10, el_tenths % 10]
+    return _STATUS.pack(b"W", *az_digits, az_resolution, *el_digits, el_resolution, END)
+
+
+def parse_command_frame(frame):
+    """Returns (command, azimuth, elevation) from a 13 byte command frame, used by fake rotors."""
+    start, az_digits, ph, el_digits, pv, command, end = _COMMAND.unpack(frame)
+    if start != b"W" or end != END:
+        raise ValueError(f"Malformed Rot2Prog command frame: {frame.hex()}")
+    if command != K_SET:
+        return command, None, None
+    return command, int(az_digits) / ph - 360, int(el_digits) / pv - 360
+
+
+class Rot2ProgProtocol:
+    """Rot2Prog command handling without the I/O.
+
+    Shared by Rot2ProgBackend, which blocks on the port, and the rotor pool,
+    which drives the port non-blocking from its event loop. begin() and
+    finish() both return ``(frame, response)``: write ``frame`` if it isn't
+    None, then either the command is done with ``response`` or, when that is
+    None, a status reply is due and goes to finish(). The resolution bytes
+    for set frames are learned from the first status reply, as hamlib does.
+    """
+    def __init__(self, port=None, park=(0.0, 0.0)):
+        self.port = port
+        self.park_position = park
+        self.az_resolution = None
+        self.el_resolution = None
+        self._pending = None  # (name, az, el) of a set-point waiting for PH/PV, or the name awaiting a reply
+
+    def begin(self, name, args, command_text):
+        """Starts a command; raises RotctldError for unsupported commands or bad arguments."""
+        if name in ("p", "get_pos"):
+            self._pending = "get_pos"
+            return STATUS_FRAME, None
+        if name in ("P", "set_pos"):
+            try:
+                az, el = float(args[0]), float(args[1])
+            except (IndexError, ValueError):
+                raise RotctldError(-1, command_text)
+            return self._set("set_pos", az, el)
+        if name in ("S", "stop"):
+            self._pending = "stop"
+            return STOP_FRAME, None
+        if name in ("K", "park"):
+            return self._set("park", *self.park_position)
+        if name in ("_", "get_info"):
+            return None, RotctlResponse("get_info", [("Info", f"SPID Rot2Prog (native) on {self.port}")], 0)
+        if name == "dump_state":
+            records = [str(ROTCTLD_PROTOCOL_VERSION), "901",
+                       f"min_az={MIN_AZ:f}", f"max_az={MAX_AZ:f}",
+                       f"min_el={MIN_EL:f}", f"max_el={MAX_EL:f}", "south_zero=0", "done"]
+            return None, RotctlResponse("dump_state", [(None, record) for record in records], 0, records)
+        raise RotctldError(-4, command_text)
+
+    def finish(self, reply):
+        """Takes the 12 byte status reply; raises ValueError for a malformed one."""
+        az, el, ph, pv = parse_status_frame(reply)
+        self.az_resolution, self.el_resolution = ph or 1, pv or 1
+        pending, self._pending = self._pending, None
+        if isinstance(pending, tuple):
+            return self._set(*pending)
+        if pending == "get_pos":
+            return None, RotctlResponse("get_pos", [("Azimuth", f"{az:.6f}"), ("Elevation", f"{el:.6f}")], 0)
+        return None, RotctlResponse(pending or "stop", [], 0)
+
+    def reset(self):
+        self._pending = None
+
+    def _set(self, name, az, el):
+        if not (MIN_AZ <= az <= MAX_AZ and MIN_EL <= el <= MAX_EL):
+            raise RotctldError(-1, f"P {az} {el}")
+        if self.az_resolution is None:
+            self._pending = (name, az, el)  # Learn PH/PV first, the set frame follows the reply
+            return STATUS_FRAME, None
+        return build_set_frame(az, el, self.az_resolution, self.el_resolution), RotctlResponse(name, [], 0)
+
+
+class Rot2ProgBackend:
+    """Direct serial connection to a Rot2Prog controller.
+
+    The port is opened lazily on the first command. The protocol itself is
+    Rot2ProgProtocol; this class does the blocking reads and writes.
+    """
+    def __init__(self, port, baud_rate=600, timeout=2.0, park=(0.0, 0.0), serial_factory=None):
+        self.port = port
+        self.baud_rate = int(baud_rate)
+        self.timeout = timeout
+        self.protocol = Rot2ProgProtocol(port, park)
+        self._serial_factory = serial_factory
+        self._serial = None
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._serial is not None
+
+    def set_port(self, port, baud_rate):
+        baud_rate = int(baud_rate)
+        if (port, baud_rate) == (self.port, self.baud_rate):
+            return
+        with self._lock:
+            self._close_locked()
+            self.port, self.baud_rate = port, baud_rate
+            self.protocol.port = port
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def execute(self, command):
+        """Runs one rotctl-style command and returns its RotctlResponse.
+
+        Raises RotctldError for unsupported commands or bad arguments and
+        OSError for serial problems, mirroring RotctldClient.execute().
+        """
+        name, args, text = split_command(command)
+        with self._lock:
+            try:
+                return self._execute_locked(name, args, text)
+            except (OSError, ValueError) as e:
+                # Resynchronise on the next command instead of reading a half frame
+                self._close_locked()
+                if isinstance(e, ValueError):
+                    raise OSError(f"Rot2Prog protocol error: {e}") from e
+                raise
+
+    def get_position(self):
+        response = self.execute("p")
+        return float(response.get("Azimuth")), float(response.get("Elevation"))
+
+    def _execute_locked(self, name, args, command_text):
+        frame, response = self.protocol.begin(name, args, command_text)
+        while True:
+            if frame is not None:
+                self._open_locked()
+                if response is None:
+                    self._serial.reset_input_buffer()
+                self._serial.write(frame)
+            if response is not None:
+                return response
+            reply = self._serial.read(_STATUS.size)
+            if len(reply) < _STATUS.size:
+                raise TimeoutError(f"Rot2Prog did not answer on {self.port} ({len(reply)} of {_STATUS.size} bytes)")
+            frame, response = self.protocol.finish(reply)
+
+    def _open_locked(self):
+        if self._serial is not None:
+            return
+        if self._serial_factory is not None:
+            self._serial = self._serial_factory(self.port, self.baud_rate, self.timeout)
+        else:
+            self._serial = open_serial(self.port, self.baud_rate, self.timeout, self.timeout)
+
+    def _close_locked(self):
+        self.protocol.reset()
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except OSError:
+                pass
+            self._serial = None
@@ -0,0 +1,364 @@
+"""Native client for the hamlib rotctld network protocol.
+
+Keeps one TCP connection to rotctld open for the lifetime of the application
+instead of spawning ``rotctl -m 2`` for every command. Commands are sent in one
+of rotctld's extended response modes, so every reply ends with an ``RPRT`` line
+and can be framed reliably from the byte stream.
+"""
+
+import re
+import socket
+import threading
+import time
+from collections import deque
+
+# Hamlib error codes as returned in "RPRT <code>" lines
+RPRT_MESSAGES = {
+    0: "OK",
+    -1: "Invalid parameter",
+    -2: "Invalid configuration",
+    -3: "Memory shortage",
+    -4: "Function not implemented",
+    -5: "Communication timed out",
+    -6: "IO error",
+    -7: "Internal Hamlib error",
+    -8: "Protocol error",
+    -9: "Command rejected by the rotor",
+    -10: "Command performed, but arg truncated",
+    -11: "Function not available",
+    -12: "VFO not targetable",
+    -13: "Error talking on the bus",
+    -14: "Collision on the bus",
+    -15: "NULL rig handle or invalid pointer parameter",
+    -16: "Invalid VFO",
+    -17: "Argument out of domain of func",
+}
+
+# Extended response modes accepted by rotctld: '+' puts each record on its own
+# line, any other punctuation character is used as the record separator.
+MODE_CHARS = "+;|,"
+
+# Short command letters and the long names rotctld uses in extended headers
+LONG_NAMES = {
+    "p": "get_pos",
+    "P": "set_pos",
+    "S": "stop",
+    "K": "park",
+    "M": "move",
+    "R": "reset",
+    "C": "set_conf",
+    "_": "get_info",
+    "1": "dump_caps",
+    "w": "send_cmd",
+}
+
+QUICKACK = getattr(socket, "TCP_QUICKACK", None)
+
+_HEADER_RE = re.compile(r"^([a-z_][a-z0-9_]*):(.*)$")
+
+
+def format_response(mode, command, args, fields, records=None, code=0):
+    """Renders a reply the way rotctld would send it to a client.
+
+    ``mode`` is None for the default protocol or one of MODE_CHARS for the
+    extended response modes. ``records`` overrides ``fields`` for free-form
+    text dumps such as dump_state.
+    """
+    # Default mode: bare values for queries, "RPRT n" for everything else
+    if mode is None:
+        if code != 0:
+            return f"RPRT {code}\n"
+        body = records if records is not None else [value for _, value in fields]
+        if not body:
+            return "RPRT 0\n"
+        return "\n".join(body) + "\n"
+
+    header = f"{command}:" + ("" if not args else " " + " ".join(args))
+    if records is not None:
+        body = list(records)
+    else:
+        body = [f"{key}: {value}" if key else value for key, value in fields]
+    separator = "\n" if mode == "+" else mode
+    return separator.join([header] + body + [f"RPRT {code}"]) + "\n"
+
+
+def split_command_line(line):
+    """Splits a client line into (mode, args); mode is None for the default protocol."""
+    mode = None
+    line = line.strip()
+    if line and line[0] in MODE_CHARS:
+        mode, line = line[0], line[1:].lstrip()
+    return mode, line.split()
+
+
+def long_command_name(name):
+    """Maps a short command letter or a backslash long command to its long name."""
+    return name[1:] if name.startswith("\\") else LONG_NAMES.get(name, name)
+
+
+class RotctldError(Exception):
+    """Raised when rotctld answers a command with a non-zero RPRT code."""
+    def __init__(self, code, command=""):
+        self.code = code
+        self.command = command
+        message = f"RPRT {code} ({RPRT_MESSAGES.get(code, 'Unknown error')})"
+        if command:
+            message += f" for '{command}'"
+        super().__init__(message)
+
+
+class RotctlResponse:
+    """A single parsed extended response from rotctld."""
+    def __init__(self, command, fields, code, records=None):
+        self.command = command  # Long command name from the header, e.g. "get_pos"
+        self.fields = fields    # List of (key, value) tuples, key is None for bare records
+        self.code = code
+        self.records = records if records is not None else [value for _, value in fields]  # Unparsed body
+
+    @property
+    def ok(self):
+        return self.code == 0
+
+    @property
+    def values(self):
+        return [value for _, value in self.fields]
+
+    def get(self, key, default=None):
+        for field_key, value in self.fields:
+            if field_key == key:
+                return value
+        return default
+
+    def output(self):
+        """Returns the response formatted the way rotctl prints it on stdout."""
+        return "\n".join(self.values)
+
+    def __repr__(self):
+        return f"RotctlResponse({self.command!r}, {self.fields!r}, {self.code})"
+
+
+class ExtendedResponseParser:
+    """Incremental parser that frames extended responses out of a byte stream.
+
+    Bytes can be fed in arbitrary chunks; complete responses are returned as
+    soon as their terminating RPRT record has been seen.
+    """
+    def __init__(self, separator="\n"):
+        self.separator = separator
+        self._buffer = bytearray()
+        self._records = []
+
+    def reset(self):
+        self._buffer.clear()
+        self._records = []
+
+    def feed(self, data):
+        """Consumes raw bytes and returns the list of responses they completed."""
+        self._buffer += data
+        responses = []
+        while True:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                break
+            line = self._buffer[:end].decode("ascii", "replace").rstrip("\r")
+            del self._buffer[:end + 1]
+            records = [line] if self.separator == "\n" else line.split(self.separator)
+            for record in records:
+                if not record:
+                    continue
+                self._records.append(record)
+                if record.startswith("RPRT "):
+                    responses.append(self._build(self._records))
+                    self._records = []
+        return responses
+
+    @staticmethod
+    def _build(records):
+        try:
+            code = int(records[-1].split()[1])
+        except (IndexError, ValueError):
+            code = -8  # Garbled RPRT line, report it as a protocol error
+        body = records[:-1]
+        command = ""
+        if body:
+            match = _HEADER_RE.match(body[0])
+            if match:
+                command = match.group(1)
+                body = body[1:]
+        fields = []
+        for record in body:
+            key, sep, value = record.partition(":")
+            if sep:
+                fields.append((key.strip(), value.strip()))
+            else:
+                fields.append((None, record.strip()))
+        return RotctlResponse(command, fields, code, body)
+
+
+class RotctldClient:
+    """Persistent, thread-safe connection to a rotctld server.
+
+    The socket is opened lazily on the first command and re-opened
+    transparently if rotctld dropped it in the meantime.
+    """
+    def __init__(self, host="127.0.0.1", port=4533, timeout=5.0, mode="+"):
+        if len(mode) != 1 or mode not in MODE_CHARS:
+            raise ValueError(f"Unsupported extended response mode: {mode!r}")
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.mode = mode
+        self.last_latency = None  # Round-trip time of the last command in seconds
+        self._sock = None
+        self._parser = ExtendedResponseParser("\n" if mode == "+" else mode)
+        self._ready = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def set_address(self, host, port):
+        """Points the client at a new server, dropping the old connection if it changed."""
+        port = int(port)
+        if (host, port) == (self.host, self.port):
+            return
+        with self._lock:
+            self._close_locked()
+            self.host, self.port = host, port
+
+    def connect(self):
+        with self._lock:
+            self._connect_locked()
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def execute(self, command):
+        """Sends one command (string or argument list) and returns its RotctlResponse.
+
+        Raises RotctldError for a non-zero RPRT code and OSError if rotctld
+        cannot be reached.
+        """
+        line = self.format_command(command)
+        with self._lock:
+            start = time.perf_counter()
+            was_connected = self._sock is not None
+            try:
+                try:
+                    response = self._transact_locked(line)
+                except ConnectionError:
+                    self._close_locked()
+                    if not was_connected:
+                        raise
+                    # The kept-alive socket went stale (rotctld restarted), retry once
+                    response = self._transact_locked(line)
+            except OSError:
+                # Includes a timeout on the retry: a half-read socket would hand its late reply to the next command
+                self._close_locked()
+                raise
+            self.last_latency = time.perf_counter() - start
+        if not response.ok:
+            raise RotctldError(response.code, line[1:].strip())
+        return response
+
+    def execute_many(self, commands, on_response=None):
+        """Pipelines several commands: all lines go out in one write, then the replies are read in order.
+
+        rotctld handles a connection's lines one after the other, so this
+        saves a network round trip per command. Returns the RotctlResponse
+        list; RPRT errors are returned, not raised, so one bad line doesn't
+        hide the others. ``on_response(index, response)`` is called as each
+        reply arrives.
+        """
+        lines = [self.format_command(command) for command in commands]
+        if not lines:
+            return []
+        payload = "".join(lines).encode("ascii")
+        responses = []
+        with self._lock:
+            was_connected = self._sock is not None
+            try:
+                try:
+                    self._pipeline_locked(payload, len(lines), responses, on_response)
+                except ConnectionError:
+                    self._close_locked()
+                    if not was_connected or responses:
+                        raise  # Part of the batch may have run, resending it could repeat moves
+                    self._pipeline_locked(payload, len(lines), responses, on_response)
+            except OSError:
+                self._close_locked()
+                raise
+        return responses
+
+    def get_position(self):
+        """Returns the current (azimuth, elevation) as floats."""
+        response = self.execute("p")
+        values = response.values
+        az = response.get("Azimuth", values[0] if values else None)
+        el = response.get("Elevation", values[1] if len(values) > 1 else None)
+        return float(az), float(el)
+
+    def set_position(self, azimuth, elevation):
+        return self.execute(["P", azimuth, elevation])
+
+    def stop(self):
+        return self.execute("S")
+
+    def park(self):
+        return self.execute("K")
+
+    def format_command(self, command):
+        """Builds the wire line for a command, prefixed with the extended response mode."""
+        if isinstance(command, (list, tuple)):
+            command = " ".join(str(arg) for arg in command)
+        command = command.strip()
+        # Drop any mode prefix the caller typed themselves, ours always wins
+        if command and command[0] in MODE_CHARS:
+            command = command[1:].lstrip()
+        if not command:
+            raise ValueError("Empty rotctld command")
+        return f"{self.mode}{command}\n"
+
+    def _connect_locked(self):
+        if self._sock is not None:
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._parser.reset()
+        self._ready.clear()
+
+    def _close_locked(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def _transact_locked(self, line):
+        self._connect_locked()
+        self._sock.sendall(line.encode("ascii"))
+        return self._read_responses_locked(1)[0]
+
+    def _pipeline_locked(self, payload, count, responses, on_response):
+        self._connect_locked()
+        self._sock.sendall(payload)
+        while len(responses) < count:
+            # rotctld doesn't disable Nagle, so its later replies wait for our ACK of the first;
+            # acknowledge straight away where the OS lets us (Linux) instead of after the delayed-ACK timer
+            if QUICKACK is not None:
+                self._sock.setsockopt(socket.IPPROTO_TCP, QUICKACK, 1)
+            responses.extend(self._read_responses_locked(1))
+            if on_response is not None:
+                on_response(len(responses) - 1, responses[-1])
+
+    def _read_responses_locked(self, count):
+        while len(self._ready) < count:
+            data = self._sock.recv(4096)
+            if not data:
+                raise ConnectionResetError("rotctld closed the connection")
+            self._ready.extend(self._parser.feed(data))
+        return [self._ready.popleft() for _ in range(count)]
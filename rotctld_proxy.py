@@ -0,0 +1,192 @@
+"""rotctld-compatible multiplexing proxy.
+
+Lets Gpredict, scripts and any other rotctld client share one serial link.
+Position queries are answered from a cache that a single poller (the
+RotorWorker) keeps fresh; everything else is forwarded to the real rotctld
+over the worker's one upstream connection. The amount of serial traffic is
+therefore the same no matter how many clients are attached.
+"""
+
+import socketserver
+import threading
+import time
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
+
+from rotctld_client import format_response, long_command_name, split_command_line
+
+# Commands whose reply is a free-form text dump rather than key/value records
+_DUMP_COMMANDS = ("dump_state", "dump_caps")
+
+
+class PositionCache:
+    """Thread-safe last known position, fed from the worker's poll snapshots."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._position = None
+        self._updated = None
+
+    def update(self, azimuth, elevation):
+        with self._lock:
+            self._position = (azimuth, elevation)
+            self._updated = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._position = None
+            self._updated = None
+
+    def update_from_snapshot(self, snapshot):
+        if snapshot.connected and snapshot.azimuth is not None:
+            self.update(snapshot.azimuth, snapshot.elevation)
+        elif not snapshot.connected:
+            self.invalidate()
+
+    def get(self):
+        """Returns (azimuth, elevation, age_seconds), or None if nothing is cached."""
+        with self._lock:
+            if self._position is None:
+                return None
+            return self._position + (time.monotonic() - self._updated,)
+
+
+class _ProxyHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        proxy = self.server.proxy
+        proxy._client_connected()
+        try:
+            for raw in self.rfile:
+                line = raw.decode("ascii", "replace").strip()
+                if not line:
+                    continue
+                reply = proxy.handle_line(line)
+                if reply is None:
+                    break
+                self.wfile.write(reply.encode("ascii"))
+        except OSError:
+            pass  # Client went away mid-reply
+        finally:
+            proxy._client_disconnected()
+
+
+class _ProxyServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RotctldProxy:
+    """TCP listener that speaks the rotctld protocol on behalf of a RotorWorker.
+
+    ``p`` is served from ``cache`` as long as it is younger than ``max_age``
+    seconds; older or missing positions trigger one shared refresh. With a
+    trajectory.TrajectoryPlanner, ``P`` azimuths are mapped onto the fastest
+    turn of the rotor's overlap range before they are forwarded.
+    """
+    def __init__(self, worker, cache, host="127.0.0.1", port=4534, max_age=10.0, timeout=10.0, planner=None):
+        self.worker = worker
+        self.cache = cache
+        self.planner = planner
+        self.host = host
+        self.port = int(port)
+        self.max_age = max_age
+        self.timeout = timeout  # How long a client waits for the upstream reply
+        self.client_count = 0
+        self.cache_hits = 0
+        self.forwarded = 0
+        self._server = None
+        self._thread = None
+        self._count_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def start(self):
+        self._server = _ProxyServer((self.host, self.port), _ProxyHandler)
+        self._server.proxy = self
+        # Pick up the real port when started on port 0
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="rotctld-proxy", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle_line(self, line):
+        """Returns the wire reply for one client line, or None if the client asked to quit."""
+        mode, args = split_command_line(line)
+        if not args:
+            return ""
+        name = args[0]
+        if name in ("q", "Q", "\\quit"):
+            return None
+        long_name = long_command_name(name)
+
+        if long_name == "get_pos":
+            position, code = self._cached_position()
+            if position is None:
+                return format_response(mode, long_name, args[1:], [], [], code)
+            az, el = position
+            return format_response(mode, long_name, args[1:],
+                                [("Azimuth", f"{az:.6f}"), ("Elevation", f"{el:.6f}")], None, 0)
+
+        response, code = self._forward(self._plan(long_name, args))
+        if response is None:
+            return format_response(mode, long_name, args[1:], [], [], code)
+        records = response.records if long_name in _DUMP_COMMANDS else None
+        return format_response(mode, response.command or long_name, args[1:], response.fields, records, response.code)
+
+    def _cached_position(self):
+        cached = self.cache.get()
+        if cached is not None and cached[2] <= self.max_age:
+            self.cache_hits += 1
+            return cached[:2], 0
+        # Only one client refreshes a stale cache, the rest wait and reuse its answer
+        with self._refresh_lock:
+            cached = self.cache.get()
+            if cached is not None and cached[2] <= self.max_age:
+                self.cache_hits += 1
+                return cached[:2], 0
+            response, code = self._forward(["p"])
+            if response is None or not response.ok:
+                return None, code if response is None else response.code
+            values = response.values
+            try:
+                az = float(response.get("Azimuth", values[0] if values else None))
+                el = float(response.get("Elevation", values[1] if len(values) > 1 else None))
+            except (TypeError, ValueError):
+                return None, -8
+            self.cache.update(az, el)
+            return (az, el), 0
+
+    def _plan(self, long_name, args):
+        if self.planner is None or long_name != "set_pos" or len(args) < 3:
+            return args
+        try:
+            az, el = self.planner.resolve(float(args[1]), float(args[2]))
+        except ValueError:
+            return args  # Let rotctld reject it with its own error
+        # The reply still echoes the client's own arguments
+        return [args[0], f"{az:.2f}", f"{el:.2f}"] + list(args[3:])
+
+    def _forward(self, args):
+        self.forwarded += 1
+        try:
+            return self.worker.call(args, tag="proxy").result(self.timeout), 0
+        except FutureTimeoutError:
+            return None, -5
+        except CancelledError:
+            return None, -6
+        except Exception:
+            return None, -6  # The worker failed the request; the client still gets its RPRT
+
+    def _client_connected(self):
+        with self._count_lock:
+            self.client_count += 1
+
+    def _client_disconnected(self):
+        with self._count_lock:
+            self.client_count -= 1
@@ -0,0 +1,273 @@
+"""Supervises the rotctld process: readiness probing and backoff restarts.
+
+A waiter thread blocks on the process exit instead of polling it, so a crash
+is noticed immediately. rotctld only counts as up once its TCP port accepts
+connections. Unexpected exits are restarted straight away the first time,
+then with exponential backoff, and the supervisor gives up once the process
+keeps crashing (a crash loop: bad COM port, wrong model, unplugged adapter).
+
+Before every restart the command goes through ``resolve_command``, which
+can point it at the serial port the rotor's adapter has now. While the
+adapter is gone it returns None, and the supervisor waits for the adapter
+instead of burning through its restarts.
+
+State changes are published as SupervisorEvent tuples on a queue, which the
+GUI drains from its results tick.
+
+The restart decisions themselves (backoff, crash-loop detection) live in
+RestartPolicy, which does no I/O, so the rotor pool can apply the same rules
+to its rotctld processes from its own event loop.
+"""
+
+import socket
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+
+# state is one of "starting", "ready", "backoff", "failed", "stopped"
+SupervisorEvent = namedtuple("SupervisorEvent", "timestamp state message")
+
+
+def crash_loop_message(reason, policy):
+    return (f"{reason}; {policy.recent_crashes} crashes in {policy.crash_window:.0f} s, giving up. "
+            f"Check the COM port and rotor model.")
+
+
+class RestartPolicy:
+    """When to restart a crashed process, without the process.
+
+    exited() records a crash and returns the delay before the next start,
+    or None once the crashes add up to a crash loop. The first restart is
+    immediate, so a glitching adapter recovers in well under a second.
+    """
+    def __init__(self, backoff_base=0.25, backoff_max=10.0, crash_loop_limit=5, crash_window=60.0, stable_after=30.0):
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.crash_loop_limit = crash_loop_limit  # Crashes within crash_window before giving up
+        self.crash_window = crash_window
+        self.stable_after = stable_after          # Up this long and the backoff starts over
+        self.crashes = 0
+        self.ready_since = None
+        self._consecutive = 0
+        self._crash_times = deque()
+
+    @property
+    def recent_crashes(self):
+        return len(self._crash_times)
+
+    def reset(self):
+        self._consecutive = 0
+        self._crash_times.clear()
+        self.ready_since = None
+
+    def ready(self, now):
+        self.ready_since = now
+
+    def exited(self, now):
+        self.crashes += 1
+        if self.ready_since is not None and now - self.ready_since >= self.stable_after:
+            self._consecutive = 0  # It had been running fine, this is a fresh failure
+        self.ready_since = None
+        self._consecutive += 1
+        self._crash_times.append(now)
+        while self._crash_times and now - self._crash_times[0] > self.crash_window:
+            self._crash_times.popleft()
+        if len(self._crash_times) > self.crash_loop_limit:
+            return None
+        if self._consecutive == 1:
+            return 0.0
+        # Crashes spaced out beyond crash_window never trip the limit, so clamp the exponent as well
+        return min(self.backoff_max, self.backoff_base * 2 ** min(self._consecutive - 2, 32))
+
+
+class RotctldSupervisor:
+    """Starts, watches and restarts one rotctld process."""
+    def __init__(self, events, on_output=None, ready_timeout=10.0, probe_interval=0.05, backoff_base=0.25,
+                 backoff_max=10.0, crash_loop_limit=5, crash_window=60.0, stable_after=30.0, resolve_command=None,
+                 port_wait_interval=0.5):
+        self.events = events
+        self.on_output = on_output
+        self.ready_timeout = ready_timeout
+        self.probe_interval = probe_interval
+        self.policy = RestartPolicy(backoff_base, backoff_max, crash_loop_limit, crash_window, stable_after)
+        self.resolve_command = resolve_command    # command -> command to restart with, or None to wait
+        self.port_wait_interval = port_wait_interval
+        self.auto_restart = True
+        self.state = "stopped"
+        self.process = None
+        # Stats
+        self.starts = 0
+        self.restarts = 0
+        self.last_exit_code = None
+        self.last_time_to_ready = None
+        self._command = None
+        self._cwd = None
+        self._address = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped on every start/stop so stale waiter threads bow out
+
+    @property
+    def running(self):
+        """True while the process is alive (ready or still starting)."""
+        process = self.process
+        return process is not None and process.poll() is None
+
+    @property
+    def ready(self):
+        return self.state == "ready" and self.running
+
+    @property
+    def crashes(self):
+        return self.policy.crashes
+
+    @property
+    def ready_since(self):
+        return self.policy.ready_since
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "starts": self.starts,
+            "restarts": self.restarts,
+            "crashes": self.crashes,
+            "last_exit_code": self.last_exit_code,
+            "last_time_to_ready": self.last_time_to_ready,
+            "uptime": None if self.ready_since is None else time.monotonic() - self.ready_since,
+        }
+
+    def register_metrics(self, registry):
+        """Exposes the restart/crash counts on a metrics.MetricsRegistry."""
+        registry.counter("rotctld_restarts", "Automatic rotctld restarts").set_function(lambda: self.restarts)
+        registry.counter("rotctld_crashes", "Unexpected rotctld exits").set_function(lambda: self.crashes)
+
+    def start(self, command, cwd, host, port):
+        """Launches rotctld; raises OSError if the executable cannot be started."""
+        self._terminate()
+        with self._lock:
+            self._command, self._cwd, self._address = list(command), cwd, (host, int(port))
+            self.policy.reset()
+            self._stop.clear()
+            self._generation += 1
+            generation = self._generation
+        self._launch(generation)
+
+    def stop(self, timeout=5.0):
+        self._terminate(timeout)
+        if self.state != "stopped":
+            self._set_state("stopped", "rotctld stopped.")
+
+    def _terminate(self, timeout=5.0):
+        with self._lock:
+            self._generation += 1
+            self._stop.set()
+            process, self.process = self.process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.policy.ready_since = None
+
+    def _launch(self, generation):
+        started = time.monotonic()
+        process = subprocess.Popen(
+            self._command, cwd=self._cwd, stderr=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        with self._lock:
+            if generation != self._generation:
+                process.kill()  # Stopped while we were launching
+                return
+            self.process = process
+            self.starts += 1
+        self._set_state("starting", f"Starting server: {' '.join(self._command)}")
+        for pipe in (process.stdout, process.stderr):
+            threading.Thread(target=self._read_output, args=(pipe,), daemon=True).start()
+        threading.Thread(target=self._wait, args=(process, generation, started), daemon=True).start()
+
+    def _wait(self, process, generation, started):
+        # Probe readiness, then block until the process exits
+        ready = self._probe(process, generation)
+        reason = None
+        if ready and generation == self._generation:
+            self.last_time_to_ready = time.monotonic() - started
+            self.policy.ready(time.monotonic())
+            self._set_state("ready", f"rotctld ready on {self._address[0]}:{self._address[1]} "
+                                     f"after {self.last_time_to_ready * 1000:.0f} ms")
+        elif ready is None and generation == self._generation:
+            # Alive but never listening (hung on the serial port, wrong -t): a failed start like a crash
+            reason = f"rotctld did not accept connections within {self.ready_timeout:g} s"
+            process.terminate()
+            try:
+                process.wait(timeout=5.0)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        code = process.wait()
+        if generation != self._generation:
+            return  # Stopped or restarted on purpose
+        self._handle_exit(code, generation, reason)
+
+    def _probe(self, process, generation):
+        # True once the port accepts connections, False if the process exited or was replaced, None on timeout
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline:
+            if generation != self._generation or process.poll() is not None:
+                return False
+            try:
+                socket.create_connection(self._address, timeout=0.2).close()
+                return True
+            except OSError:
+                self._stop.wait(self.probe_interval)
+        return None
+
+    def _handle_exit(self, code, generation, reason=None):
+        self.last_exit_code = code
+        delay = self.policy.exited(time.monotonic())
+        reason = reason or f"rotctld exited with code {code}"
+        if not self.auto_restart:
+            self._set_state("stopped", f"{reason}.")
+            return
+        if delay is None:
+            self._set_state("failed", crash_loop_message(reason, self.policy))
+            return
+        self._set_state("backoff", f"{reason}, restarting in {delay:.2f} s")
+        if self._stop.wait(delay) or generation != self._generation:
+            return
+        if self.resolve_command is not None and not self._resolve(generation):
+            return
+        self.restarts += 1
+        try:
+            self._launch(generation)
+        except OSError as e:
+            self._set_state("failed", f"Could not restart rotctld: {e}")
+
+    def _resolve(self, generation):
+        # The adapter may be re-enumerating under a new name; False if stopped while waiting for it
+        waiting = False
+        while True:
+            command = self.resolve_command(list(self._command))
+            if command is not None:
+                with self._lock:
+                    if generation != self._generation:
+                        return False
+                    self._command = list(command)
+                return True
+            if not waiting:
+                waiting = True
+                self._set_state("backoff", "The rotor's serial adapter is gone, waiting for it to come back")
+            if self._stop.wait(self.port_wait_interval) or generation != self._generation:
+                return False
+
+    def _read_output(self, pipe):
+        for line in iter(pipe.readline, ''):
+            if self.on_output is not None:
+                self.on_output(line.strip())
+        pipe.close()
+
+    def _set_state(self, state, message):
+        self.state = state
+        self.events.put(SupervisorEvent(time.time(), state, message))
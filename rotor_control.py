@@ -0,0 +1,42 @@
+"""Entry point: the Tk GUI by default, or the headless service with --headless.
+
+    python -m rotor_control                  # GUI
+    python -m rotor_control --headless       # poller + proxy + telemetry, no Tk
+    python -m rotor_control --headless --start-server
+    python -m rotor_control --headless --once   # print the first position and exit
+    python -m rotor_control --headless --scan "raster 0 350 10 0 60 15" --dwell 5
+
+Neither front end is imported until it is chosen, so --headless never loads
+tkinter.
+"""
+
+import argparse
+import sys
+
+import rotor_settings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rotor Control")
+    parser.add_argument("--headless", action="store_true", help="Run without the GUI")
+    parser.add_argument("--config", default=rotor_settings.CONFIG_FILE, help="Config file (default: %(default)s)")
+    parser.add_argument("--start-server", action="store_true",
+                        help="Headless: start rotctld (or the native driver) from the config")
+    parser.add_argument("--once", action="store_true", help="Headless: print the first position and exit")
+    parser.add_argument("--timeout", type=float, help="Headless: give up after this many seconds")
+    parser.add_argument("--scan", metavar="PATTERN",
+                        help="Headless: run a sky scan ('raster ...', 'spiral ...' or 'file PATH') and exit")
+    parser.add_argument("--dwell", type=float, help="Headless: dwell per scan point in seconds (default: scan_dwell_s)")
+    args = parser.parse_args(argv)
+
+    if args.headless:
+        import rotor_headless
+        return rotor_headless.run(args.config, args.start_server, args.once, args.timeout, args.scan, args.dwell)
+
+    import rotor_control_gui
+    rotor_control_gui.main(args.config)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,28 +4,160 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
-import subprocess
-try:
-    from serial.tools import list_ports
-except ImportError:
-    list_ports = None
 import threading
 import time
-import json
 import os
 import math
+import queue
+import logging
+from concurrent.futures import Future
+from log_pipeline import LogPipeline, classify_rotctld_line
+from poll_scheduler import AdaptivePollScheduler
+from rotor_worker import RotorWorker, PositionSnapshot, CommandResult
+from rotctld_proxy import PositionCache, RotctldProxy
+import rot2prog
+from telemetry import TelemetryReader, TelemetryRecorder, TelemetryReplay
+import port_discovery
+import rotor_settings
+from rotor_pool import PoolRotor, RotorPool
+from rotctld_supervisor import RotctldSupervisor, SupervisorEvent
+from metrics import MetricsRegistry, MetricsServer, UI_BUCKETS
+from command_script import ScriptRunner, parse_script
+from sky_scan import ScanRunner, parse_pattern
+from trajectory import MotionEstimator, TrackingErrorMeter, TrajectoryPlanner
+from position_trail import TrailBuffer, lttb, sky_xy
+from position_stream import MulticastSink, PositionPublisher, StreamServer
+
+# Hamlib models the built-in Rot2Prog driver can stand in for
+NATIVE_ROTOR_MODELS = rot2prog.HAMLIB_MODELS
+
+# Upper bounds in degrees; a 3 dB beamwidth of a small Yagi is around 20-40
+TRACKING_ERROR_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 45, 90, 180)
+
+class PointerCanvas(tk.Canvas):
+    """Base canvas for the visual indicators.
+
+    The pointer is a single persistent line item that is moved in place with
+    coords(). Updates are coalesced so bursts redraw at most once per display
+    frame, and changes smaller than ``epsilon`` degrees are not redrawn at all.
+    """
+    def __init__(self, parent, epsilon=0.1, frame_ms=16, draw_metric=None, *args, **kwargs):
+        super().__init__(parent, *args, **kwargs)
+        self.epsilon = epsilon
+        self.frame_ms = frame_ms
+        self.draw_metric = draw_metric  # Optional histogram child timing each redraw
+        self.pointer = None
+        self.drawn_angle = None  # Angle the pointer currently shows
+        self.redraw_count = 0
+        self.skipped_count = 0
+        self._pending_angle = None
+        self._frame_after_id = None
+
+    def _create_pointer(self, angle, **options):
+        self.pointer = self.create_line(0, 0, 0, 0, arrow=tk.LAST, width=3, **options)
+        self._pending_angle = angle
+        self.flush()
+
+    def request_angle(self, angle):
+        # Only the newest angle of a burst is drawn, on the next frame
+        self._pending_angle = angle
+        if self._frame_after_id is None:
+            self._frame_after_id = self.after(self.frame_ms, self.flush)
+
+    def flush(self):
+        """Draws the most recently requested angle immediately."""
+        if self._frame_after_id is not None:
+            self.after_cancel(self._frame_after_id)
+            self._frame_after_id = None
+        angle = self._pending_angle
+        if angle is None:
+            return
+        self._pending_angle = None
 
-class Compass(tk.Canvas):
-    """A tkinter canvas widget that displays a compass face and a pointer for azimuth."""
+        if self.drawn_angle is not None and self._angle_delta(angle, self.drawn_angle) < self.epsilon:
+            self.skipped_count += 1
+            return
+        start = time.perf_counter()
+        self.coords(self.pointer, *self._pointer_coords(angle))
+        self.drawn_angle = angle
+        self.redraw_count += 1
+        if self.draw_metric is not None:
+            self.draw_metric.observe(time.perf_counter() - start)
+
+    def destroy(self):
+        if self._frame_after_id is not None:
+            self.after_cancel(self._frame_after_id)
+            self._frame_after_id = None
+        super().destroy()
+
+    def _angle_delta(self, a, b):
+        return abs(a - b)
+
+    def _pointer_coords(self, angle):
+        raise NotImplementedError
+
+class Compass(PointerCanvas):
+    """A tkinter canvas widget that displays a compass face and a pointer for azimuth.
+
+    With enable_trail() the face doubles as a polar az/el plot (zenith in the
+    middle, horizon at the rim) showing the recent sky track and the planned
+    path of a pass.
+    """
     def __init__(self, parent, size=200, *args, **kwargs):
         super().__init__(parent, width=size, height=size, *args, **kwargs)
         self.size = size
         self.center = size / 2
         self.radius = size / 2 * 0.9  # Use 90% of radius for the main circle
-        self.pointer = None
         self.configure(bg='white')
         self._draw_static_elements()
-        self.update_azimuth(0) # Initialize pointer at North
+        # Draw the pointer as a red line with an arrow, initialized at North
+        self._create_pointer(0, fill='red')
+        self.trail = None
+        self.trail_items = []
+        self.planned_item = None
+        self.trail_metric = None
+
+    def enable_trail(self, trail, draw_metric=None):
+        """Shows ``trail`` (a position_trail.TrailBuffer); creates every item it will ever need up front."""
+        self.trail = trail
+        self.trail_metric = draw_metric
+        self.planned_item = self.create_line(0, 0, 0, 0, fill='green', dash=(4, 3), width=1, state=tk.HIDDEN)
+        self.trail_items = [self.create_line(0, 0, 0, 0, fill='orange', width=2, state=tk.HIDDEN)
+                            for _ in range(trail.buckets)]
+        # Under the pointer, which stays the thing to read
+        for item in [self.planned_item] + self.trail_items:
+            self.tag_lower(item, self.pointer)
+
+    def add_trail_point(self, timestamp, azimuth, elevation):
+        if self.trail is not None:
+            self._redraw_trail(self.trail.add(timestamp, azimuth, elevation))
+
+    def clear_trail(self):
+        if self.trail is not None:
+            self._redraw_trail(self.trail.clear())
+
+    def set_planned_path(self, points):
+        """Shows [(az, el), ...] as a dashed line; an empty list hides it."""
+        if self.planned_item is not None:
+            self._set_line(self.planned_item, points)
+
+    def _redraw_trail(self, slots):
+        start = time.perf_counter()
+        for slot in slots:
+            self._set_line(self.trail_items[slot], self.trail.points(slot))
+        if slots and self.trail_metric is not None:
+            self.trail_metric.observe(time.perf_counter() - start)
+
+    def _set_line(self, item, points):
+        if len(points) < 2:
+            self.itemconfigure(item, state=tk.HIDDEN)
+            return
+        coords = []
+        for azimuth, elevation in points:
+            x, y = sky_xy(azimuth, elevation)
+            coords += (self.center + self.radius * x, self.center + self.radius * y)
+        self.coords(item, *coords)
+        self.itemconfigure(item, state=tk.NORMAL)
 
     def _draw_static_elements(self):
         # Draw outer circle
@@ -58,22 +190,21 @@ class Compass(tk.Canvas):
 
     def update_azimuth(self, angle):
         """Updates the compass pointer to the given angle (in degrees)."""
-        if self.pointer:
-            self.delete(self.pointer)
+        self.request_angle(angle)
+
+    def _angle_delta(self, a, b):
+        # Shortest way round, so 359.95 -> 0.0 is not a full redraw
+        return abs((a - b + 180) % 360 - 180)
 
+    def _pointer_coords(self, angle):
         # Angle needs to be converted to radians for trig functions
         angle_rad = math.radians(angle)
 
         x_end = self.center + self.radius * 0.9 * math.sin(angle_rad)
         y_end = self.center - self.radius * 0.9 * math.cos(angle_rad)
+        return self.center, self.center, x_end, y_end
 
-        # Draw the pointer as a red line with an arrow
-        self.pointer = self.create_line(
-            self.center, self.center, x_end, y_end,
-            arrow=tk.LAST, fill='red', width=3
-        )
-
-class ElevationIndicator(tk.Canvas):
+class ElevationIndicator(PointerCanvas):
     """A tkinter canvas widget that displays a 180-degree arc for elevation."""
     def __init__(self, parent, size=200, *args, **kwargs):
         super().__init__(parent, width=size, height=size/2 + 25, *args, **kwargs)
@@ -81,10 +212,9 @@ class ElevationIndicator(tk.Canvas):
         self.center_x = size / 2
         self.center_y = size / 2
         self.radius = size / 2 * 0.9
-        self.pointer = None
         self.configure(bg='white')
         self._draw_static_elements()
-        self.update_elevation(0)
+        self._create_pointer(0, fill='blue')
 
     def _draw_static_elements(self):
         # Draw the 180-degree arc
@@ -113,80 +243,377 @@ class ElevationIndicator(tk.Canvas):
 
     def update_elevation(self, angle):
         """Updates the indicator to the given elevation angle."""
-        if self.pointer:
-            self.delete(self.pointer)
-
         # Clamp angle between 0 and 180
-        angle = max(0, min(180, angle))
+        self.request_angle(max(0, min(180, angle)))
 
+    def _pointer_coords(self, angle):
         angle_rad = math.radians(180 - angle) # Convert to radians, 0 on right
 
         x_end = self.center_x + self.radius * 0.95 * math.cos(angle_rad)
         y_end = self.center_y - self.radius * 0.95 * math.sin(angle_rad)
+        return self.center_x, self.center_y, x_end, y_end
+
+class RotorPanel(ttk.LabelFrame):
+    """Compact compass, elevation and set/stop controls for one rotor of the pool."""
+    def __init__(self, parent, name, pool, epsilon=0.1):
+        super().__init__(parent, text=name)
+        self.name = name
+        self.pool = pool
+        self.version = None  # Last pool state version shown
+
+        self.compass = Compass(self, size=140, epsilon=epsilon)
+        self.compass.pack(padx=5, pady=(5, 0))
+        self.elevation_indicator = ElevationIndicator(self, size=120, epsilon=epsilon)
+        self.elevation_indicator.pack(padx=5)
+        self.position_var = tk.StringVar(value="Az=N/A, El=N/A")
+        ttk.Label(self, textvariable=self.position_var).pack(padx=5, anchor="w")
+        self.status_var = tk.StringVar(value="Idle")
+        ttk.Label(self, textvariable=self.status_var, wraplength=160).pack(padx=5, anchor="w")
+
+        controls = ttk.Frame(self)
+        controls.pack(padx=5, pady=5)
+        self.azimuth_var = tk.StringVar(value="0")
+        self.elevation_var = tk.StringVar(value="0")
+        ttk.Entry(controls, textvariable=self.azimuth_var, width=6).grid(row=0, column=0)
+        ttk.Entry(controls, textvariable=self.elevation_var, width=6).grid(row=0, column=1, padx=(3, 0))
+        ttk.Button(controls, text="Set", command=self.set_position, width=5).grid(row=1, column=0, pady=(3, 0))
+        ttk.Button(controls, text="Stop", command=self.stop, width=5).grid(row=1, column=1, padx=(3, 0), pady=(3, 0))
 
-        self.pointer = self.create_line(
-            self.center_x, self.center_y, x_end, y_end,
-            arrow=tk.LAST, fill='blue', width=3
-        )
+    def set_position(self):
+        try:
+            azimuth, elevation = float(self.azimuth_var.get()), float(self.elevation_var.get())
+        except ValueError:
+            messagebox.showerror("Error", f"{self.name}: azimuth and elevation must be numbers.")
+            return
+        self.pool.submit(self.name, ["P", f"{azimuth:g}", f"{elevation:g}"])
+
+    def stop(self):
+        self.pool.submit(self.name, ["S"])
+
+    def apply_state(self, status, snapshot, version):
+        if version == self.version:
+            return
+        self.version = version
+        self.status_var.set(status)
+        if snapshot is None or not snapshot.connected or snapshot.azimuth is None:
+            self.position_var.set("Az=N/A, El=N/A")
+            return
+        self.position_var.set(f"Az={snapshot.azimuth:.1f}, El={snapshot.elevation:.1f}")
+        self.compass.update_azimuth(snapshot.azimuth)
+        self.elevation_indicator.update_elevation(snapshot.elevation)
 
 class RotorControlGUI(tk.Tk):
-    def __init__(self):
+    def __init__(self, config_file=rotor_settings.CONFIG_FILE):
         super().__init__()
         self.title("Rotor Control")
         self.geometry("1250x900")
 
-        self.rotctld_process = None
-        self.config_file = "rotor_config.json"
+        self.native_backend_active = False # Native Rot2Prog driver in use instead of rotctld
+        self.config_file = config_file
         self.config = self.load_config()
+        # Every log line goes through the pipeline; only the Tk thread writes to the widget
+        self.log_pipeline = LogPipeline(
+            log_file=self.config.get("log_file", "rotor_control.log"),
+            max_bytes=int(self.config.get("log_max_bytes", 1048576)),
+            backup_count=int(self.config.get("log_backup_count", 5)),
+            show_verbose=self.config.get("show_verbose_log", False)
+        )
+        self.log_widget_lines = int(self.config.get("log_widget_lines", 2000))
+        self.after_id_log_flush = None
+        # All rotctld traffic happens on the worker thread, results come back through this queue
+        self.rotor_results = queue.Queue()
+        # Latency, error and UI stall metrics, shown in the Metrics panel and served for Prometheus
+        self.metrics = MetricsRegistry()
+        self.rotor_worker = RotorWorker(self.rotor_results, AdaptivePollScheduler.from_config(self.config),
+                                        metrics=self.metrics)
+        self.worker_settings = None
+        self.after_id_results = None
+        self.results_due = None # When the results tick should have run, to measure UI stalls
+        # rotctld is launched, probed for readiness and restarted off-thread; its events come back on the same queue
+        self.rotctld_supervisor = RotctldSupervisor(
+            self.rotor_results, on_output=lambda line: self.log(line, classify_rotctld_line(line)),
+            ready_timeout=float(self.config.get("rotctld_ready_timeout_ms", 10000)) / 1000,
+            backoff_base=float(self.config.get("rotctld_restart_base_ms", 250)) / 1000,
+            backoff_max=float(self.config.get("rotctld_restart_max_ms", 10000)) / 1000,
+            crash_loop_limit=int(self.config.get("rotctld_crash_loop_limit", 5)),
+            resolve_command=self.resolve_rotctld_command
+        )
+        # Serial hotplug: the port list stays current and the rotor's adapter is followed when it re-enumerates
+        self.port_watcher = port_discovery.PortWatcher(
+            self.rotor_results, interval=float(self.config.get("port_watch_interval_ms", 1000)) / 1000
+        )
+        self.port_list_seen = False
+        # Shared rotctld endpoint for Gpredict & co., answered from the worker's polls
+        self.position_cache = PositionCache()
+        self.rotor_worker.add_listener(self.position_cache.update_from_snapshot)
+        # Set-points pick the fastest turn of the overlap range and lead moving targets
+        self.trajectory = TrajectoryPlanner.from_config(self.config)
+        self.rotor_worker.add_listener(self.trajectory.update_from_snapshot)
+        self.tracking_error = TrackingErrorMeter(histogram=self.metrics.histogram(
+            "rotor_tracking_error_degrees", "Angle between the polled position and the tracked target",
+            buckets=TRACKING_ERROR_BUCKETS))
+        self.rotor_worker.add_listener(self.tracking_error.update_from_snapshot)
+        self.rotor_proxy = RotctldProxy(
+            self.rotor_worker, self.position_cache,
+            host=self.config.get("proxy_host", "127.0.0.1"), port=self.config.get("proxy_port", 4534),
+            planner=self.trajectory
+        )
+        # Every poll is recorded to a compact binary file for replay and export
+        self.telemetry = self.create_telemetry_recorder()
+        self.rotor_worker.add_listener(self.telemetry.record_snapshot)
+        self.telemetry_replay = None
+        self.after_id_replay = None
+        # Built-in satellite tracking: passes are predicted off-thread, tracking runs on after()
+        self.satellite_catalog = None
+        self.predicted_passes = []
+        self.prediction_future = None
+        self.pass_tracker = None
+        self.after_id_prediction = None
+        self.after_id_tracking = None
+        # Locators, callsigns and named targets typed as the azimuth; bearings are precomputed off-thread
+        self.target_index = None
+        self.target_index_future = None
+        self.target_index_error = None  # Why the last build failed, reported on the next lookup
+        self.after_id_target_index = None
+        # Between polls the pointers are dead-reckoned at display rate; the loop only runs while the rotor moves
+        self.pointer_motion = MotionEstimator(self.trajectory.slew,
+                                              horizon=float(self.config.get("pointer_extrapolation_s", 5.0)))
+        self.after_id_animation = None
+        self.animation_frames = 0
+        # Extra rotors from the "rotors" config list, all served by one I/O thread
+        self.rotor_pool = RotorPool(
+            [PoolRotor.from_config(entry, self.config) for entry in self.config.get("rotors", [])], log=self.log,
+            ready_timeout=float(self.config.get("rotctld_ready_timeout_ms", 10000)) / 1000,
+            restart_base=float(self.config.get("rotctld_restart_base_ms", 250)) / 1000,
+            restart_max=float(self.config.get("rotctld_restart_max_ms", 10000)) / 1000,
+            crash_loop_limit=int(self.config.get("rotctld_crash_loop_limit", 5))
+        )
+        self.rotor_panels = {}
+        self.metrics_server = MetricsServer(
+            self.metrics, host=self.config.get("metrics_host", "127.0.0.1"), port=self.config.get("metrics_port", 9464)
+        )
+        # Position changes are pushed to subscribers (multicast, SSE, WebSocket) so they never poll the rotor
+        self.position_publisher = PositionPublisher.from_config(self.config)
+        self.rotor_worker.add_listener(self.position_publisher.update_from_snapshot)
+        self.stream_server = StreamServer(
+            self.position_publisher, host=self.config.get("stream_host", "127.0.0.1"),
+            port=self.config.get("stream_port", 4536)
+        )
+        self.multicast_sink = MulticastSink(
+            self.config.get("stream_multicast_group", "239.255.45.34"), self.config.get("stream_multicast_port", 4535),
+            self.config.get("stream_multicast_ttl", 1), self.config.get("stream_multicast_interface") or None
+        )
+        self.position_publisher.add_sink(self.multicast_sink)
+        self.after_id_metrics = None
+        self.register_metrics()
+        self.script_runner = None
+        self.script_future = None
+        self.after_id_script = None
+        self.scan_runner = None
+        self.scan_future = None
+        self.after_id_scan = None
 
         # State variables for reconnection logic
         self.server_running_manually = False # Tracks if user intended the server to be running
         self.rotor_connected = False
         self.after_id_server_monitor = None
         self.after_id_rotor_monitor = None
+        self.discovery_future = None
+        self.after_id_discovery = None
+        self.hamlib_checked = False
 
         self.auto_reconnect_var = tk.BooleanVar(value=True)
         self.live_updates_var = tk.BooleanVar(value=True)
 
         self.create_widgets()
-        self.find_hamlib_path() # Find hamlib on startup
-        self.update_com_ports() # Populate COM ports on startup
+        # Ports and Hamlib are discovered in the background; the cached port list stands in until then
+        self.com_port_combo['values'] = self.config.get("com_port_cache", [])
+        if self.config.get("port_watch_enabled", True):
+            self.port_watcher.start()
+        self.start_discovery()
+        self.load_target_index()
+        self.rotor_worker.start()
+        if self.rotor_pool.rotors:
+            self.rotor_pool.start()
+        self.start_proxy()
+        self.start_metrics_server()
+        self.start_position_stream()
         self.start_monitoring()
 
-    def update_com_ports(self):
-        if list_ports is None:
+    def register_metrics(self):
+        m = self.metrics
+        self.ui_tick_lag = m.histogram("rotor_ui_tick_lag_seconds",
+                                       "How late the 100 ms results tick ran; time the UI thread was stalled",
+                                       buckets=UI_BUCKETS)
+        self.ui_callback_time = m.histogram("rotor_ui_callback_seconds", "Time spent in UI-thread callbacks",
+                                            ("callback",), buckets=UI_BUCKETS)
+        self.canvas_draw_time = m.histogram("rotor_ui_canvas_draw_seconds", "Time to redraw a pointer",
+                                            ("canvas",), buckets=UI_BUCKETS)
+        # Owned by other components, read when scraped
+        self.rotctld_supervisor.register_metrics(m)
+        self.port_watcher.register_metrics(m)
+        self.position_publisher.register_metrics(m)
+        self.stream_server.register_metrics(m)
+        self.multicast_sink.register_metrics(m)
+        m.gauge("rotctld_up", "1 while rotctld (or the native backend) accepts commands").set_function(
+            lambda: int(self.native_backend_active or self.rotctld_supervisor.ready))
+        m.gauge("rotor_connected", "1 while the last position poll succeeded").set_function(
+            lambda: int(self.rotor_connected))
+        m.gauge("rotor_proxy_clients", "Clients attached to the rotctld proxy").set_function(
+            lambda: self.rotor_proxy.client_count)
+        self.log_lines_dropped = 0
+        m.counter("rotor_log_lines_dropped", "Log lines dropped before the widget showed them").set_function(
+            lambda: self.log_lines_dropped)
+        m.counter("rotor_ui_animation_frames", "Dead-reckoned pointer frames drawn between polls").set_function(
+            lambda: self.animation_frames)
+
+    def start_metrics_server(self):
+        if not self.config.get("metrics_enabled", True):
+            return
+        try:
+            self.metrics_server.start()
+            self.log(f"Metrics at http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+        except OSError as e:
+            self.log(f"Could not start metrics endpoint: {e}")
+
+    def start_position_stream(self):
+        if not self.config.get("stream_enabled", True):
+            return
+        try:
+            self.stream_server.start()
+            self.log(f"Position stream at http://{self.stream_server.host}:{self.stream_server.port}/events (SSE) and /ws")
+        except OSError as e:
+            self.log(f"Could not start position stream: {e}")
+        if self.config.get("stream_multicast_enabled", True):
+            try:
+                self.multicast_sink.start()
+                self.log(f"Position multicast to {self.multicast_sink.group}:{self.multicast_sink.port}")
+            except OSError as e:
+                self.log(f"Could not start position multicast: {e}")
+
+    def create_telemetry_recorder(self):
+        capacity = int(self.config.get("telemetry_ring_size", 100000))
+        try:
+            return TelemetryRecorder.from_config(self.config)
+        except (OSError, ValueError) as e:
+            # Keep the in-memory ring so the session still has history
+            self.log(f"Telemetry recording disabled: {e}", logging.WARNING)
+            return TelemetryRecorder(None, capacity)
+
+    def start_discovery(self):
+        if self.discovery_future is not None:
+            return
+        # With the watcher running the ports come from it; discovery is only needed for Hamlib
+        scan_ports = not self.port_watcher.running
+        if scan_ports:
+            self.log("Scanning for available COM ports...")
+        self.discovery_future = port_discovery.discover_async(self.hamlib_path_var.get(), scan_ports)
+        self.check_discovery()
+
+    def refresh_com_ports(self):
+        if self.port_watcher.running:
+            self.log("Rescanning COM ports...")
+            self.port_watcher.rescan()
+        else:
+            self.start_discovery()
+
+    def check_discovery(self):
+        if self.after_id_discovery:
+            self.after_cancel(self.after_id_discovery)
+            self.after_id_discovery = None
+
+        future = self.discovery_future
+        if future is None:
+            return
+        if not future.done():
+            self.after_id_discovery = self.after(100, self.check_discovery)
+            return
+        self.discovery_future = None
+        try:
+            discovery = future.result()
+        except OSError as e:
+            self.log(f"Port discovery failed: {e}", logging.WARNING)
+            return
+        if discovery.com_ports is not None or not self.port_watcher.running:
+            self.update_com_ports(discovery.com_ports)
+        # Only the startup scan may prompt for Hamlib; Refresh just updates the ports
+        if not self.hamlib_checked:
+            self.hamlib_checked = True
+            self.find_hamlib_path(discovery)
+
+    def update_com_ports(self, ports):
+        if ports is None:
             self.log("pyserial not installed, cannot list COM ports.")
             return
 
-        self.log("Scanning for available COM ports...")
-        ports = [port.device for port in list_ports.comports()]
         self.com_port_combo['values'] = ports
+        self.config["com_port_cache"] = ports
         if ports:
-            # If current value is not in list, set it to the first available port
-            if self.com_port_var.get() not in ports:
+            # If current value is not in list, set it to the first available port,
+            # unless it belongs to the rotor's adapter, which may just be re-enumerating
+            if self.com_port_var.get() not in ports and not self.config.get("com_port_fingerprint"):
                 self.com_port_var.set(ports[0])
             self.log(f"Found ports: {', '.join(ports)}")
         else:
             self.log("No COM ports found.")
 
-    def find_hamlib_path(self):
-        path = self.hamlib_path_var.get()
-        if os.path.exists(os.path.join(path, "rotctld.exe")):
-            self.log(f"Hamlib found at configured path: {path}")
+    def handle_port_change(self, change):
+        self.rebind_rotor_port()
+        if not self.port_list_seen:
+            self.port_list_seen = True
+            self.update_com_ports(change.ports)  # The watcher's first scan stands in for discovery's
+            return
+        for device in change.removed:
+            self.log(f"Serial port removed: {device}", logging.WARNING if device == self.com_port_var.get() else logging.INFO)
+        if change.added:
+            self.log(f"Serial port added: {', '.join(change.added)}")
+        self.com_port_combo['values'] = change.ports
+        self.config["com_port_cache"] = change.ports
+
+    def rebind_rotor_port(self):
+        # Follows the rotor's adapter to its new name; a running rotctld is restarted on it
+        fingerprint = self.config.get("com_port_fingerprint")
+        device = self.port_watcher.find(fingerprint)
+        old = self.com_port_var.get()
+        if device is None or device == old:
+            return
+        self.log(f"Rotor adapter {fingerprint} moved from {old} to {device}", logging.WARNING)
+        self.com_port_var.set(device)
+        self.config["com_port"] = device
+        if self.native_backend_active:
+            self.sync_worker_settings()  # Reopens the native driver on the new port
+        elif self.rotctld_supervisor.ready or (self.rotctld_supervisor.state == "failed" and self.auto_reconnect_var.get()):
+            # Still up on the old name (rotctld doesn't notice an unplug), or given up on it
+            self.server_running_manually = True
+            self.start_rotctld(from_user=False)
+        # In backoff the supervisor picks the new port up itself, see resolve_rotctld_command
+
+    def learn_port_fingerprint(self):
+        # Remembers which adapter the rotor is on, whenever the server is started on a port
+        if self.port_watcher.ports is not None:
+            self.config["com_port_fingerprint"] = self.port_watcher.fingerprint(self.com_port_var.get()) or ""
+
+    def resolve_rotctld_command(self, command):
+        # Supervisor thread, before each restart: point rotctld at wherever the adapter is now; None waits for it
+        fingerprint = self.config.get("com_port_fingerprint")
+        if not fingerprint or not self.port_watcher.running:
+            return command
+        self.port_watcher.refresh()
+        device = self.port_watcher.find(fingerprint)
+        return None if device is None else port_discovery.replace_port(command, device)
+
+    def find_hamlib_path(self, discovery):
+        # The search itself ran in the background (port_discovery), only the outcome is handled here
+        if discovery.hamlib_configured:
+            self.log(f"Hamlib found at configured path: {discovery.hamlib_path}")
             return
 
-        self.log("Hamlib not found in configured path. Searching common locations...")
-        search_paths = [
-            "C:\\Program Files\\hamlib-w64-4.6.3\\bin",
-            "C:\\Program Files\\hamlib\\bin",
-            "C:\\Program Files (x86)\\hamlib\\bin"
-        ]
-        for path in search_paths:
-            if os.path.exists(os.path.join(path, "rotctld.exe")):
-                self.log(f"Hamlib found at: {path}")
-                self.hamlib_path_var.set(path)
-                self.save_config()
-                return
+        self.log("Hamlib not found in configured path. Searched common locations...")
+        if discovery.hamlib_path:
+            self.log(f"Hamlib found at: {discovery.hamlib_path}")
+            self.hamlib_path_var.set(discovery.hamlib_path)
+            self.save_config()
+            return
 
         self.log("Hamlib not found automatically.")
         if messagebox.askyesno("Hamlib Not Found", "Could not automatically locate the Hamlib 'bin' directory. Would you like to browse for it manually?"):
@@ -209,17 +636,7 @@ class RotorControlGUI(tk.Tk):
                 self.start_server_button.config(state="disabled")
 
     def load_config(self):
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        return {
-            "hamlib_path": "C:\\Program Files\\hamlib-w64-4.6.3\\bin",
-            "rotor_model": "901",
-            "com_port": "COM6",
-            "baud_rate": "600",
-            "host": "127.0.0.1",
-            "port": "4533"
-        }
+        return rotor_settings.load_config(self.config_file)
 
     def save_config(self):
         self.config["hamlib_path"] = self.hamlib_path_var.get()
@@ -228,8 +645,20 @@ class RotorControlGUI(tk.Tk):
         self.config["baud_rate"] = self.baud_rate_var.get()
         self.config["host"] = self.host_var.get()
         self.config["port"] = self.port_var.get()
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        self.config["rotctl_transport"] = self.transport_var.get()
+        self.config["show_verbose_log"] = self.show_verbose_log_var.get()
+        self.config["tle_file"] = self.tle_file_var.get()
+        self.config["scan_pattern"] = self.scan_pattern_var.get()
+        try:
+            self.config["scan_dwell_s"] = float(self.scan_dwell_var.get())
+        except ValueError:
+            pass  # Keep the last good value
+        for key, var in (("station_latitude", self.station_lat_var), ("station_longitude", self.station_lon_var)):
+            try:
+                self.config[key] = float(var.get())
+            except ValueError:
+                pass  # Keep the last good value
+        rotor_settings.save_config(self.config, self.config_file)
 
     def create_widgets(self):
         # Main layout frames
@@ -254,6 +683,7 @@ class RotorControlGUI(tk.Tk):
         self.baud_rate_var = tk.StringVar(value=self.config.get("baud_rate"))
         self.host_var = tk.StringVar(value=self.config.get("host"))
         self.port_var = tk.StringVar(value=self.config.get("port"))
+        self.transport_var = tk.StringVar(value=self.config.get("rotctl_transport", "tcp"))
 
         ttk.Label(settings_frame, text="Hamlib Path:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         path_frame = ttk.Frame(settings_frame)
@@ -282,11 +712,78 @@ class RotorControlGUI(tk.Tk):
 
         self.manual_cmd_var = tk.StringVar()
         cmd_entry = ttk.Entry(manual_cmd_frame, textvariable=self.manual_cmd_var)
-        cmd_entry.pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        cmd_entry.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
         cmd_entry.bind("<Return>", self.send_manual_command) # Bind Enter key
 
         send_button = ttk.Button(manual_cmd_frame, text="Send", command=self.send_manual_command)
-        send_button.pack(side="left", padx=5, pady=5)
+        send_button.grid(row=0, column=1, padx=5, pady=5)
+
+        # Multi-line scripts: rotctld commands plus wait/dwell directives, pipelined by the worker
+        self.script_text = tk.Text(manual_cmd_frame, height=5, width=40, wrap=tk.NONE)
+        self.script_text.grid(row=1, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
+        script_buttons = ttk.Frame(manual_cmd_frame)
+        script_buttons.grid(row=2, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="w")
+        self.run_script_button = ttk.Button(script_buttons, text="Run Script", command=self.run_script)
+        self.run_script_button.pack(side="left")
+        ttk.Button(script_buttons, text="Load...", command=self.load_script_file).pack(side="left", padx=5)
+        self.cancel_script_button = ttk.Button(script_buttons, text="Cancel", command=self.cancel_script, state="disabled")
+        self.cancel_script_button.pack(side="left")
+        self.script_status_var = tk.StringVar(value="Script: idle")
+        ttk.Label(script_buttons, textvariable=self.script_status_var).pack(side="left", padx=5)
+        manual_cmd_frame.columnconfigure(0, weight=1)
+
+        # Frame for timed sky scans (noise-floor surveys, pattern measurements)
+        scan_frame = ttk.LabelFrame(left_frame, text="Sky Scan")
+        scan_frame.pack(padx=10, pady=10, fill="x")
+
+        self.scan_pattern_var = tk.StringVar(value=self.config.get("scan_pattern", "raster 0 350 10 0 60 15"))
+        self.scan_dwell_var = tk.StringVar(value=str(self.config.get("scan_dwell_s", 5.0)))
+        ttk.Label(scan_frame, text="Pattern:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(scan_frame, textvariable=self.scan_pattern_var).grid(row=0, column=1, columnspan=3, padx=5, pady=5, sticky="ew")
+        ttk.Label(scan_frame, text="Dwell (s):").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        ttk.Entry(scan_frame, textvariable=self.scan_dwell_var, width=6).grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        self.start_scan_button = ttk.Button(scan_frame, text="Start Scan", command=self.start_scan)
+        self.start_scan_button.grid(row=1, column=2, padx=5, pady=5)
+        self.cancel_scan_button = ttk.Button(scan_frame, text="Cancel", command=self.cancel_scan, state="disabled")
+        self.cancel_scan_button.grid(row=1, column=3, padx=5, pady=5)
+        self.scan_status_var = tk.StringVar(value="Scan: idle")
+        ttk.Label(scan_frame, textvariable=self.scan_status_var).grid(row=2, column=0, columnspan=4, padx=5, pady=(0, 5), sticky="w")
+        scan_frame.columnconfigure(1, weight=1)
+
+        # Frame for built-in satellite tracking
+        tracking_frame = ttk.LabelFrame(left_frame, text="Satellite Tracking")
+        tracking_frame.pack(padx=10, pady=10, fill="x")
+
+        self.tle_file_var = tk.StringVar(value=self.config.get("tle_file", ""))
+        self.station_lat_var = tk.StringVar(value=str(self.config.get("station_latitude", 0.0)))
+        self.station_lon_var = tk.StringVar(value=str(self.config.get("station_longitude", 0.0)))
+        self.tracking_status_var = tk.StringVar(value="Tracking: idle")
+
+        ttk.Label(tracking_frame, text="TLE File:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        tle_frame = ttk.Frame(tracking_frame)
+        tle_frame.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+        ttk.Entry(tle_frame, textvariable=self.tle_file_var, width=35).pack(side="left", fill="x", expand=True)
+        ttk.Button(tle_frame, text="...", command=self.browse_tle_file, width=3).pack(side="left", padx=(5,0))
+
+        ttk.Label(tracking_frame, text="Station Lat/Lon:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
+        station_frame = ttk.Frame(tracking_frame)
+        station_frame.grid(row=1, column=1, padx=5, pady=5, sticky="w")
+        ttk.Entry(station_frame, textvariable=self.station_lat_var, width=10).pack(side="left")
+        ttk.Entry(station_frame, textvariable=self.station_lon_var, width=10).pack(side="left", padx=(5,0))
+
+        tracking_buttons = ttk.Frame(tracking_frame)
+        tracking_buttons.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        self.predict_button = ttk.Button(tracking_buttons, text="Predict Passes", command=self.predict_passes)
+        self.predict_button.pack(side="left")
+        ttk.Button(tracking_buttons, text="Track Selected", command=self.track_selected_pass).pack(side="left", padx=5)
+        ttk.Button(tracking_buttons, text="Stop Tracking", command=self.stop_tracking).pack(side="left")
+
+        self.pass_list = ttk.Treeview(tracking_frame, columns=("satellite", "aos", "los", "max_el"), show="headings", height=5)
+        for column, heading, width in (("satellite", "Satellite", 140), ("aos", "AOS", 90), ("los", "LOS", 90), ("max_el", "Max El", 60)):
+            self.pass_list.heading(column, text=heading)
+            self.pass_list.column(column, width=width, anchor="w")
+        self.pass_list.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+        ttk.Label(tracking_frame, textvariable=self.tracking_status_var).grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
         # Frame for status and logs
         status_frame = ttk.LabelFrame(left_frame, text="Status & Logs")
@@ -296,6 +793,13 @@ class RotorControlGUI(tk.Tk):
         ttk.Label(status_frame, textvariable=self.server_status_var).pack(padx=5, pady=5, anchor="w")
         self.rotor_conn_status_var = tk.StringVar(value="Rotor Connection: Disconnected")
         ttk.Label(status_frame, textvariable=self.rotor_conn_status_var).pack(padx=5, pady=5, anchor="w")
+        self.proxy_status_var = tk.StringVar(value="Proxy: Disabled")
+        ttk.Label(status_frame, textvariable=self.proxy_status_var).pack(padx=5, pady=5, anchor="w")
+        self.queue_status_var = tk.StringVar(value="Command Queue: idle")
+        ttk.Label(status_frame, textvariable=self.queue_status_var).pack(padx=5, pady=5, anchor="w")
+        self.show_verbose_log_var = tk.BooleanVar(value=self.log_pipeline.show_verbose)
+        ttk.Checkbutton(status_frame, text="Show rotctld debug output", variable=self.show_verbose_log_var,
+                        command=self.toggle_verbose_log).pack(padx=5, anchor="w")
         self.log_area = scrolledtext.ScrolledText(status_frame, wrap=tk.WORD, height=10)
         self.log_area.pack(padx=5, pady=5, fill="both", expand=True)
 
@@ -304,13 +808,52 @@ class RotorControlGUI(tk.Tk):
         visuals_frame.pack(padx=10, pady=10, fill="both", expand=True)
 
         ttk.Label(visuals_frame, text="Azimuth", font=("Arial", 14)).pack(pady=(5,0))
-        self.compass = Compass(visuals_frame, size=300)
+        pointer_epsilon = float(self.config.get("pointer_epsilon", 0.1))
+        self.compass = Compass(visuals_frame, size=300, epsilon=pointer_epsilon,
+                               draw_metric=self.canvas_draw_time.labels("compass"))
         self.compass.pack(pady=5, expand=True)
+        if self.config.get("trail_enabled", True):
+            self.compass.enable_trail(TrailBuffer(
+                window=float(self.config.get("trail_minutes", 10)) * 60,
+                buckets=int(self.config.get("trail_buckets", 40)),
+                points_per_bucket=int(self.config.get("trail_bucket_points", 8))
+            ), draw_metric=self.canvas_draw_time.labels("trail"))
 
         ttk.Label(visuals_frame, text="Elevation", font=("Arial", 14)).pack(pady=(15,0))
-        self.elevation_indicator = ElevationIndicator(visuals_frame, size=250)
+        self.elevation_indicator = ElevationIndicator(visuals_frame, size=250, epsilon=pointer_epsilon,
+                                                      draw_metric=self.canvas_draw_time.labels("elevation"))
         self.elevation_indicator.pack(pady=5, expand=True)
 
+        # Frame for telemetry replay/export
+        telemetry_frame = ttk.LabelFrame(right_frame, text="Telemetry")
+        telemetry_frame.pack(padx=10, pady=(0, 10), fill="x")
+
+        self.replay_speed_var = tk.StringVar(value="1")
+        ttk.Button(telemetry_frame, text="Replay...", command=self.start_replay).pack(side="left", padx=5, pady=5)
+        ttk.Label(telemetry_frame, text="Speed:").pack(side="left", padx=(5, 0))
+        ttk.Combobox(telemetry_frame, textvariable=self.replay_speed_var, values=("1", "2", "5", "10", "25", "50", "100"),
+                     width=4).pack(side="left", padx=5)
+        ttk.Button(telemetry_frame, text="Stop Replay", command=self.stop_replay).pack(side="left", padx=5, pady=5)
+        ttk.Button(telemetry_frame, text="Export...", command=self.export_telemetry).pack(side="left", padx=5, pady=5)
+        self.replay_status_var = tk.StringVar(value="Live")
+        ttk.Label(telemetry_frame, textvariable=self.replay_status_var).pack(side="left", padx=5)
+
+        # Control path health at a glance; the same numbers are served at /metrics
+        metrics_frame = ttk.LabelFrame(right_frame, text="Metrics")
+        metrics_frame.pack(padx=10, pady=(0, 10), fill="x")
+        self.metrics_text_var = tk.StringVar(value="No data yet")
+        ttk.Label(metrics_frame, textvariable=self.metrics_text_var, font=("Courier", 9), justify="left").pack(
+            padx=5, pady=5, anchor="w")
+
+        # One small panel per pooled rotor
+        if self.rotor_pool.rotors:
+            pool_frame = ttk.LabelFrame(right_frame, text="Additional Rotors")
+            pool_frame.pack(padx=10, pady=(0, 10), fill="x")
+            for name in self.rotor_pool.rotors:
+                panel = RotorPanel(pool_frame, name, self.rotor_pool, epsilon=pointer_epsilon)
+                panel.pack(side="left", padx=5, pady=5, anchor="n")
+                self.rotor_panels[name] = panel
+
         # Re-populating all the widgets that were summarized for brevity
 
         # Settings Frame
@@ -319,7 +862,7 @@ class RotorControlGUI(tk.Tk):
         com_frame.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
         self.com_port_combo = ttk.Combobox(com_frame, textvariable=self.com_port_var, width=10)
         self.com_port_combo.pack(side="left", fill="x", expand=True)
-        ttk.Button(com_frame, text="Refresh", command=self.update_com_ports, width=8).pack(side="left", padx=(5,0))
+        ttk.Button(com_frame, text="Refresh", command=self.refresh_com_ports, width=8).pack(side="left", padx=(5,0))
 
         ttk.Label(settings_frame, text="Baud Rate:").grid(row=3, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(settings_frame, textvariable=self.baud_rate_var).grid(row=3, column=1, padx=5, pady=5, sticky="w")
@@ -332,9 +875,13 @@ class RotorControlGUI(tk.Tk):
         self.stop_server_button = ttk.Button(settings_frame, text="Stop Server", command=self.stop_rotctld, state="disabled")
         self.stop_server_button.grid(row=6, column=1, padx=5, pady=10, sticky="w")
         ttk.Checkbutton(settings_frame, text="Attempt to auto-reconnect", variable=self.auto_reconnect_var).grid(row=7, column=0, columnspan=2, padx=5, pady=5, sticky="w")
+        # tcp: rotctld over one socket, subprocess: rotctl.exe per command, native: Rot2Prog driver without rotctld
+        ttk.Label(settings_frame, text="Backend:").grid(row=8, column=0, padx=5, pady=5, sticky="w")
+        ttk.Combobox(settings_frame, textvariable=self.transport_var, values=("tcp", "subprocess", "native"),
+                     state="readonly", width=10).grid(row=8, column=1, padx=5, pady=5, sticky="w")
 
         # Control Frame
-        ttk.Label(control_frame, text="Azimuth:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
+        ttk.Label(control_frame, text="Azimuth / target:").grid(row=0, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(control_frame, textvariable=self.azimuth_var).grid(row=0, column=1, padx=5, pady=5, sticky="w")
         ttk.Label(control_frame, text="Elevation:").grid(row=1, column=0, padx=5, pady=5, sticky="w")
         ttk.Entry(control_frame, textvariable=self.elevation_var).grid(row=1, column=1, padx=5, pady=5, sticky="w")
@@ -345,15 +892,47 @@ class RotorControlGUI(tk.Tk):
 
         ttk.Checkbutton(control_frame, text="Live GUI Updates", variable=self.live_updates_var).grid(row=4, column=0, columnspan=2, padx=5, pady=5, sticky="w")
 
-    def log(self, message):
-        self.log_area.insert(tk.END, message + "\n")
-        self.log_area.see(tk.END)
+    def log(self, message, level=logging.INFO):
+        # Safe from any thread; the widget is only touched by flush_log
+        self.log_pipeline.push(message, level)
+
+    def toggle_verbose_log(self):
+        # Debug lines are still written to the log file while hidden
+        self.log_pipeline.show_verbose = self.show_verbose_log_var.get()
+
+    def flush_log(self):
+        if self.after_id_log_flush:
+            self.after_cancel(self.after_id_log_flush)
+
+        # Cap the batch so a burst of rotctld output can't stall the event loop
+        start = time.perf_counter()
+        lines, dropped = self.log_pipeline.drain(500)
+        if dropped:
+            self.log_lines_dropped += dropped
+            lines.insert(0, f"... {dropped} log lines skipped, see {self.log_pipeline.log_file} ...")
+        if lines:
+            self.log_area.insert(tk.END, "\n".join(lines) + "\n")
+            # Keep only the last log_widget_lines lines in the widget
+            excess = int(self.log_area.index("end-1c").split(".")[0]) - 1 - self.log_widget_lines
+            if excess > 0:
+                self.log_area.delete("1.0", f"{excess + 1}.0")
+            self.log_area.see(tk.END)
+            self.ui_callback_time.labels("flush_log").observe(time.perf_counter() - start)
+
+        self.after_id_log_flush = self.after(200, self.flush_log)
+
+    def is_server_running(self):
+        # True once rotctld accepts connections, or while the native backend stands in for it
+        return self.native_backend_active or self.rotctld_supervisor.ready
 
     def start_rotctld(self, from_user=True):
         if from_user:
             self.server_running_manually = True
             self.save_config()
 
+        if self.transport_var.get() == "native":
+            return self.start_native_backend()
+
         hamlib_path = self.hamlib_path_var.get()
         rotctld_exe = os.path.join(hamlib_path, "rotctld.exe")
 
@@ -361,51 +940,88 @@ class RotorControlGUI(tk.Tk):
             messagebox.showerror("Error", f"rotctld.exe not found at {rotctld_exe}")
             return False
 
+        self.learn_port_fingerprint()
         command = [
             rotctld_exe, "-m", self.rotor_model_var.get(), "-r", self.com_port_var.get(),
             "-s", self.baud_rate_var.get(), "-T", self.host_var.get(), "-t", self.port_var.get(), "-vvvv"
         ]
 
         try:
-            self.log(f"Starting server: {' '.join(command)}")
-            self.rotctld_process = subprocess.Popen(
-                command, cwd=hamlib_path, stderr=subprocess.PIPE, stdout=subprocess.PIPE,
-                text=True, creationflags=subprocess.CREATE_NO_WINDOW
-            )
+            # The controls are enabled by the "ready" event, once the port accepts connections
+            self.rotctld_supervisor.auto_restart = self.auto_reconnect_var.get()
+            self.rotctld_supervisor.start(command, hamlib_path, self.host_var.get(), self.port_var.get())
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to start rotctld: {e}")
+            self.log(f"Error starting server: {e}")
+            return False
+
+        self.server_status_var.set("Server Status: Starting...")
+        self.start_server_button.config(state="disabled")
+        self.stop_server_button.config(state="normal")
+        return True
 
+    def handle_supervisor_event(self, event):
+        level = logging.WARNING if event.state in ("backoff", "failed") else logging.INFO
+        self.log(event.message, level)
+        if self.native_backend_active:
+            return # Leftover event from before the switch to the native backend
+
+        if event.state == "ready":
             self.server_status_var.set("Server Status: Running")
-            self.start_server_button.config(state="disabled")
-            self.stop_server_button.config(state="normal")
             self.set_position_button.config(state="normal")
             self.get_position_button.config(state="normal")
+            self.check_rotor_connection() # First position straight away instead of on the next tick
+            return
 
-            threading.Thread(target=self.read_process_output, args=(self.rotctld_process.stdout,), daemon=True).start()
-            threading.Thread(target=self.read_process_output, args=(self.rotctld_process.stderr,), daemon=True).start()
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to start rotctld: {e}")
-            self.log(f"Error starting server: {e}")
+        self.set_position_button.config(state="disabled")
+        self.get_position_button.config(state="disabled")
+        if event.state == "starting":
+            self.server_status_var.set("Server Status: Starting...")
+        elif event.state == "backoff":
+            self.server_status_var.set("Server Status: Restarting...")
+            self.rotor_worker.disconnect() # The old connection died with the process
+        else:
+            # "failed" (crash loop) or "stopped", either by the user or after a crash with auto-restart off
+            self.server_running_manually = False
+            self.server_status_var.set("Server Status: Failed (crash loop)" if event.state == "failed" else "Server Status: Stopped")
+            self.start_server_button.config(state="normal")
+            self.stop_server_button.config(state="disabled")
+
+    def start_native_backend(self):
+        # The worker talks to the rotor directly, there is no server process to launch
+        if self.rotor_model_var.get() not in NATIVE_ROTOR_MODELS:
+            messagebox.showerror("Error", f"The native backend only supports Rot2Prog rotors (models {', '.join(NATIVE_ROTOR_MODELS)}).")
+            return False
+        if rot2prog.load_serial() is None:
+            messagebox.showerror("Error", "The native backend needs pyserial. Install it with 'pip install pyserial'.")
             return False
 
-    def read_process_output(self, pipe):
-        for line in iter(pipe.readline, ''):
-            self.log(line.strip())
-        pipe.close()
+        self.log(f"Using native Rot2Prog backend on {self.com_port_var.get()} at {self.baud_rate_var.get()} baud")
+        self.learn_port_fingerprint()
+        self.native_backend_active = True
+        self.worker_settings = None # Force the worker to pick up the native transport
+        self.sync_worker_settings()
+        self.server_status_var.set("Server Status: Running (native)")
+        self.start_server_button.config(state="disabled")
+        self.stop_server_button.config(state="normal")
+        self.set_position_button.config(state="normal")
+        self.get_position_button.config(state="normal")
+        return True
 
     def stop_rotctld(self, from_user=True):
         if from_user:
             self.server_running_manually = False
 
-        if self.rotctld_process:
+        if self.native_backend_active:
+            self.native_backend_active = False
+            self.rotor_worker.disconnect()
+            self.sync_worker_settings() # Back to the rotctld transport
+            self.log("Native backend stopped.")
+
+        if self.rotctld_supervisor.state != "stopped":
             self.log("Stopping server...")
-            self.rotctld_process.terminate()
-            try:
-                self.rotctld_process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.log("Server did not terminate, killing it.")
-                self.rotctld_process.kill()
-            self.rotctld_process = None
-            self.log("Server stopped.")
+            self.rotctld_supervisor.stop()
+            self.rotor_worker.disconnect()
 
         self.server_status_var.set("Server Status: Stopped")
         self.rotor_conn_status_var.set("Rotor Connection: Disconnected")
@@ -418,51 +1034,68 @@ class RotorControlGUI(tk.Tk):
         self.set_position_button.config(state="disabled")
         self.get_position_button.config(state="disabled")
 
-    def run_rotctl_command(self, command_args):
-        hamlib_path = self.hamlib_path_var.get()
-        rotctl_exe = os.path.join(hamlib_path, "rotctl.exe")
-
-        if not os.path.exists(rotctl_exe):
-            self.log(f"Error: rotctl.exe not found at {rotctl_exe}")
-            return None, "rotctl.exe not found"
-
-        command = [rotctl_exe, "-m", "2", "-r", f"{self.host_var.get()}:{self.port_var.get()}"] + command_args
-
+    def start_proxy(self):
+        if not self.config.get("proxy_enabled", True):
+            return
         try:
-            result = subprocess.run(
-                command, cwd=hamlib_path, capture_output=True, text=True, timeout=5,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            if result.returncode == 0:
-                return result.stdout.strip(), None
-            else:
-                # Log without showing command to keep logs cleaner
-                self.log(f"rotctl command failed: {result.stderr.strip()}")
-                return None, result.stderr.strip()
-        except Exception as e:
-            self.log(f"Exception running rotctl: {e}")
-            return None, str(e)
+            self.rotor_proxy.start()
+            self.log(f"rotctld proxy listening on {self.rotor_proxy.host}:{self.rotor_proxy.port}")
+        except OSError as e:
+            self.log(f"Could not start rotctld proxy: {e}")
+            self.proxy_status_var.set("Proxy: Error")
+
+    def sync_worker_settings(self):
+        # Pushes connection settings to the worker whenever they change in the GUI
+        command_interval = self.config.get("command_min_interval_ms")
+        # The native driver is only used while it stands in for a started server
+        transport = self.transport_var.get()
+        if transport == "native" and not self.native_backend_active:
+            transport = "tcp"
+        settings = (self.host_var.get(), self.port_var.get(), self.hamlib_path_var.get(),
+                    transport, self.baud_rate_var.get(),
+                    float(self.config.get("poll_max_link_duty", 0.5)), self.rotor_model_var.get(),
+                    None if command_interval is None else float(command_interval) / 1000,
+                    self.com_port_var.get())
+        if settings != self.worker_settings:
+            self.worker_settings = settings
+            self.rotor_worker.configure(*settings)
+
+    def run_rotctl_command(self, command_args, tag="command"):
+        # Queues the command on the worker thread; the result arrives in handle_command_result
+        self.sync_worker_settings()
+        self.rotor_worker.submit(command_args, tag)
 
     def set_position(self):
         if not self.rotor_connected:
             messagebox.showwarning("Warning", "Rotor not connected. Cannot set position.")
             return
 
-        azimuth = self.azimuth_var.get()
+        azimuth = self.azimuth_var.get().strip()
         elevation = self.elevation_var.get()
+        try:
+            float(azimuth)
+        except ValueError:
+            # A locator, callsign, named target or "lat, lon" instead of a bearing
+            found = self.lookup_target(azimuth)
+            if found is None:
+                return
+            self.log(f"{found.name}: bearing {found.azimuth:.1f}, {found.distance_km:.0f} km")
+            azimuth = f"{found.azimuth:.2f}"
+            if found.elevation is not None:
+                elevation = f"{max(0.0, found.elevation):.2f}"
 
         self.log(f"Setting position to Azimuth={azimuth}, Elevation={elevation}")
-        stdout, stderr = self.run_rotctl_command(["P", azimuth, elevation])
-
-        if stderr:
-            self.log(f"Error setting position: {stderr}")
-            messagebox.showerror("Error", f"Failed to set position: {stderr}")
-            self.rotor_connected = False
-            self.rotor_conn_status_var.set("Rotor Connection: Error")
-        else:
-            self.log(f"Position set command sent successfully.")
-            # Optimistically update position, monitor loop will verify
-            self.after(1000, self.check_rotor_connection)
+        try:
+            target, _ = self.trajectory.resolve(float(azimuth), float(elevation))
+        except ValueError:
+            target = None  # Not a number; rotctld will say so
+        if target is not None and abs(target - float(azimuth)) > 1e-6:
+            self.log(f"Azimuth {azimuth} reached via the overlap at {target:.1f}")
+            azimuth = f"{target:.2f}"
+        self.run_rotctl_command(["P", azimuth, elevation], tag="set_position")
+        if target is not None:
+            self.pointer_motion.command(target, float(elevation))
+            self.animate_pointers()
 
     def get_position(self):
         # This is now just a user-facing action
@@ -484,107 +1117,707 @@ class RotorControlGUI(tk.Tk):
         command_args = command_str.split()
         self.log(f"MANUAL CMD: {command_str}")
 
-        stdout, stderr = self.run_rotctl_command(command_args)
+        # The worker re-checks the position after every command to update the visuals
+        self.run_rotctl_command(command_args, tag="manual")
+        self.manual_cmd_var.set("") # Clear the entry
 
-        if stdout:
-            self.log(f"OUTPUT: {stdout}")
-        if stderr:
-            self.log(f"ERROR: {stderr}")
+    def run_script(self):
+        if self.script_future is not None:
+            return
+        if not self.rotor_connected:
+            messagebox.showwarning("Warning", "Rotor not connected. Cannot run a script.")
+            return
+        try:
+            steps = parse_script(self.script_text.get("1.0", tk.END))
+        except ValueError as e:
+            messagebox.showerror("Script Error", str(e))
+            return
+        if not steps:
+            return
 
-        # After sending a command, it's good practice to check the position again
-        # to update the state and visuals.
-        self.after(500, self.check_rotor_connection)
-        self.manual_cmd_var.set("") # Clear the entry
+        self.sync_worker_settings()
+        self.script_runner = ScriptRunner(
+            self.rotor_worker, steps,
+            window=int(self.config.get("script_pipeline_window", 16)),
+            arrival_tolerance=float(self.config.get("script_arrival_tolerance", 1.0)),
+            arrival_timeout=float(self.config.get("script_arrival_timeout_s", 180))
+        )
+        self.log(f"Running script: {len(steps)} steps")
+        self.script_future = self.script_runner.start()
+        self.run_script_button.config(state="disabled")
+        self.cancel_script_button.config(state="normal")
+        self.check_script()
+
+    def load_script_file(self):
+        path = filedialog.askopenfilename(title="Load Command Script",
+                                          filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path) as f:
+                text = f.read()
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read {path}: {e}")
+            return
+        self.script_text.delete("1.0", tk.END)
+        self.script_text.insert("1.0", text)
+
+    def cancel_script(self):
+        if self.script_runner is not None:
+            self.log("Cancelling script...")
+            self.script_runner.cancel()
+
+    def check_script(self):
+        if self.after_id_script:
+            self.after_cancel(self.after_id_script)
+            self.after_id_script = None
+
+        future, runner = self.script_future, self.script_runner
+        if future is None:
+            return
+        if not future.done():
+            line = f", line {runner.current_line}" if runner.current_line else ""
+            self.script_status_var.set(f"Script: {runner.completed}/{runner.total} steps{line}")
+            self.after_id_script = self.after(200, self.check_script)
+            return
+
+        self.script_future = self.script_runner = None
+        self.run_script_button.config(state="normal")
+        self.cancel_script_button.config(state="disabled")
+        summary = future.result()
+        outcome = "cancelled" if summary.cancelled else summary.error or "done"
+        self.script_status_var.set(f"Script: {outcome}")
+        self.log(f"Script {outcome}: {summary.commands} commands, {summary.errors} errors in {summary.elapsed:.1f} s",
+                 logging.WARNING if summary.error else logging.INFO)
+
+    def start_scan(self):
+        if self.scan_future is not None:
+            return
+        if not self.rotor_connected:
+            messagebox.showwarning("Warning", "Rotor not connected. Cannot run a scan.")
+            return
+        if self.pass_tracker is not None or self.script_future is not None:
+            messagebox.showwarning("Warning", "Stop tracking or the running script before starting a scan.")
+            return
+        try:
+            dwell = float(self.scan_dwell_var.get())
+            if dwell < 0:
+                raise ValueError("Dwell can't be negative")
+            points = parse_pattern(self.scan_pattern_var.get(), dwell)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Scan Error", str(e))
+            return
+        if not points:
+            messagebox.showerror("Scan Error", "The pattern has no points.")
+            return
+
+        self.sync_worker_settings()
+        try:
+            self.scan_runner = ScanRunner.from_config(self.rotor_worker, points, self.config, planner=self.trajectory)
+        except OSError as e:
+            messagebox.showerror("Scan Error", f"Could not create the results directory: {e}")
+            return
+        self.scan_future = self.scan_runner.start(self.trajectory.current)
+        plan = self.scan_runner.plan
+        finish = plan[-1].planned + plan[-1].point.dwell
+        self.log(f"Scanning {len(points)} points, planned {finish / 60:.1f} min; results in {self.scan_runner.results_path}")
+        self.start_scan_button.config(state="disabled")
+        self.cancel_scan_button.config(state="normal")
+        self.check_scan()
+
+    def cancel_scan(self):
+        if self.scan_runner is not None:
+            self.log("Cancelling scan...")
+            self.scan_runner.cancel()
+
+    def check_scan(self):
+        if self.after_id_scan:
+            self.after_cancel(self.after_id_scan)
+            self.after_id_scan = None
+
+        future, runner = self.scan_future, self.scan_runner
+        if future is None:
+            return
+        if not future.done():
+            point = runner.current
+            where = f", {runner.state} at {point.azimuth:.1f}/{point.point.elevation:.1f}" if point else ""
+            late = f", {runner.max_late * 1000:.0f} ms behind plan at worst" if runner.max_late >= 0.001 else ""
+            self.scan_status_var.set(f"Scan: {runner.completed}/{runner.total} points{where}{late}")
+            self.after_id_scan = self.after(200, self.check_scan)
+            return
+
+        self.scan_future = self.scan_runner = None
+        self.start_scan_button.config(state="normal")
+        self.cancel_scan_button.config(state="disabled")
+        summary = future.result()
+        outcome = "cancelled" if summary.cancelled else summary.error or "done"
+        self.scan_status_var.set(f"Scan: {outcome}")
+        self.log(f"Scan {outcome}: {summary.completed}/{summary.points} points in {summary.elapsed:.1f} s "
+                 f"(planned {summary.planned:.1f} s, drift {summary.drift * 1000:.0f} ms, "
+                 f"worst lateness {summary.max_late * 1000:.0f} ms)",
+                 logging.WARNING if summary.error else logging.INFO)
 
     def check_rotor_connection(self):
-        # This is the core connection check function
-        stdout, stderr = self.run_rotctl_command(["p"])
+        # Asks the worker for an immediate position poll, the snapshot is applied later
+        self.sync_worker_settings()
+        self.rotor_worker.request_poll("manual")
+
+    def process_rotor_results(self):
+        # Drains everything the worker published since the last tick; never blocks
+        if self.after_id_results:
+            self.after_cancel(self.after_id_results)
+
+        start = time.perf_counter()
+        if self.results_due is not None:
+            self.ui_tick_lag.observe(max(0.0, start - self.results_due))
+        latest_snapshot = None
+        while True:
+            try:
+                result = self.rotor_results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(result, PositionSnapshot):
+                latest_snapshot = result
+            elif isinstance(result, CommandResult):
+                self.handle_command_result(result)
+            elif isinstance(result, SupervisorEvent):
+                self.handle_supervisor_event(result)
+            elif isinstance(result, port_discovery.PortChange):
+                self.handle_port_change(result)
+
+        # Only the newest position matters for the display
+        if latest_snapshot is not None:
+            self.apply_position_snapshot(latest_snapshot)
+        # Pooled rotors: one state read for all of them, panels skip unchanged versions
+        if self.rotor_panels:
+            for name, state in self.rotor_pool.states().items():
+                self.rotor_panels[name].apply_state(*state)
+
+        now = time.perf_counter()
+        self.ui_callback_time.labels("process_rotor_results").observe(now - start)
+        self.results_due = now + 0.1
+        self.after_id_results = self.after(100, self.process_rotor_results)
+
+    def handle_command_result(self, result):
+        if result.tag == "set_position":
+            if result.stderr:
+                self.log(f"Error setting position: {result.stderr}")
+                messagebox.showerror("Error", f"Failed to set position: {result.stderr}")
+                self.rotor_connected = False
+                self.rotor_conn_status_var.set("Rotor Connection: Error")
+            else:
+                self.log("Position set command sent successfully.")
+        elif result.tag == "track":
+            if result.stderr:
+                self.log(f"Tracking set-point failed: {result.stderr}", logging.WARNING)
+            else:
+                self.log(f"TRACK: {' '.join(map(str, result.command))}", logging.DEBUG)
+        elif result.tag == "script":
+            outcome = f"ERROR {result.stderr}" if result.stderr else (result.stdout or "OK").replace("\n", " ")
+            self.log(f"SCRIPT: {' '.join(map(str, result.command))} -> {outcome}",
+                     logging.WARNING if result.stderr else logging.INFO)
+        elif result.tag == "script_poll":
+            self.log(f"SCRIPT POLL: {(result.stdout or result.stderr or '').replace(chr(10), ' ')}", logging.DEBUG)
+        elif result.tag in ("scan", "scan_poll"):
+            # The status line and the results file cover these; only failures are worth showing
+            self.log(f"SCAN: {' '.join(map(str, result.command))} -> {result.stderr or 'OK'}",
+                     logging.WARNING if result.stderr else logging.DEBUG)
+        elif result.tag == "worker":
+            self.log(result.stderr, logging.ERROR)
+        elif result.tag == "proxy":
+            # Gpredict and other proxy clients send a steady stream, keep it out of the widget
+            self.log(f"PROXY CMD: {' '.join(map(str, result.command))} -> {result.stderr or 'OK'}", logging.DEBUG)
+        else:
+            if result.stdout:
+                self.log(f"OUTPUT: {result.stdout}")
+            if result.stderr:
+                self.log(f"ERROR: {result.stderr}")
+
+    def apply_position_snapshot(self, snapshot):
+        # Ignore background polls that were still in flight when the server went away
+        if snapshot.tag == "poll" and not self.is_server_running():
+            return
 
-        if stderr:
+        if not snapshot.connected:
             if self.rotor_connected:
                 self.log("Rotor connection lost.")
+                self.log(snapshot.error)
             self.rotor_connected = False
             self.rotor_conn_status_var.set("Rotor Connection: Disconnected / Error")
             self.current_position_var.set("Current Position: N/A")
-            return False
-        else:
-            if not self.rotor_connected:
-                self.log("Rotor connection established.")
-            self.rotor_connected = True
-            self.rotor_conn_status_var.set("Rotor Connection: Connected")
-            lines = stdout.split('\n')
-            az = lines[0] if lines else "0.0"
-            el = lines[1] if len(lines) > 1 else "0.0"
-            self.current_position_var.set(f"Current Position: Azimuth={az}, Elevation={el}")
+            self.pointer_motion.stop()
+            return
+
+        if not self.rotor_connected:
+            self.log("Rotor connection established.")
+        self.rotor_connected = True
+        self.rotor_conn_status_var.set("Rotor Connection: Connected")
+        self.current_position_var.set(f"Current Position: Azimuth={snapshot.raw_azimuth}, Elevation={snapshot.raw_elevation}")
+
+        # The pointers belong to the replay while one is running
+        if snapshot.azimuth is not None and self.telemetry_replay is None:
+            self.compass.update_azimuth(snapshot.azimuth)
+            self.elevation_indicator.update_elevation(snapshot.elevation)
+            self.compass.add_trail_point(snapshot.timestamp, snapshot.azimuth, snapshot.elevation)
+            self.pointer_motion.update_from_snapshot(snapshot)
+            self.animate_pointers()
+
+    def animate_pointers(self):
+        if self.after_id_animation:
+            self.after_cancel(self.after_id_animation)
+            self.after_id_animation = None
+        # Replay owns the pointers, and without a link there is nothing to extrapolate from
+        if (not self.config.get("pointer_animation", True) or self.telemetry_replay is not None
+                or not self.rotor_connected):
+            return
+        azimuth, elevation, moving = self.pointer_motion.predict()
+        if azimuth is None:
+            return
+        self.compass.update_azimuth(azimuth)
+        self.elevation_indicator.update_elevation(elevation)
+        self.animation_frames += 1
+        # Idle rotor: no frames until the next reading or command says otherwise
+        if moving:
+            fps = max(1, int(self.config.get("pointer_animation_fps", 30)))
+            self.after_id_animation = self.after(1000 // fps, self.animate_pointers)
+
+    def start_replay(self):
+        path = filedialog.askopenfilename(
+            title="Replay Telemetry", initialfile=self.telemetry.path or "",
+            filetypes=[("Telemetry files", "*.bin"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            speed = min(100.0, max(1.0, float(self.replay_speed_var.get())))
+        except ValueError:
+            messagebox.showerror("Error", "Replay speed must be a number between 1 and 100.")
+            return
+        self.stop_replay()
+        self.telemetry.flush()
+        try:
+            self.telemetry_replay = TelemetryReplay(TelemetryReader(path), speed)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not replay {path}: {e}")
+            return
+        self.log(f"Replaying {len(self.telemetry_replay.reader)} samples from {path} at {speed:g}x")
+        self.compass.clear_trail()  # The trail follows the replay until it stops
+        self.replay_tick()
+
+    def replay_tick(self):
+        if self.after_id_replay:
+            self.after_cancel(self.after_id_replay)
+            self.after_id_replay = None
 
+        replay = self.telemetry_replay
+        if replay is None:
+            return
+        timestamp, az, el = replay.current()[:3]
+        # NaN never compares equal, so gaps in the recording just hold the pointer
+        if az == az:
+            self.compass.update_azimuth(az)
+            self.elevation_indicator.update_elevation(el)
+            self.compass.add_trail_point(timestamp, az, el)
+        self.replay_status_var.set(f"Replay: {time.strftime('%H:%M:%S', time.localtime(timestamp))} at {replay.speed:g}x")
+        if replay.finished:
+            self.log("Telemetry replay finished.")
+            self.stop_replay()
+            return
+        self.after_id_replay = self.after(33, self.replay_tick)
+
+    def stop_replay(self):
+        if self.after_id_replay:
+            self.after_cancel(self.after_id_replay)
+            self.after_id_replay = None
+        if self.telemetry_replay is not None:
+            self.telemetry_replay.reader.close()
+            self.telemetry_replay = None
+            self.compass.clear_trail()
+        self.replay_status_var.set("Live")
+
+    def export_telemetry(self):
+        if not self.telemetry.path:
+            messagebox.showerror("Error", "Telemetry recording is disabled, nothing to export.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Telemetry", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("NumPy arrays", "*.npy")]
+        )
+        if not path:
+            return
+        self.telemetry.flush()
+        try:
+            reader = TelemetryReader(self.telemetry.path)
             try:
-                az_float = float(az)
-                el_float = float(el)
-                self.compass.update_azimuth(az_float)
-                self.elevation_indicator.update_elevation(el_float)
-            except (ValueError, TypeError):
-                pass # Ignore if values are not valid floats
+                if path.lower().endswith(".npy"):
+                    reader.export_npy(path)
+                else:
+                    reader.export_csv(path)
+                count = len(reader)
+            finally:
+                reader.close()
+        except (OSError, ValueError, RuntimeError) as e:
+            messagebox.showerror("Error", f"Telemetry export failed: {e}")
+            return
+        self.log(f"Exported {count} telemetry samples to {path}")
+
+    def browse_tle_file(self):
+        path = filedialog.askopenfilename(title="Select TLE File", filetypes=[("TLE files", "*.txt *.tle"), ("All files", "*.*")])
+        if path:
+            self.tle_file_var.set(path)
+
+    def station(self):
+        # Imported on first use: it pulls in NumPy, which would otherwise dominate startup time
+        import satellite_tracker
+        return satellite_tracker.Observer(
+            float(self.station_lat_var.get()), float(self.station_lon_var.get()),
+            float(self.config.get("station_altitude_m", 0.0))
+        )
+
+    def target_station(self):
+        import target_lookup
+        return target_lookup.Station(float(self.station_lat_var.get()), float(self.station_lon_var.get()),
+                                     float(self.config.get("station_altitude_m", 0.0)))
+
+    def target_sources(self):
+        return (self.config.get("target_index_file", "rotor_targets.npz"), self.config.get("cty_file") or None,
+                self.config.get("targets_file") or None)
+
+    def load_target_index(self, station=None):
+        # Ready long before anyone types a callsign; a stale index file is rebuilt on the way
+        if self.target_index_future is not None:
+            return
+        if station is None:
+            try:
+                station = self.target_station()
+            except ValueError:
+                return
+        import target_lookup
+        path, cty_file, targets_file = self.target_sources()
+        self.target_index_error = None
+        self.target_index_future = target_lookup.load_async(path, station, cty_file, targets_file)
+        self.check_target_index()
+
+    def check_target_index(self):
+        if self.after_id_target_index:
+            self.after_cancel(self.after_id_target_index)
+            self.after_id_target_index = None
+
+        future = self.target_index_future
+        if future is None:
+            return
+        if not future.done():
+            self.after_id_target_index = self.after(200, self.check_target_index)
+            return
+        self.target_index_future = None
+        try:
+            self.target_index = future.result()
+        except (OSError, ValueError, RuntimeError) as e:
+            self.target_index_error = e
+
+    def lookup_target(self, text):
+        try:
+            station = self.target_station()
+        except ValueError:
+            messagebox.showerror("Error", "Station latitude and longitude must be numbers.")
+            return None
+        if self.target_index is None or self.target_index.station != station:
+            if self.target_index_error is not None and self.target_index_future is None:
+                error = self.target_index_error
+                self.load_target_index(station)  # Retry in the background, the inputs may have been fixed
+                self.log(f"Target lookup failed: {error}", logging.WARNING)
+                messagebox.showerror("Error", f"Target lookup failed: {error}")
+                return None
+            # Not built yet, or the station moved: (re)build off the Tk thread
+            self.load_target_index(station)
+            self.log("Target index still building, try again in a moment.")
+            messagebox.showinfo("Target Lookup", "The target index is still building, try again in a moment.")
+            return None
+        found = self.target_index.lookup(text)
+        if found is None:
+            messagebox.showerror("Error", f"'{text}' is not a bearing, locator, known callsign or target.")
+        return found
+
+    def predict_passes(self):
+        if self.prediction_future is not None:
+            return
+        try:
+            observer = self.station()
+        except ValueError:
+            messagebox.showerror("Error", "Station latitude and longitude must be numbers.")
+            return
+        path = self.tle_file_var.get()
+        hours = float(self.config.get("prediction_hours", 24))
+        step = float(self.config.get("prediction_step_s", 30))
+        min_elevation = float(self.config.get("tracking_min_elevation", 0.0))
 
-            return True
+        # A few hundred satellites take a second or two, keep that off the Tk thread
+        future = Future()
+
+        def compute():
+            try:
+                import satellite_tracker
+                catalog = satellite_tracker.SatelliteCatalog.from_file(path)
+                future.set_result((catalog, catalog.predict_passes(observer, None, hours, step, min_elevation)))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.prediction_future = future
+        self.predict_button.config(state="disabled")
+        self.tracking_status_var.set(f"Tracking: predicting passes from {os.path.basename(path)}...")
+        threading.Thread(target=compute, daemon=True).start()
+        self.check_prediction()
+
+    def check_prediction(self):
+        if self.after_id_prediction:
+            self.after_cancel(self.after_id_prediction)
+            self.after_id_prediction = None
+
+        future = self.prediction_future
+        if future is None:
+            return
+        if not future.done():
+            self.after_id_prediction = self.after(200, self.check_prediction)
+            return
+        self.prediction_future = None
+        self.predict_button.config(state="normal")
+        try:
+            self.satellite_catalog, self.predicted_passes = future.result()
+        except (OSError, ValueError, RuntimeError) as e:
+            self.tracking_status_var.set("Tracking: prediction failed")
+            self.log(f"Pass prediction failed: {e}", logging.WARNING)
+            messagebox.showerror("Error", f"Pass prediction failed: {e}")
+            return
+
+        self.pass_list.delete(*self.pass_list.get_children())
+        for i, p in enumerate(self.predicted_passes):
+            self.pass_list.insert("", "end", iid=str(i), values=(
+                p.name, time.strftime("%H:%M:%S", time.localtime(p.aos)),
+                time.strftime("%H:%M:%S", time.localtime(p.los)), f"{p.max_elevation:.1f}"
+            ))
+        message = f"{len(self.predicted_passes)} passes for {len(self.satellite_catalog)} satellites"
+        self.tracking_status_var.set(f"Tracking: {message}")
+        self.log(f"Predicted {message} over the next {self.config.get('prediction_hours', 24)} h")
+
+    def track_selected_pass(self):
+        selection = self.pass_list.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Select a pass to track first.")
+            return
+        pass_ = self.predicted_passes[int(selection[0])]
+        if pass_.los < time.time():
+            messagebox.showwarning("Warning", f"The {pass_.name} pass is already over.")
+            return
+        try:
+            observer = self.station()
+        except ValueError:
+            messagebox.showerror("Error", "Station latitude and longitude must be numbers.")
+            return
+        self.stop_tracking()
+        import satellite_tracker
+        # One propagation per pass; every tick after this is a table lookup
+        ephemeris = self.satellite_catalog.ephemeris(pass_, observer)
+        self.pass_tracker = tracker = satellite_tracker.PassTracker(
+            pass_, ephemeris, float(self.config.get("tracking_threshold", 0.5)),
+            float(self.config.get("tracking_min_elevation", 0.0)), planner=self.trajectory
+        )
+        # Error only means something while the satellite is up
+        self.tracking_error.start(lambda t: tracker.target_at(t) if pass_.aos <= t <= pass_.los else None)
+        steps = max(2, int((pass_.los - pass_.aos) / 5))
+        path = [tracker.target_at(pass_.aos + (pass_.los - pass_.aos) * i / steps) for i in range(steps + 1)]
+        path = lttb(path, int(self.config.get("trail_planned_points", 64)), key=lambda p: sky_xy(*p))
+        self.compass.set_planned_path(path)
+        self.log(f"Tracking {pass_.name}: AOS {time.strftime('%H:%M:%S', time.localtime(pass_.aos))}, "
+                 f"max elevation {pass_.max_elevation:.1f}")
+        self.tracking_tick()
+
+    def tracking_tick(self):
+        if self.after_id_tracking:
+            self.after_cancel(self.after_id_tracking)
+            self.after_id_tracking = None
+
+        tracker = self.pass_tracker
+        if tracker is None:
+            return
+        if tracker.finished():
+            self.log(f"{tracker.pass_.name} pass finished (LOS).")
+            self.stop_tracking()
+            return
+        # Set-points go through the normal command queue, so they are coalesced and rate limited
+        setpoint = tracker.next_setpoint()
+        if setpoint is not None and self.rotor_connected:
+            azimuth, elevation = setpoint
+            self.run_rotctl_command(["P", f"{azimuth:.2f}", f"{elevation:.2f}"], tag="track")
+            self.pointer_motion.command(azimuth, elevation)
+            self.animate_pointers()
+        if tracker.last_setpoint is not None:
+            azimuth, elevation = tracker.last_setpoint
+            if time.time() < tracker.pass_.aos:
+                detail = " (waiting for AOS)"
+            else:
+                stats = self.tracking_error.stats()
+                detail = f", lead {self.trajectory.last_lead:.1f} s"
+                if stats is not None:
+                    detail += f", error {stats[1]:.1f} deg RMS"
+            self.tracking_status_var.set(f"Tracking {tracker.pass_.name}: Az={azimuth:.1f}, El={elevation:.1f}{detail}")
+        self.after_id_tracking = self.after(int(self.config.get("tracking_interval_ms", 500)), self.tracking_tick)
+
+    def stop_tracking(self):
+        if self.after_id_tracking:
+            self.after_cancel(self.after_id_tracking)
+            self.after_id_tracking = None
+        if self.pass_tracker is not None:
+            stats = self.tracking_error.stats()
+            if stats is not None:
+                self.log(f"{self.pass_tracker.pass_.name} tracking error: mean {stats[0]:.2f}, "
+                         f"RMS {stats[1]:.2f}, max {stats[2]:.2f} degrees")
+            self.tracking_error.stop()
+            self.compass.set_planned_path([])
+            self.pass_tracker = None
+            self.tracking_status_var.set("Tracking: idle")
 
     def start_monitoring(self):
         self.monitor_server_process()
         self.monitor_rotor_connection()
+        self.process_rotor_results()
+        self.flush_log()
+        # These return straight away unless discovery, a prediction, replay or pass was in progress
+        self.check_discovery()
+        self.update_metrics_panel()
+        self.check_prediction()
+        self.check_script()
+        self.check_scan()
+        self.replay_tick()
+        self.tracking_tick()
+        self.animate_pointers()
 
     def monitor_server_process(self):
         if self.after_id_server_monitor:
             self.after_cancel(self.after_id_server_monitor)
 
-        is_running = self.rotctld_process and self.rotctld_process.poll() is None
+        # Crashes and restarts are handled by the supervisor as they happen, this only refreshes the status line
+        start = time.perf_counter()
+        self.rotctld_supervisor.auto_restart = self.auto_reconnect_var.get()
+        stats = self.rotctld_supervisor.stats()
+        if self.native_backend_active:
+            self.server_status_var.set("Server Status: Running (native)")
+        elif self.rotctld_supervisor.ready:
+            restarts = f", {stats['restarts']} restarts" if stats["restarts"] else ""
+            self.server_status_var.set(f"Server Status: Running (ready in {stats['last_time_to_ready'] * 1000:.0f} ms{restarts})")
+        elif stats["state"] == "stopped":
+            self.server_status_var.set("Server Status: Stopped")
 
-        if self.server_running_manually and not is_running and self.auto_reconnect_var.get():
-            self.log("Server process terminated unexpectedly. Attempting to restart...")
-            self.stop_rotctld(from_user=False) # Clean up first
-            self.start_rotctld(from_user=False)
+        self.ui_callback_time.labels("monitor_server_process").observe(time.perf_counter() - start)
+        self.after_id_server_monitor = self.after(int(self.config.get("server_monitor_ms", 3000)), self.monitor_server_process)
 
-        # Update GUI status
-        if is_running:
-            self.server_status_var.set("Server Status: Running")
-        else:
-            self.server_status_var.set("Server Status: Stopped")
+    def update_metrics_panel(self):
+        if self.after_id_metrics:
+            self.after_cancel(self.after_id_metrics)
+
+        def ms(seconds):
+            return "   -  " if seconds is None else f"{seconds * 1000:6.1f}"
 
-        self.after_id_server_monitor = self.after(3000, self.monitor_server_process)
+        m = self.metrics
+        polls = m.get("rotor_polls")
+        lines = [f"Polls: {polls.get('ok'):.0f} ok, {polls.get('error'):.0f} failed   "
+                 f"p50 {ms(m.get('rotor_poll_latency_seconds').quantile(0.5))} ms  "
+                 f"p99 {ms(m.get('rotor_poll_latency_seconds').quantile(0.99))} ms"]
+        latency = m.get("rotor_command_latency_seconds")
+        for (command,), child in latency.children():
+            lines.append(f"Cmd {command:<6} n={child.count:<6} p50 {ms(child.quantile(0.5))} ms  p99 {ms(child.quantile(0.99))} ms")
+        lines.append(f"Timeouts: {m.get('rotor_timeouts').get():.0f}   rotctld restarts: {self.rotctld_supervisor.restarts}   "
+                     f"queue depth: {self.rotor_worker.queue_stats()['depth']}")
+        lines.append(f"UI stall p99 {ms(self.ui_tick_lag.quantile(0.99))} ms   "
+                     f"draw p99 {ms(self.canvas_draw_time.labels('compass').quantile(0.99))} ms")
+        self.metrics_text_var.set("\n".join(lines))
+
+        self.after_id_metrics = self.after(1000, self.update_metrics_panel)
 
     def monitor_rotor_connection(self):
+        # Only decides whether the worker should be polling; the polling itself is off-thread
         if self.after_id_rotor_monitor:
             self.after_cancel(self.after_id_rotor_monitor)
 
-        is_server_running = self.rotctld_process and self.rotctld_process.poll() is None
+        start = time.perf_counter()
+        is_server_running = self.is_server_running()
+
+        # Proxy clients are served from the worker's polls, so keep polling while any are attached
+        if self.rotor_proxy.running:
+            self.proxy_status_var.set(f"Proxy: {self.rotor_proxy.host}:{self.rotor_proxy.port} ({self.rotor_proxy.client_count} clients)")
+        wants_updates = self.live_updates_var.get() or self.rotor_proxy.client_count > 0
+        self.rotor_pool.set_polling(self.live_updates_var.get())
+        stats = self.rotor_worker.queue_stats()
+        self.queue_status_var.set(
+            f"Command Queue: {stats['depth']} pending, {stats['merged']} merged, "
+            f"{stats['dropped']} dropped, {stats['prioritized']} stops prioritized"
+        )
 
-        if is_server_running:
-            if self.live_updates_var.get():
-                if not self.rotor_connected and self.auto_reconnect_var.get():
-                    self.rotor_conn_status_var.set("Rotor Connection: Attempting to connect...")
-                self.check_rotor_connection()
+        if is_server_running and wants_updates:
+            if not self.rotor_connected and self.auto_reconnect_var.get():
+                self.rotor_conn_status_var.set("Rotor Connection: Attempting to connect...")
+            self.sync_worker_settings()
+            self.rotor_worker.set_polling(True)
         else:
-            self.rotor_connected = False
-            self.rotor_conn_status_var.set("Rotor Connection: Disconnected")
-            self.current_position_var.set("Current Position: N/A")
+            self.rotor_worker.set_polling(False)
+            if not is_server_running:
+                self.rotor_connected = False
+                self.rotor_conn_status_var.set("Rotor Connection: Disconnected")
+                self.current_position_var.set("Current Position: N/A")
 
-        self.after_id_rotor_monitor = self.after(5000, self.monitor_rotor_connection)
+        self.ui_callback_time.labels("monitor_rotor_connection").observe(time.perf_counter() - start)
+        self.after_id_rotor_monitor = self.after(1000, self.monitor_rotor_connection)
 
     def on_closing(self):
         self.save_config()
         # Cancel monitoring loops to prevent errors on exit
         if self.after_id_server_monitor: self.after_cancel(self.after_id_server_monitor)
         if self.after_id_rotor_monitor: self.after_cancel(self.after_id_rotor_monitor)
-
-        if self.rotctld_process and self.rotctld_process.poll() is None:
+        if self.after_id_results: self.after_cancel(self.after_id_results)
+        if self.after_id_log_flush: self.after_cancel(self.after_id_log_flush)
+        if self.after_id_prediction: self.after_cancel(self.after_id_prediction)
+        if self.after_id_discovery: self.after_cancel(self.after_id_discovery)
+        if self.after_id_target_index: self.after_cancel(self.after_id_target_index)
+        if self.after_id_metrics: self.after_cancel(self.after_id_metrics)
+        if self.after_id_script: self.after_cancel(self.after_id_script)
+        if self.after_id_scan: self.after_cancel(self.after_id_scan)
+        if self.after_id_replay: self.after_cancel(self.after_id_replay)
+        if self.after_id_tracking: self.after_cancel(self.after_id_tracking)
+        if self.after_id_animation: self.after_cancel(self.after_id_animation)
+
+        if self.rotctld_supervisor.running:
             if messagebox.askokcancel("Quit", "The rotctld server is running. Do you want to stop it and quit?"):
                 self.stop_rotctld()
+                self.shutdown_background()
                 self.destroy()
             else:
                 # If they cancel, restart monitoring
                 self.start_monitoring()
         else:
+            self.shutdown_background()
             self.destroy()
 
-if __name__ == "__main__":
-    app = RotorControlGUI()
+    def shutdown_background(self):
+        # Stops everything that runs outside the Tk thread
+        if self.script_runner is not None:
+            self.script_runner.cancel()
+        if self.scan_runner is not None:
+            self.scan_runner.cancel()
+        self.rotor_proxy.stop()
+        self.metrics_server.stop()
+        self.stream_server.stop()
+        self.multicast_sink.stop()
+        self.rotctld_supervisor.stop()
+        self.port_watcher.stop()
+        self.rotor_worker.stop()
+        if self.rotor_pool.is_alive():
+            self.rotor_pool.stop()
+        self.telemetry.close()
+        self.log_pipeline.close()
+
+def main(config_file=rotor_settings.CONFIG_FILE):
+    app = RotorControlGUI(config_file)
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -2,7 +2,7 @@
 
 
 a = Analysis(
-    ['rotor_control_gui.py'],
+    ['rotor_control.py'],
     pathex=[],
     binaries=[],
     datas=[],
@@ -16,19 +16,19 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
+# One-folder build: a onefile exe unpacks itself to a temp dir on every launch,
+# which was most of the cold start time
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='rotor_control_gui',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
     upx_exclude=[],
-    runtime_tmpdir=None,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +36,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='rotor_control_gui',
+)
@@ -0,0 +1,336 @@
+"""Headless rotor service: the poller, proxy and telemetry without a window.
+
+Runs the same RotorWorker / RotctldProxy / RotctldSupervisor stack as the GUI
+but never imports tkinter, so it starts in a fraction of the time and can run
+as a daemon on a headless station PC. Log lines go to the console as well as
+the usual rotating log file. Start it through rotor_control.py:
+
+    python -m rotor_control --headless [--start-server] [--once]
+    python -m rotor_control --headless --scan "raster 0 350 10 0 60 15" --dwell 5
+"""
+
+import logging
+import os
+import queue
+import sys
+import time
+
+import port_discovery
+import rot2prog
+import rotor_settings
+from log_pipeline import LogPipeline, classify_rotctld_line
+from metrics import MetricsRegistry, MetricsServer
+from poll_scheduler import AdaptivePollScheduler
+from position_stream import MulticastSink, PositionPublisher, StreamServer
+from rotctld_proxy import PositionCache, RotctldProxy
+from rotctld_supervisor import RotctldSupervisor, SupervisorEvent
+from rotor_worker import CommandResult, PositionSnapshot, RotorWorker
+from sky_scan import ScanRunner
+from telemetry import TelemetryRecorder
+from trajectory import TrajectoryPlanner
+
+
+class HeadlessService:
+    """Owns the background stack and drains its results queue every ``tick`` seconds."""
+    def __init__(self, config, tick=0.1, out=sys.stdout):
+        self.config = config
+        self.tick = tick
+        self.out = out
+        self.log_pipeline = LogPipeline(
+            log_file=config.get("log_file", "rotor_control.log"),
+            max_bytes=int(config.get("log_max_bytes", 1048576)),
+            backup_count=int(config.get("log_backup_count", 5)),
+            show_verbose=config.get("show_verbose_log", False)
+        )
+        self.rotor_results = queue.Queue()
+        self.metrics = MetricsRegistry()
+        self.rotor_worker = RotorWorker(self.rotor_results, AdaptivePollScheduler.from_config(config),
+                                        metrics=self.metrics)
+        self.rotctld_supervisor = RotctldSupervisor(
+            self.rotor_results, on_output=lambda line: self.log(line, classify_rotctld_line(line)),
+            ready_timeout=float(config.get("rotctld_ready_timeout_ms", 10000)) / 1000,
+            backoff_base=float(config.get("rotctld_restart_base_ms", 250)) / 1000,
+            backoff_max=float(config.get("rotctld_restart_max_ms", 10000)) / 1000,
+            crash_loop_limit=int(config.get("rotctld_crash_loop_limit", 5)),
+            resolve_command=self.resolve_rotctld_command
+        )
+        self.rotctld_supervisor.register_metrics(self.metrics)
+        self.port_watcher = port_discovery.PortWatcher(
+            self.rotor_results, interval=float(config.get("port_watch_interval_ms", 1000)) / 1000
+        )
+        self.port_watcher.register_metrics(self.metrics)
+        self.native = False
+        self.metrics_server = MetricsServer(
+            self.metrics, host=config.get("metrics_host", "127.0.0.1"), port=config.get("metrics_port", 9464)
+        )
+        self.position_cache = PositionCache()
+        self.rotor_worker.add_listener(self.position_cache.update_from_snapshot)
+        self.trajectory = TrajectoryPlanner.from_config(config)
+        self.rotor_worker.add_listener(self.trajectory.update_from_snapshot)
+        self.rotor_proxy = RotctldProxy(
+            self.rotor_worker, self.position_cache,
+            host=config.get("proxy_host", "127.0.0.1"), port=config.get("proxy_port", 4534),
+            planner=self.trajectory
+        )
+        self.position_publisher = PositionPublisher.from_config(config)
+        self.rotor_worker.add_listener(self.position_publisher.update_from_snapshot)
+        self.stream_server = StreamServer(
+            self.position_publisher, host=config.get("stream_host", "127.0.0.1"), port=config.get("stream_port", 4536)
+        )
+        self.multicast_sink = MulticastSink(
+            config.get("stream_multicast_group", "239.255.45.34"), config.get("stream_multicast_port", 4535),
+            config.get("stream_multicast_ttl", 1), config.get("stream_multicast_interface") or None
+        )
+        self.position_publisher.add_sink(self.multicast_sink)
+        for component in (self.position_publisher, self.stream_server, self.multicast_sink):
+            component.register_metrics(self.metrics)
+        capacity = int(config.get("telemetry_ring_size", 100000))
+        try:
+            self.telemetry = TelemetryRecorder.from_config(config)
+        except (OSError, ValueError) as e:
+            self.log(f"Telemetry recording disabled: {e}", logging.WARNING)
+            self.telemetry = TelemetryRecorder(None, capacity)
+        self.rotor_worker.add_listener(self.telemetry.record_snapshot)
+        self.first_position = None
+        self.rotor_connected = False
+
+    def log(self, message, level=logging.INFO):
+        self.log_pipeline.push(message, level)
+
+    def flush_log(self):
+        lines, dropped = self.log_pipeline.drain()
+        if self.out is None:
+            return  # Windowed build, there is no console; the log file still has everything
+        if dropped:
+            print(f"... {dropped} log lines dropped ...", file=self.out)
+        for line in lines:
+            print(line, file=self.out)
+        self.out.flush()
+
+    def transport(self, native):
+        transport = self.config.get("rotctl_transport", "tcp")
+        # Same rule as the GUI: the native driver only stands in for a server we were asked to start
+        return "tcp" if transport == "native" and not native else transport
+
+    def configure_worker(self, native=False):
+        command_interval = self.config.get("command_min_interval_ms")
+        self.rotor_worker.configure(
+            self.config.get("host", "127.0.0.1"), self.config.get("port", "4533"),
+            self.config.get("hamlib_path", ""), self.transport(native), self.config.get("baud_rate"),
+            float(self.config.get("poll_max_link_duty", 0.5)), self.config.get("rotor_model"),
+            None if command_interval is None else float(command_interval) / 1000,
+            self.config.get("com_port")
+        )
+
+    def start(self, start_server=False, serve=True):
+        """Starts the worker, proxy, metrics and stream endpoints, and rotctld (or the native driver) if ``start_server``."""
+        native = start_server and self.config.get("rotctl_transport") == "native"
+        if native and (self.config.get("rotor_model") not in rot2prog.HAMLIB_MODELS or rot2prog.load_serial() is None):
+            raise RuntimeError("The native backend needs a Rot2Prog rotor model and pyserial")
+        self.native = native
+        if start_server and self.config.get("port_watch_enabled", True):
+            # No UI thread to keep free: take the first scan here, so the adapter is found before anything opens it
+            self.port_watcher.refresh()
+            self.port_watcher.start()
+            fingerprint = self.config.get("com_port_fingerprint") or self.port_watcher.fingerprint(self.config.get("com_port"))
+            self.config["com_port_fingerprint"] = fingerprint or ""
+            self.rebind_rotor_port()
+        self.configure_worker(native)
+        self.rotor_worker.start()
+        if serve and self.config.get("proxy_enabled", True):
+            try:
+                self.rotor_proxy.start()
+                self.log(f"rotctld proxy listening on {self.rotor_proxy.host}:{self.rotor_proxy.port}")
+            except OSError as e:
+                self.log(f"Could not start rotctld proxy: {e}", logging.WARNING)
+        if serve and self.config.get("metrics_enabled", True):
+            try:
+                self.metrics_server.start()
+                self.log(f"Metrics at http://{self.metrics_server.host}:{self.metrics_server.port}/metrics")
+            except OSError as e:
+                self.log(f"Could not start metrics endpoint: {e}", logging.WARNING)
+        if serve and self.config.get("stream_enabled", True):
+            try:
+                self.stream_server.start()
+                self.log(f"Position stream at http://{self.stream_server.host}:{self.stream_server.port}/events (SSE) and /ws")
+            except OSError as e:
+                self.log(f"Could not start position stream: {e}", logging.WARNING)
+            if self.config.get("stream_multicast_enabled", True):
+                try:
+                    self.multicast_sink.start()
+                    self.log(f"Position multicast to {self.multicast_sink.group}:{self.multicast_sink.port}")
+                except OSError as e:
+                    self.log(f"Could not start position multicast: {e}", logging.WARNING)
+        if start_server and not native:
+            self.start_rotctld()
+        # A daemon always polls: it exists to feed the proxy and the telemetry file
+        self.rotor_worker.set_polling(True)
+        self.rotor_worker.request_poll("manual")
+
+    def start_rotctld(self):
+        hamlib_path = self.config.get("hamlib_path", "")
+        rotctld_exe = os.path.join(hamlib_path, "rotctld.exe")
+        if not os.path.exists(rotctld_exe):
+            rotctld_exe = os.path.join(hamlib_path, "rotctld")  # Hamlib on Linux/macOS
+        host, port = self.config.get("host", "127.0.0.1"), self.config.get("port", "4533")
+        command = [
+            rotctld_exe, "-m", str(self.config.get("rotor_model")), "-r", str(self.config.get("com_port")),
+            "-s", str(self.config.get("baud_rate")), "-T", host, "-t", str(port), "-vvvv"
+        ]
+        self.rotctld_supervisor.start(command, hamlib_path or None, host, port)
+
+    def rebind_rotor_port(self):
+        """Follows the rotor's adapter to its new port name; True if it moved."""
+        fingerprint = self.config.get("com_port_fingerprint")
+        device = self.port_watcher.find(fingerprint)
+        old = self.config.get("com_port")
+        if device is None or device == old:
+            return False
+        self.log(f"Rotor adapter {fingerprint} moved from {old} to {device}", logging.WARNING)
+        self.config["com_port"] = device
+        return True
+
+    def resolve_rotctld_command(self, command):
+        # Supervisor thread, before each restart: point rotctld at wherever the adapter is now; None waits for it
+        fingerprint = self.config.get("com_port_fingerprint")
+        if not fingerprint or not self.port_watcher.running:
+            return command
+        self.port_watcher.refresh()
+        device = self.port_watcher.find(fingerprint)
+        return None if device is None else port_discovery.replace_port(command, device)
+
+    def process_results(self, wait=0.0):
+        # Waits up to ``wait`` s for the first result, drains the rest; returns the newest snapshot, if any
+        latest = None
+        while True:
+            try:
+                result = self.rotor_results.get(timeout=wait) if wait else self.rotor_results.get_nowait()
+            except queue.Empty:
+                break
+            wait = 0.0
+            if isinstance(result, PositionSnapshot):
+                latest = result
+            elif isinstance(result, CommandResult):
+                if result.tag == "worker":
+                    self.log(result.stderr, logging.ERROR)
+                elif result.stderr:
+                    self.log(f"{result.tag.upper()} CMD: {' '.join(map(str, result.command))} -> {result.stderr}",
+                             logging.DEBUG)
+            elif isinstance(result, port_discovery.PortChange):
+                for device in result.removed:
+                    self.log(f"Serial port removed: {device}")
+                if self.rebind_rotor_port():
+                    if self.native:
+                        self.configure_worker(True)  # Reopens the native driver on the new port
+                    elif self.rotctld_supervisor.ready or self.rotctld_supervisor.state == "failed":
+                        self.start_rotctld()
+            elif isinstance(result, SupervisorEvent):
+                self.log(result.message, logging.WARNING if result.state in ("backoff", "failed") else logging.INFO)
+                if result.state == "ready":
+                    self.rotor_worker.request_poll("manual")
+                elif result.state == "backoff":
+                    self.rotor_worker.disconnect()
+        if latest is not None:
+            if latest.connected != self.rotor_connected:
+                self.rotor_connected = latest.connected
+                self.log("Rotor connection established." if latest.connected else f"Rotor connection lost: {latest.error}")
+            if latest.connected and self.first_position is None:
+                self.first_position = latest
+        return latest
+
+    def run(self, once=False, timeout=None):
+        """Runs until Ctrl+C (or the first position with ``once``); returns the exit code."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                # Blocks for at most a tick, so the first position is reported as soon as it arrives
+                self.process_results(self.tick)
+                self.flush_log()
+                if once and self.first_position is not None:
+                    snapshot = self.first_position
+                    print(f"Azimuth={snapshot.raw_azimuth} Elevation={snapshot.raw_elevation}", file=self.out or sys.stderr)
+                    return 0
+                if deadline is not None and time.monotonic() > deadline:
+                    print("No position received before the timeout", file=sys.stderr)
+                    return 1
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            self.stop()
+
+    def run_scan(self, points, timeout=None):
+        """Waits for the rotor, runs a sky scan, then stops; returns the exit code."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        runner = None
+        try:
+            while self.first_position is None:
+                self.process_results(self.tick)
+                self.flush_log()
+                if deadline is not None and time.monotonic() > deadline:
+                    print("No position received before the timeout", file=sys.stderr)
+                    return 1
+            runner = ScanRunner.from_config(self.rotor_worker, points, self.config, planner=self.trajectory)
+            future = runner.start(self.trajectory.current)
+            plan = runner.plan
+            self.log(f"Scanning {len(points)} points, planned {(plan[-1].planned + plan[-1].point.dwell) / 60:.1f} min; "
+                     f"results in {runner.results_path}")
+            while not future.done():
+                self.process_results(self.tick)
+                self.flush_log()
+            summary = future.result()
+            outcome = "cancelled" if summary.cancelled else summary.error or "done"
+            self.log(f"Scan {outcome}: {summary.completed}/{summary.points} points in {summary.elapsed:.1f} s "
+                     f"(planned {summary.planned:.1f} s, drift {summary.drift * 1000:.0f} ms, "
+                     f"worst lateness {summary.max_late * 1000:.0f} ms)",
+                     logging.WARNING if summary.error else logging.INFO)
+            return 1 if summary.error else 0
+        except KeyboardInterrupt:
+            if runner is not None:
+                # Stop the rotor ourselves and wait for it, the worker is shut down right after
+                runner.stop_on_cancel = False
+                runner.cancel()
+                self.rotor_worker.call(["S"], tag="scan").exception(timeout=2)
+            return 1
+        except OSError as e:
+            print(f"Scan failed: {e}", file=sys.stderr)
+            return 1
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.rotor_proxy.stop()
+        self.metrics_server.stop()
+        self.stream_server.stop()
+        self.multicast_sink.stop()
+        self.rotctld_supervisor.stop()
+        self.port_watcher.stop()
+        self.rotor_worker.stop()
+        self.telemetry.close()
+        self.flush_log()
+        self.log_pipeline.close()
+
+
+def run(config_file=rotor_settings.CONFIG_FILE, start_server=False, once=False, timeout=None, scan=None, dwell=None):
+    config = rotor_settings.load_config(config_file)
+    points = None
+    if scan:
+        from sky_scan import parse_pattern
+        try:
+            points = parse_pattern(scan, float(config.get("scan_dwell_s", 5.0)) if dwell is None else dwell)
+        except (OSError, ValueError) as e:
+            print(f"Bad scan pattern: {e}", file=sys.stderr)
+            return 1
+        if not points:
+            print("The scan pattern has no points", file=sys.stderr)
+            return 1
+    service = HeadlessService(config)
+    try:
+        # A one-shot reading has no clients to serve, and skipping the servers saves their shutdown wait
+        service.start(start_server, serve=not once)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Failed to start: {e}", file=sys.stderr)
+        service.stop()
+        return 1
+    if points is not None:
+        return service.run_scan(points, timeout)
+    return service.run(once, timeout)
@@ -0,0 +1,614 @@
+"""Several rotors polled and commanded from one selector-driven I/O thread.
+
+Every rotor in the pool has its own connection (a non-blocking socket to its
+rotctld, or a non-blocking serial port for native Rot2Prog rotors), its own
+AdaptivePollScheduler and RotorCommandQueue and, optionally, its own rotctld
+process. One thread multiplexes all of them, so adding a rotor adds a socket
+rather than a thread, and the GUI picks up every rotor's latest state from a
+single tick.
+
+Pooled rotctld processes are supervised from the same loop, with the main
+supervisor's rules (rotctld_supervisor.RestartPolicy): readiness is the
+rotor's own connection succeeding, exits are found by ``poll()`` on the loop
+tick, and the output pipe sits in the selector next to the sockets. Select
+can't wait on pipes on Windows, so there the output is discarded.
+"""
+
+import errno
+import logging
+import os
+import queue
+import selectors
+import socket
+import subprocess
+import threading
+import time
+
+import rot2prog
+from command_queue import RotorCommandQueue, command_name, min_command_interval
+from log_pipeline import classify_rotctld_line
+from poll_scheduler import AdaptivePollScheduler, link_poll_floor
+from rotctld_client import ExtendedResponseParser, RotctldError, RotctlResponse, long_command_name
+from rotctld_supervisor import RestartPolicy, crash_loop_message
+from rotor_worker import PositionSnapshot
+
+STATUS_FRAME_SIZE = 12
+SERIAL_POLL_INTERVAL = 0.02  # Serial ports can't go in the selector on Windows, check them this often
+SUPERVISE_INTERVAL = 0.5     # Longest the loop sleeps, so process exits are noticed promptly
+FOLLOW_UP_DELAY = 0.5        # Re-poll this soon after a command
+PROBE_INTERVAL = 0.1         # Connection retries while a new rotctld is starting up
+KILL_AFTER = 5.0             # A terminated rotctld still running after this long is killed
+SELECT_PIPES = os.name == "posix"
+
+_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK)}
+
+
+class _TcpLink:
+    """Non-blocking rotctld connection speaking the '+' extended protocol."""
+    selectable = True
+
+    def __init__(self, host, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        err = self.sock.connect_ex((host, int(port)))
+        if err not in _IN_PROGRESS:
+            self.sock.close()
+            raise OSError(err, os.strerror(err))
+        self.ready = err == 0
+        self._out = b""
+        self._parser = ExtendedResponseParser()
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def events(self):
+        return selectors.EVENT_READ | (selectors.EVENT_WRITE if not self.ready or self._out else 0)
+
+    def send(self, command_args):
+        self._out += ("+" + " ".join(str(arg) for arg in command_args) + "\n").encode("ascii")
+        self._flush()
+        return None  # The reply arrives through on_ready()
+
+    def on_ready(self, mask):
+        if mask & selectors.EVENT_WRITE:
+            if not self.ready:
+                err = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err:
+                    raise OSError(err, os.strerror(err))
+                self.ready = True
+            self._flush()
+        if not mask & selectors.EVENT_READ:
+            return []
+        data = self.sock.recv(4096)
+        if not data:
+            raise ConnectionResetError("rotctld closed the connection")
+        return self._parser.feed(data)
+
+    def poll(self):
+        return []
+
+    def close(self):
+        self.sock.close()
+
+    def _flush(self):
+        if self.ready and self._out:
+            try:
+                sent = self.sock.send(self._out)
+            except BlockingIOError:
+                return
+            self._out = self._out[sent:]
+
+
+class _SerialLink:
+    """Non-blocking Rot2Prog link, read and written by polling instead of through the selector.
+
+    The protocol is rot2prog.Rot2ProgProtocol, the same as the main rotor's
+    native backend; only the I/O differs. Writes never block: whatever the
+    driver doesn't take at once stays buffered and goes out on later polls,
+    so a stalled adapter holds up its own rotor and nobody else's.
+    """
+    selectable = False
+
+    def __init__(self, port, baud_rate, park=(0.0, 0.0)):
+        self.serial = rot2prog.open_serial(port, baud_rate, timeout=0, write_timeout=0)
+        self.protocol = rot2prog.Rot2ProgProtocol(port, park)
+        self.ready = True
+        self._out = b""
+        self._buffer = b""
+        self._awaiting = False  # A status reply is due
+
+    @property
+    def pending(self):
+        """True while a reply is due or output is still buffered, i.e. the pool should keep polling."""
+        return self._awaiting or bool(self._out)
+
+    def send(self, command_args):
+        """Writes the frame for a command; returns its response if no reply is expected."""
+        try:
+            name, args, text = rot2prog.split_command(command_args)
+            step = self.protocol.begin(name, args, text)
+        except RotctldError as e:
+            return RotctlResponse(long_command_name(str(command_args[0]).lstrip("\\")), [], e.code)
+        return self._step(*step)
+
+    def poll(self):
+        self._flush()
+        if not self._awaiting:
+            return []
+        self._buffer += self.serial.read(self.serial.in_waiting or 0)
+        if len(self._buffer) < STATUS_FRAME_SIZE:
+            return []
+        frame, self._buffer = self._buffer[:STATUS_FRAME_SIZE], b""
+        try:
+            step = self.protocol.finish(frame)
+        except (ValueError, RotctldError) as e:
+            raise OSError(f"Rot2Prog protocol error: {e}") from e
+        response = self._step(*step)
+        return [] if response is None else [response]
+
+    def close(self):
+        try:
+            self.serial.close()
+        except OSError:
+            pass
+
+    def _step(self, frame, response):
+        if frame is not None:
+            if response is None:
+                self.serial.reset_input_buffer()
+                self._buffer = b""
+            self._out += frame
+            self._flush()
+        self._awaiting = response is None
+        return response
+
+    def _flush(self):
+        if self._out:
+            sent = self.serial.write(self._out)
+            self._out = self._out[sent or 0:]
+
+
+class _ProcessOutput:
+    """rotctld's output pipe (stderr merged into stdout) as a non-blocking selector source."""
+    def __init__(self, pipe):
+        self.pipe = pipe
+        os.set_blocking(pipe.fileno(), False)
+        self._partial = b""
+
+    def fileno(self):
+        return self.pipe.fileno()
+
+    def read_lines(self):
+        """Complete lines read so far; None once the process has closed the pipe."""
+        try:
+            data = os.read(self.fileno(), 4096)
+        except BlockingIOError:
+            return []
+        if not data:
+            return None
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        return [line.decode("utf-8", "replace").strip() for line in lines]
+
+    def close(self):
+        self.pipe.close()
+
+
+class PoolRotor:
+    """One rotor in a RotorPool.
+
+    Apart from the published ``status``/``snapshot`` pair (read through
+    RotorPool.states()), everything here belongs to the pool thread.
+    """
+    def __init__(self, name, host="127.0.0.1", port=4533, transport="tcp", rotor_model="901", com_port=None,
+                 baud_rate=600, start_rotctld=False, hamlib_path="", scheduler=None, command_interval=None):
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.transport = transport  # "tcp" (rotctld) or "native" (Rot2Prog on com_port)
+        self.rotor_model = str(rotor_model)
+        self.com_port = com_port
+        self.baud_rate = baud_rate
+        self.start_rotctld = start_rotctld and transport == "tcp"
+        self.hamlib_path = hamlib_path
+        self.scheduler = scheduler or AdaptivePollScheduler()
+        self.scheduler.min_interval = link_poll_floor(baud_rate)
+        if command_interval is None:
+            command_interval = min_command_interval(baud_rate, rotor_model)
+        self.requests = RotorCommandQueue(command_interval)
+        self.link = None
+        self.in_flight = None  # (kind, command_args, started)
+        self.next_poll = 0.0
+        self.reconnect_at = 0.0
+        self.connect_started = 0.0
+        self.commanded = None
+        # rotctld supervision, done by the pool thread
+        self.restart_policy = None      # RestartPolicy, set up by the pool when start_rotctld is on
+        self.rotctld_state = "stopped"  # starting, ready, backoff or failed, as in SupervisorEvent
+        self.process = None
+        self.output = None              # _ProcessOutput in the selector, POSIX only
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.stop_reason = None         # Why the pool is terminating the process (readiness timeout)
+        self.stop_at = 0.0
+        self.restarts = 0
+        # Published state
+        self.status = "Idle"
+        self.snapshot = None
+        self.version = 0
+
+    @classmethod
+    def from_config(cls, entry, config):
+        """Builds a rotor from one entry of the ``rotors`` list in rotor_config.json."""
+        command_interval = entry.get("command_min_interval_ms", config.get("command_min_interval_ms"))
+        return cls(
+            entry["name"], entry.get("host", "127.0.0.1"), entry.get("port", 4533), entry.get("transport", "tcp"),
+            entry.get("rotor_model", "901"), entry.get("com_port"), entry.get("baud_rate", 600),
+            entry.get("start_rotctld", False), config.get("hamlib_path", ""),
+            AdaptivePollScheduler.from_config(config),
+            None if command_interval is None else float(command_interval) / 1000
+        )
+
+    def rotctld_command(self):
+        return [
+            os.path.join(self.hamlib_path, "rotctld.exe"), "-m", self.rotor_model, "-r", str(self.com_port),
+            "-s", str(self.baud_rate), "-T", self.host, "-t", str(self.port)
+        ]
+
+
+class RotorPool(threading.Thread):
+    """Event loop serving every PoolRotor from one thread.
+
+    submit() and set_polling() may be called from any thread; states()
+    returns each rotor's latest (status, snapshot, version) for the GUI.
+    """
+    def __init__(self, rotors, log=None, command_timeout=5.0, ready_timeout=10.0, restart_base=0.25,
+                 restart_max=10.0, crash_loop_limit=5):
+        super().__init__(name="rotor-pool", daemon=True)
+        self.rotors = {rotor.name: rotor for rotor in rotors}
+        self.log = log or (lambda message: None)
+        self.command_timeout = command_timeout
+        self.ready_timeout = ready_timeout
+        for rotor in self.rotors.values():
+            if rotor.start_rotctld:
+                rotor.restart_policy = RestartPolicy(restart_base, restart_max, crash_loop_limit)
+        self._polling = False
+        self._running = True
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ, None)
+
+    # --- Thread-safe API ---
+
+    def submit(self, name, command_args):
+        rotor = self.rotors[name]
+        for dropped in rotor.requests.put(command_args, command_args):
+            self.log(f"{name}: set-point {' '.join(map(str, dropped))} dropped, superseded by stop")
+        self._wake()
+
+    def set_polling(self, enabled):
+        if enabled != self._polling:
+            self._polling = enabled
+            self._wake()
+
+    def states(self):
+        with self._lock:
+            return {name: (rotor.status, rotor.snapshot, rotor.version) for name, rotor in self.rotors.items()}
+
+    def stop(self, timeout=2.0):
+        self._running = False
+        self._wake()
+        if self.is_alive():
+            self.join(timeout)
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Already has a wake-up pending, or shutting down
+
+    # --- Pool thread ---
+
+    def run(self):
+        try:
+            while self._running:
+                now = time.monotonic()
+                deadline = now + SUPERVISE_INTERVAL
+                for rotor in self.rotors.values():
+                    deadline = min(deadline, self._service(rotor, now))
+                timeout = max(0.0, deadline - time.monotonic())
+                if any(rotor.link is not None and not rotor.link.selectable and rotor.link.pending
+                       for rotor in self.rotors.values()):
+                    timeout = min(timeout, SERIAL_POLL_INTERVAL)
+
+                for key, mask in self._selector.select(timeout):
+                    if key.data is None:
+                        try:
+                            self._wake_recv.recv(4096)
+                        except BlockingIOError:
+                            pass
+                        continue
+                    if key.fileobj is key.data.output:
+                        self._read_output(key.data)
+                    elif key.fileobj is key.data.link:  # Skip events for a link closed earlier in this pass
+                        self._on_ready(key.data, mask)
+                for rotor in self.rotors.values():
+                    if rotor.link is not None and not rotor.link.selectable and rotor.link.pending:
+                        self._on_ready(rotor, 0)
+        finally:
+            self._shutdown()
+
+    def _service(self, rotor, now):
+        # Advances one rotor's state machine and returns when it next needs attention
+        if rotor.restart_policy is not None:
+            wait = self._supervise(rotor, now)
+            if wait is not None:
+                return wait
+
+        if rotor.in_flight is not None:
+            started = rotor.in_flight[2]
+            if now - started >= self.command_timeout:
+                self._fail(rotor, "Timed out waiting for the rotor", now)
+                return rotor.reconnect_at
+            return started + self.command_timeout
+
+        if rotor.link is None:
+            if now < rotor.reconnect_at:
+                return rotor.reconnect_at
+            self._connect(rotor, now)
+            if rotor.link is None:
+                return rotor.reconnect_at
+        if not rotor.link.ready:
+            if now - rotor.connect_started >= self.command_timeout:
+                self._fail(rotor, "Timed out connecting", now)
+                return rotor.reconnect_at
+            return rotor.connect_started + self.command_timeout
+        if rotor.rotctld_state == "starting":
+            self._rotctld_ready(rotor, now)  # The first connection that goes through is the readiness probe
+
+        try:
+            entry = rotor.requests.get(timeout=0)
+        except queue.Empty:
+            entry = None
+        if entry is not None:
+            self._send(rotor, "command", entry.item, now)
+            return now
+        slot = rotor.requests.next_slot()
+        if rotor.requests.depth():
+            return slot
+        if self._polling:
+            due = max(rotor.next_poll, slot)
+            if now >= due:
+                self._send(rotor, "poll", ["p"], now)
+                return now
+            return due
+        return now + SUPERVISE_INTERVAL
+
+    def _connect(self, rotor, now):
+        rotor.connect_started = now
+        try:
+            if rotor.transport == "native":
+                rotor.link = _SerialLink(rotor.com_port, rotor.baud_rate)
+            else:
+                rotor.link = _TcpLink(rotor.host, rotor.port)
+                self._selector.register(rotor.link, rotor.link.events(), rotor)
+        except (OSError, ValueError) as e:
+            rotor.link = None
+            self._fail(rotor, f"Could not connect: {e}", now)
+
+    def _send(self, rotor, kind, command_args, now):
+        rotor.in_flight = (kind, command_args, now)
+        try:
+            response = rotor.link.send(command_args)
+        except OSError as e:
+            self._fail(rotor, str(e), now)
+            return
+        if response is not None:
+            self._complete(rotor, response)
+        elif rotor.link.selectable:
+            self._selector.modify(rotor.link, rotor.link.events(), rotor)
+
+    def _on_ready(self, rotor, mask):
+        link = rotor.link
+        try:
+            responses = link.on_ready(mask) if link.selectable else link.poll()
+        except OSError as e:
+            self._fail(rotor, str(e), time.monotonic())
+            return
+        if link.selectable:
+            self._selector.modify(link, link.events(), rotor)
+        for response in responses:
+            if rotor.in_flight is None:
+                break  # Stray reply after a timeout, nothing is waiting for it
+            self._complete(rotor, response)
+
+    def _complete(self, rotor, response):
+        kind, command_args, started = rotor.in_flight
+        rotor.in_flight = None
+        rotor.requests.mark_sent()
+        now = time.monotonic()
+        latency = now - started
+
+        if kind == "poll":
+            try:
+                values = response.values
+                az = float(response.get("Azimuth", values[0] if values else None))
+                el = float(response.get("Elevation", values[1] if len(values) > 1 else None))
+            except (TypeError, ValueError):
+                az = el = None
+            if not response.ok or az is None:
+                rotor.scheduler.record_error()
+                snapshot = PositionSnapshot(time.time(), False, None, None, None, None,
+                                            f"RPRT {response.code}", latency, "poll", rotor.commanded)
+                self._publish(rotor, f"Error: RPRT {response.code}", snapshot)
+            else:
+                rotor.scheduler.record_position(az, el)
+                snapshot = PositionSnapshot(time.time(), True, az, el, f"{az:.2f}", f"{el:.2f}",
+                                            None, latency, "poll", rotor.commanded)
+                self._publish(rotor, "Connected", snapshot)
+            rotor.next_poll = now + rotor.scheduler.next_interval()
+            return
+
+        name = command_name(command_args)
+        if not response.ok:
+            self.log(f"{rotor.name}: {' '.join(map(str, command_args))} failed (RPRT {response.code})")
+            return
+        if name in ("P", "\\set_pos"):
+            try:
+                rotor.scheduler.set_target(command_args[1], command_args[2])
+                rotor.commanded = (float(command_args[1]), float(command_args[2]))
+            except (IndexError, ValueError):
+                pass
+        elif name in ("S", "\\stop"):
+            rotor.scheduler.clear_target()
+            rotor.commanded = None
+        elif name in ("M", "K", "\\move", "\\park"):
+            rotor.scheduler.note_motion()
+        # Follow up with a position check so the display catches up quickly
+        rotor.next_poll = min(rotor.next_poll, now + FOLLOW_UP_DELAY)
+
+    def _fail(self, rotor, error, now):
+        if rotor.rotctld_state == "starting" and rotor.process is not None:
+            # Not listening yet; keep probing until it does or the ready timeout runs out
+            rotor.in_flight = None
+            self._close_link(rotor)
+            rotor.reconnect_at = now + PROBE_INTERVAL
+            return
+        if rotor.in_flight is not None and rotor.in_flight[0] == "command":
+            self.log(f"{rotor.name}: {' '.join(map(str, rotor.in_flight[1]))} failed: {error}")
+        rotor.in_flight = None
+        self._close_link(rotor)
+        rotor.scheduler.record_error()
+        rotor.reconnect_at = now + rotor.scheduler.next_interval()
+        snapshot = PositionSnapshot(time.time(), False, None, None, None, None, error, 0.0, "poll", rotor.commanded)
+        self._publish(rotor, f"Disconnected: {error}", snapshot)
+
+    def _close_link(self, rotor):
+        if rotor.link is None:
+            return
+        if rotor.link.selectable:
+            try:
+                self._selector.unregister(rotor.link)
+            except (KeyError, ValueError):
+                pass
+        rotor.link.close()
+        rotor.link = None
+
+    def _supervise(self, rotor, now):
+        # Starts, watches and restarts the rotor's rotctld; returns a wake-up time while the rotor can't be served
+        process = rotor.process
+        if process is not None:
+            code = process.poll()
+            if code is not None:
+                self._rotctld_exited(rotor, code, now)
+            elif rotor.stop_reason is not None:
+                if now - rotor.stop_at >= KILL_AFTER:
+                    process.kill()
+                return now + SUPERVISE_INTERVAL
+            elif rotor.rotctld_state == "starting" and now - rotor.started_at >= self.ready_timeout:
+                # Alive but never listening: a failed start, counted like a crash once it has exited
+                rotor.stop_reason = f"rotctld did not accept connections within {self.ready_timeout:g} s"
+                rotor.stop_at = now
+                self._close_link(rotor)
+                process.terminate()
+                return now + SUPERVISE_INTERVAL
+            else:
+                return None
+        if rotor.rotctld_state == "failed":
+            return now + SUPERVISE_INTERVAL
+        if now < rotor.restart_at:
+            return rotor.restart_at
+        self._start_rotctld(rotor, now)
+        if rotor.process is None:
+            return rotor.restart_at if rotor.rotctld_state == "backoff" else now + SUPERVISE_INTERVAL
+        return None
+
+    def _start_rotctld(self, rotor, now):
+        try:
+            rotor.process = subprocess.Popen(
+                rotor.rotctld_command(), cwd=rotor.hamlib_path or None, stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE if SELECT_PIPES else subprocess.DEVNULL, stderr=subprocess.STDOUT,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        except OSError as e:
+            self._rotctld_exited(rotor, None, now, f"Could not start rotctld: {e}")
+            return
+        if rotor.restart_policy.crashes:
+            rotor.restarts += 1
+        rotor.rotctld_state = "starting"
+        rotor.started_at = now
+        rotor.reconnect_at = now
+        if SELECT_PIPES:
+            rotor.output = _ProcessOutput(rotor.process.stdout)
+            self._selector.register(rotor.output, selectors.EVENT_READ, rotor)
+        self.log(f"{rotor.name}: started rotctld (pid {rotor.process.pid}) on port {rotor.port}")
+        self._publish(rotor, "Starting rotctld", rotor.snapshot)
+
+    def _rotctld_ready(self, rotor, now):
+        rotor.rotctld_state = "ready"
+        rotor.restart_policy.ready(now)
+        self.log(f"{rotor.name}: rotctld ready on {rotor.host}:{rotor.port} after {(now - rotor.started_at) * 1000:.0f} ms")
+        self._publish(rotor, "rotctld ready", rotor.snapshot)
+
+    def _rotctld_exited(self, rotor, code, now, reason=None):
+        reason = rotor.stop_reason or reason or f"rotctld exited with code {code}"
+        rotor.process = None
+        rotor.stop_reason = None
+        self._close_output(rotor)
+        rotor.rotctld_state = "backoff"
+        if rotor.in_flight is not None or rotor.link is not None:
+            self._fail(rotor, reason, now)
+        delay = rotor.restart_policy.exited(now)
+        if delay is None:
+            rotor.rotctld_state = "failed"
+            self.log(f"{rotor.name}: {crash_loop_message(reason, rotor.restart_policy)}")
+            self._publish(rotor, "rotctld crash loop, restarts stopped", rotor.snapshot)
+            return
+        rotor.restart_at = now + delay
+        self.log(f"{rotor.name}: {reason}, restarting in {delay:.2f} s")
+        self._publish(rotor, f"{reason}, restarting in {delay:.2f} s", rotor.snapshot)
+
+    def _read_output(self, rotor):
+        lines = rotor.output.read_lines()
+        if lines is None:
+            self._close_output(rotor)  # The process is exiting; poll() picks that up on the next tick
+            return
+        for line in lines:
+            # Only problems reach the shared log, the pool has no verbose view
+            if line and classify_rotctld_line(line) >= logging.WARNING:
+                self.log(f"{rotor.name}: rotctld: {line}")
+
+    def _close_output(self, rotor):
+        if rotor.output is None:
+            return
+        try:
+            self._selector.unregister(rotor.output)
+        except (KeyError, ValueError):
+            pass
+        rotor.output.close()
+        rotor.output = None
+
+    def _publish(self, rotor, status, snapshot):
+        with self._lock:
+            rotor.status = status
+            rotor.snapshot = snapshot
+            rotor.version += 1
+
+    def _shutdown(self):
+        for rotor in self.rotors.values():
+            self._close_link(rotor)
+            self._close_output(rotor)
+            if rotor.process is not None and rotor.process.poll() is None:
+                rotor.process.terminate()
+                try:
+                    rotor.process.wait(timeout=2)
+                except subprocess.TimeoutExpired:
+                    rotor.process.kill()
+            rotor.process = None
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
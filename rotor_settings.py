@@ -0,0 +1,110 @@
+"""Settings shared by the GUI and the headless service (rotor_config.json)."""
+
+import json
+import os
+
+CONFIG_FILE = "rotor_config.json"
+
+# Used when there is no config file yet; everything else falls back to the .get() defaults at the call sites
+DEFAULT_CONFIG = {
+    "hamlib_path": "C:\\Program Files\\hamlib-w64-4.6.3\\bin",
+    "rotor_model": "901",
+    "com_port": "COM6",
+    "com_port_fingerprint": "",
+    "port_watch_enabled": True,
+    "port_watch_interval_ms": 1000,
+    "baud_rate": "600",
+    "host": "127.0.0.1",
+    "port": "4533",
+    "rotctl_transport": "tcp",
+    "log_file": "rotor_control.log",
+    "log_max_bytes": 1048576,
+    "log_backup_count": 5,
+    "log_widget_lines": 2000,
+    "show_verbose_log": False,
+    "pointer_epsilon": 0.1,
+    "pointer_animation": True,
+    "pointer_animation_fps": 30,
+    "pointer_extrapolation_s": 5.0,
+    "trail_enabled": True,
+    "trail_minutes": 10,
+    "trail_buckets": 40,
+    "trail_bucket_points": 8,
+    "trail_planned_points": 64,
+    "poll_fast_ms": 300,
+    "poll_slow_ms": 5000,
+    "poll_idle_after_ms": 3000,
+    "poll_motion_threshold": 0.2,
+    "poll_backoff_base_ms": 1000,
+    "poll_backoff_max_ms": 30000,
+    "poll_jitter": 0.2,
+    "poll_max_link_duty": 0.5,
+    "server_monitor_ms": 3000,
+    "rotctld_ready_timeout_ms": 10000,
+    "rotctld_restart_base_ms": 250,
+    "rotctld_restart_max_ms": 10000,
+    "rotctld_crash_loop_limit": 5,
+    "proxy_enabled": True,
+    "proxy_host": "127.0.0.1",
+    "proxy_port": 4534,
+    "metrics_enabled": True,
+    "metrics_host": "127.0.0.1",
+    "metrics_port": 9464,
+    "stream_enabled": True,
+    "stream_host": "127.0.0.1",
+    "stream_port": 4536,
+    "stream_multicast_enabled": True,
+    "stream_multicast_group": "239.255.45.34",
+    "stream_multicast_port": 4535,
+    "stream_multicast_ttl": 1,
+    "stream_multicast_interface": "",
+    "stream_resolution": 0.1,
+    "stream_heartbeat_s": 10,
+    "script_pipeline_window": 16,
+    "script_arrival_tolerance": 1.0,
+    "script_arrival_timeout_s": 180,
+    "scan_pattern": "raster 0 350 10 0 60 15",
+    "scan_dwell_s": 5.0,
+    "scan_results_dir": "scans",
+    "scan_poll_interval_ms": 250,
+    "scan_settle_s": 1.0,
+    "scan_arrival_tolerance": 1.0,
+    "scan_arrival_timeout_s": 180,
+    "command_min_interval_ms": None,
+    "telemetry_file": "rotor_telemetry.bin",
+    "telemetry_ring_size": 100000,
+    "telemetry_max_bytes": 67108864,
+    "telemetry_backup_count": 5,
+    "tle_file": "",
+    "station_latitude": 0.0,
+    "station_longitude": 0.0,
+    "station_altitude_m": 0.0,
+    "targets_file": "",
+    "cty_file": "",
+    "target_index_file": "rotor_targets.npz",
+    "tracking_min_elevation": 0.0,
+    "prediction_hours": 24,
+    "prediction_step_s": 30,
+    "tracking_interval_ms": 500,
+    "tracking_threshold": 0.5,
+    "rotor_min_az": 0.0,
+    "rotor_max_az": 360.0,
+    "rotor_az_slew": 6.0,
+    "rotor_el_slew": 6.0,
+    "trajectory_latency_ms": 200,
+    "trajectory_lead": True,
+    "rotors": [],
+    "com_port_cache": []
+}
+
+
+def load_config(path=CONFIG_FILE):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    return dict(DEFAULT_CONFIG)
+
+
+def save_config(config, path=CONFIG_FILE):
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=4)
@@ -0,0 +1,231 @@
+"""Rotor simulator that stands in for rotctld and real hardware.
+
+SimulatedRotor models an az/el rotor with a finite slew rate, mechanical
+limits, serial latency and injectable faults. SimulatedRotctld serves it over
+the rotctld TCP protocol (default and extended response modes), so the GUI,
+the proxy and the benchmarks can run without a rotor attached:
+
+    python rotor_simulator.py --port 4533 --slew 6 --latency 0.4 --timeout-rate 0.01
+
+Point the GUI at the same host/port and use Get/Set Position as usual.
+"""
+
+import argparse
+import random
+import socketserver
+import threading
+import time
+
+from rotctld_client import format_response, long_command_name, split_command_line
+
+
+class SimulatedRotor:
+    """Thread-safe az/el rotor model.
+
+    Positions are advanced lazily from the monotonic clock, so the model
+    costs nothing while nobody is asking.
+    """
+    def __init__(self, az_slew=6.0, el_slew=6.0, min_az=-180.0, max_az=540.0, min_el=0.0, max_el=90.0,
+                 latency=0.0, timeout_rate=0.0, error_rate=0.0, disconnect_rate=0.0, stuck=False,
+                 seed=None, clock=time.monotonic):
+        self.az_slew = az_slew  # Degrees per second
+        self.el_slew = el_slew
+        self.min_az, self.max_az = min_az, max_az
+        self.min_el, self.max_el = min_el, max_el
+        self.latency = latency  # Seconds the "serial link" takes per command
+        # Fault injection, as probabilities per command
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.stuck = stuck  # Accepts set-points but never moves
+        self.clock = clock
+        self.commands = 0
+        self.faults = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._azimuth = 0.0
+        self._elevation = 0.0
+        self._target = None
+        self._last_update = clock()
+
+    def position(self):
+        with self._lock:
+            self._advance()
+            return self._azimuth, self._elevation
+
+    def set_target(self, azimuth, elevation):
+        """Starts a move; returns False if the target is outside the limits."""
+        if not (self.min_az <= azimuth <= self.max_az and self.min_el <= elevation <= self.max_el):
+            return False
+        with self._lock:
+            self._advance()
+            self._target = (azimuth, elevation)
+        return True
+
+    def stop(self):
+        with self._lock:
+            self._advance()
+            self._target = None
+
+    @property
+    def moving(self):
+        with self._lock:
+            self._advance()
+            return self._target is not None
+
+    def next_fault(self):
+        """Draws the fault (None, "timeout", "error" or "disconnect") for the next command."""
+        with self._lock:
+            self.commands += 1
+            roll = self._rng.random()
+            for fault, rate in (("timeout", self.timeout_rate), ("error", self.error_rate),
+                                ("disconnect", self.disconnect_rate)):
+                if roll < rate:
+                    self.faults += 1
+                    return fault
+                roll -= rate
+            return None
+
+    def _advance(self):
+        now = self.clock()
+        elapsed, self._last_update = now - self._last_update, now
+        if self._target is None or self.stuck:
+            return
+        target_az, target_el = self._target
+        az_step = self.az_slew * elapsed
+        el_step = self.el_slew * elapsed
+        self._azimuth += max(-az_step, min(az_step, target_az - self._azimuth))
+        self._elevation += max(-el_step, min(el_step, target_el - self._elevation))
+        if self._azimuth == target_az and self._elevation == target_el:
+            self._target = None
+
+
+class _SimulatorHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        simulator = self.server.simulator
+        try:
+            for raw in self.rfile:
+                line = raw.decode("ascii", "replace").strip()
+                if not line:
+                    continue
+                reply = simulator.handle_line(line)
+                if reply is None:
+                    break
+                self.wfile.write(reply.encode("ascii"))
+        except OSError:
+            pass
+
+
+class _SimulatorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SimulatedRotctld:
+    """rotctld-protocol TCP server in front of a SimulatedRotor."""
+    def __init__(self, rotor=None, host="127.0.0.1", port=4533, timeout_delay=5.0):
+        self.rotor = rotor or SimulatedRotor()
+        self.host = host
+        self.port = int(port)
+        self.timeout_delay = timeout_delay  # How long an injected timeout stalls before RPRT -5
+        self._server = None
+        self._thread = None
+        # One serial link: commands are answered strictly one after another
+        self._link_lock = threading.Lock()
+
+    def start(self):
+        self._server = _SimulatorServer((self.host, self.port), _SimulatorHandler)
+        self._server.simulator = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="rotor-simulator", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle_line(self, line):
+        """Returns the reply for one client line, or None to drop the connection."""
+        mode, args = split_command_line(line)
+        if not args:
+            return ""
+        name = long_command_name(args[0])
+        if name in ("q", "Q", "quit"):
+            return None
+
+        with self._link_lock:
+            fault = self.rotor.next_fault()
+            if fault == "disconnect":
+                return None
+            if fault == "timeout":
+                time.sleep(self.timeout_delay)
+                return format_response(mode, name, args[1:], [], code=-5)
+            if self.rotor.latency:
+                time.sleep(self.rotor.latency)
+            if fault == "error":
+                return format_response(mode, name, args[1:], [], code=-6)
+            fields, records, code = self._execute(name, args[1:])
+        return format_response(mode, name, args[1:], fields, records, code)
+
+    def _execute(self, name, args):
+        rotor = self.rotor
+        if name == "get_pos":
+            az, el = rotor.position()
+            return [("Azimuth", f"{az:.6f}"), ("Elevation", f"{el:.6f}")], None, 0
+        if name == "set_pos":
+            try:
+                az, el = float(args[0]), float(args[1])
+            except (IndexError, ValueError):
+                return [], None, -1
+            return [], None, 0 if rotor.set_target(az, el) else -1
+        if name == "stop":
+            rotor.stop()
+            return [], None, 0
+        if name == "park":
+            rotor.set_target(0.0, 0.0)
+            return [], None, 0
+        if name == "get_info":
+            return [("Info", "Rotor simulator")], None, 0
+        if name == "dump_state":
+            records = ["1", "1", f"min_az={rotor.min_az:f}", f"max_az={rotor.max_az:f}",
+                       f"min_el={rotor.min_el:f}", f"max_el={rotor.max_el:f}", "south_zero=0", "done"]
+            return [(None, record) for record in records], records, 0
+        return [], None, -4
+
+
+def main():
+    parser = argparse.ArgumentParser(description="rotctld-compatible rotor simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4533)
+    parser.add_argument("--slew", type=float, default=6.0, help="Slew rate in deg/s (both axes)")
+    parser.add_argument("--min-az", type=float, default=-180.0)
+    parser.add_argument("--max-az", type=float, default=540.0)
+    parser.add_argument("--min-el", type=float, default=0.0)
+    parser.add_argument("--max-el", type=float, default=90.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Serial latency per command in seconds")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Probability of an injected timeout")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an injected RPRT -6")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="Probability of dropping the client")
+    parser.add_argument("--stuck", action="store_true", help="Accept set-points but never move")
+    parser.add_argument("--seed", type=int, help="Seed for repeatable fault injection")
+    args = parser.parse_args()
+
+    rotor = SimulatedRotor(
+        az_slew=args.slew, el_slew=args.slew, min_az=args.min_az, max_az=args.max_az,
+        min_el=args.min_el, max_el=args.max_el, latency=args.latency, timeout_rate=args.timeout_rate,
+        error_rate=args.error_rate, disconnect_rate=args.disconnect_rate, stuck=args.stuck, seed=args.seed
+    )
+    simulator = SimulatedRotctld(rotor, args.host, args.port)
+    print(f"Rotor simulator listening on {args.host}:{simulator.start()}  (Ctrl+C to quit)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""Background I/O engine that owns all rotctld traffic.
+
+The Tk main thread never talks to rotctld directly. It hands requests to a
+RotorWorker and drains the worker's result queue from a short ``after()`` tick,
+so a slow rotor or serial link can no longer freeze the window.
+"""
+
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from command_queue import RotorCommandQueue, command_name, min_command_interval
+from metrics import MetricsRegistry
+from poll_scheduler import AdaptivePollScheduler, link_poll_floor
+from rot2prog import Rot2ProgBackend
+from rotctld_client import RotctldClient, RotctldError, RotctlResponse
+
+RPRT_TIMEOUT = -5  # Hamlib RIG_ETIMEOUT
+
+# Published after every position poll
+PositionSnapshot = namedtuple(
+    "PositionSnapshot",
+    "timestamp connected azimuth elevation raw_azimuth raw_elevation error latency tag commanded",
+)
+
+# Published after every command submitted with RotorWorker.submit()
+CommandResult = namedtuple("CommandResult", "timestamp tag command stdout stderr latency")
+
+_STOP = object()
+
+
+class RotorWorker(threading.Thread):
+    """Dedicated thread that executes rotctld commands and polls the position.
+
+    Requests go in through submit()/request_poll(), results come out of the
+    ``results`` queue as PositionSnapshot and CommandResult tuples.
+    """
+    def __init__(self, results, scheduler=None, command_poll_delay=0.5, metrics=None):
+        super().__init__(name="rotor-worker", daemon=True)
+        self.results = results
+        self.scheduler = scheduler or AdaptivePollScheduler()
+        self.command_poll_delay = command_poll_delay  # Re-poll this soon after a command
+        self.host = "127.0.0.1"
+        self.port = 4533
+        self.hamlib_path = ""
+        self.transport = "tcp"
+        self.com_port = None
+        self.baud_rate = None
+        self.client = RotctldClient(self.host, self.port)
+        self.native = None  # Rot2ProgBackend, only while transport is "native"
+        self._requests = RotorCommandQueue()
+        self._polling = False
+        self._next_poll = None  # Monotonic deadline of the next poll, None if none is due
+        self._listeners = []
+        self._failing_listeners = set()  # Reported once, until they work again
+        self.commanded = None  # Last (az, el) set-point the rotor accepted
+        self.metrics = metrics or MetricsRegistry()
+        self._register_metrics()
+
+    # --- Thread-safe API used from the Tk thread ---
+
+    def configure(self, host, port, hamlib_path, transport="tcp", baud_rate=None, max_link_duty=0.5,
+                  rotor_model=None, command_interval=None, com_port=None):
+        """Updates connection settings; ``command_interval`` (s) overrides the derived rate limit.
+
+        ``transport`` is "tcp" (rotctld client), "subprocess" (rotctl.exe per
+        command) or "native" (Rot2Prog driver on ``com_port``, no rotctld).
+        """
+        self._requests.put_control(("configure", dict(
+            host=host, port=port, hamlib_path=hamlib_path, transport=transport, baud_rate=baud_rate,
+            max_link_duty=max_link_duty, rotor_model=rotor_model, command_interval=command_interval,
+            com_port=com_port
+        )))
+
+    def set_polling(self, enabled):
+        self._requests.put_control(("polling", enabled))
+
+    def request_poll(self, tag="poll"):
+        self._requests.put(("poll", tag), ["p"])
+
+    def submit(self, command_args, tag="command"):
+        self._resolve_dropped(self._requests.put(("command", (tag, command_args)), command_args))
+
+    def call(self, command_args, tag="call"):
+        """Queues a command and returns a Future that resolves to its RotctlResponse.
+
+        Used by callers on other threads (e.g. the proxy) that need the reply
+        itself rather than a CommandResult on the results queue.
+        """
+        future = Future()
+        self._resolve_dropped(self._requests.put(("call", (tag, command_args, future)), command_args))
+        return future
+
+    def call_batch(self, commands, tag="script", on_response=None):
+        """Queues several commands to run back to back; returns a Future for their RotctlResponse list.
+
+        Over rotctld the batch is pipelined on the persistent connection.
+        ``on_response(index, response)`` is called on the worker thread as
+        each reply comes in, and every command also publishes a CommandResult.
+        """
+        future = Future()
+        self._requests.put(("batch", (tag, list(commands), future, on_response)), ["batch"])
+        return future
+
+    def queue_stats(self):
+        return self._requests.stats()
+
+    def add_listener(self, callback):
+        """Registers callback(snapshot), invoked on the worker thread after every poll."""
+        self._listeners.append(callback)
+
+    def disconnect(self):
+        self._requests.put_control(("disconnect", None))
+
+    def stop(self, timeout=2.0):
+        self._requests.put_control(_STOP)
+        if self.is_alive():
+            self.join(timeout)
+
+    def _register_metrics(self):
+        m = self.metrics
+        self._command_latency = m.histogram(
+            "rotor_command_latency_seconds", "Round trip of rotor commands, by command", ("command",))
+        self._commands = m.counter("rotor_commands", "Rotor commands executed, by command and result", ("command", "result"))
+        self._poll_latency = m.histogram("rotor_poll_latency_seconds", "Round trip of position polls")
+        self._polls = m.counter("rotor_polls", "Position polls, by result", ("result",))
+        self._timeouts = m.counter("rotor_timeouts", "Commands that timed out on the rotctld connection or serial link")
+        self._timeouts.inc(0)  # Export a zero rather than nothing until the first timeout
+        # Read from the queue when scraped instead of being mirrored on every put
+        m.gauge("rotor_queue_depth", "Rotor commands waiting in the queue").set_function(
+            lambda: self._requests.stats()["depth"])
+        for key, documentation in (("merged", "Set-points folded into a newer one"),
+                                   ("dropped", "Set-points discarded by a stop"),
+                                   ("prioritized", "Stops moved to the front of the queue")):
+            m.counter(f"rotor_queue_{key}", documentation).set_function(
+                lambda key=key: self._requests.stats()[key])
+
+    def _record_command(self, command_args, latency, ok):
+        name = command_name(command_args) or "?"
+        self._command_latency.labels(name).observe(latency)
+        self._commands.labels(name, "ok" if ok else "error").inc()
+
+    # --- Worker thread ---
+
+    def run(self):
+        while True:
+            timeout = None
+            if self._next_poll is not None:
+                # Scheduled polls obey the same rate limit as queued commands
+                deadline = max(self._next_poll, self._requests.next_slot())
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                entry = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                try:
+                    self._poll("poll")
+                except Exception as e:
+                    self._report_error("poll", e)
+                    self._next_poll = time.monotonic() + self.scheduler.next_interval() if self._polling else None
+                continue
+            if entry.item is _STOP:
+                break
+            try:
+                self._handle(*entry.item, merged=entry.merged)
+            except Exception as e:
+                # One broken request mustn't end all rotor I/O; fail its callers and carry on
+                self._report_error(entry.item[0], e)
+                for kind, payload in [entry.item] + list(entry.merged):
+                    future = payload[2] if kind in ("call", "batch") else None
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+        self.client.close()
+        if self.native is not None:
+            self.native.close()
+        # Don't leave callers blocked on replies that will never come
+        for entry in self._requests.drain():
+            for request in [entry.item] + entry.merged:
+                if request is not _STOP and request[0] in ("call", "batch"):
+                    request[1][2].cancel()
+
+    def _report_error(self, kind, error):
+        self.results.put(CommandResult(time.time(), "worker", [kind], None, f"Worker error in {kind}: {error!r}", 0.0))
+
+    def _resolve_dropped(self, requests):
+        # Set-points cancelled by a stop still owe their callers an answer
+        for kind, payload in requests:
+            if kind == "call":
+                if not payload[2].done():  # The caller may have given up on it already
+                    payload[2].set_result(RotctlResponse("set_pos", [], -9))
+            else:
+                tag, command_args = payload
+                self.results.put(CommandResult(
+                    time.time(), tag, command_args, None, "Set-point dropped: superseded by stop", 0.0
+                ))
+
+    def _handle(self, kind, payload, merged=()):
+        if kind == "configure":
+            self.host, self.port = payload["host"], payload["port"]
+            self.hamlib_path, self.transport = payload["hamlib_path"], payload["transport"]
+            if payload["baud_rate"] is not None:
+                self.scheduler.min_interval = link_poll_floor(payload["baud_rate"], payload["max_link_duty"])
+            if payload["command_interval"] is not None:
+                self._requests.min_interval = payload["command_interval"]
+            elif payload["baud_rate"] is not None:
+                self._requests.min_interval = min_command_interval(payload["baud_rate"], payload["rotor_model"])
+            self.com_port, self.baud_rate = payload["com_port"], payload["baud_rate"]
+            try:
+                self.client.set_address(self.host, self.port)
+            except ValueError:
+                pass  # Invalid port, the next command will report it
+            self._configure_native()
+        elif kind == "polling":
+            if payload and not self._polling:
+                self._next_poll = time.monotonic()
+            elif not payload:
+                self._next_poll = None
+            self._polling = payload
+        elif kind == "poll":
+            self._poll(payload)
+        elif kind == "command":
+            tag, command_args = payload
+            start = time.perf_counter()
+            stdout, stderr = self.run_rotctl_command(command_args)
+            self._requests.mark_sent()
+            latency = time.perf_counter() - start
+            self._record_command(command_args, latency, not stderr)
+            self.results.put(CommandResult(time.time(), tag, command_args, stdout, stderr, latency))
+            if not stderr:
+                self._note_command(command_args)
+            if merged:
+                self._resolve_merged(merged, RotctlResponse("set_pos", [], -6 if stderr else 0))
+            # Follow up with a position check so the display catches up quickly
+            follow_up = time.monotonic() + self.command_poll_delay
+            if self._next_poll is None or follow_up < self._next_poll:
+                self._next_poll = follow_up
+        elif kind == "call":
+            tag, command_args, future = payload
+            if not future.set_running_or_notify_cancel():
+                return
+            start = time.perf_counter()
+            response = self._execute_response(command_args)
+            self._requests.mark_sent()
+            latency = time.perf_counter() - start
+            self._record_command(command_args, latency, response.ok)
+            future.set_result(response)
+            self._resolve_merged(merged, response)
+            stderr = None if response.ok else f"RPRT {response.code}"
+            self.results.put(CommandResult(
+                time.time(), tag, command_args, response.output(), stderr, latency
+            ))
+            if response.ok:
+                self._note_command(command_args)
+        elif kind == "batch":
+            tag, commands, future, on_response = payload
+            if not future.set_running_or_notify_cancel():
+                return
+            future.set_result(self._run_batch(tag, commands, on_response))
+            follow_up = time.monotonic() + self.command_poll_delay
+            if self._next_poll is None or follow_up < self._next_poll:
+                self._next_poll = follow_up
+        elif kind == "disconnect":
+            self.client.close()
+            if self.native is not None:
+                self.native.close()
+
+    def _run_batch(self, tag, commands, on_response):
+        responses = []
+        last = [time.perf_counter()]
+
+        def received(index, response):
+            now = time.perf_counter()
+            latency, last[0] = now - last[0], now
+            responses.append(response)
+            command_args = commands[index]
+            self._record_command(command_args, latency, response.ok)
+            stderr = None if response.ok else f"RPRT {response.code}"
+            self.results.put(CommandResult(time.time(), tag, command_args, response.output(), stderr, latency))
+            if response.ok:
+                self._note_command(command_args)
+            if on_response is not None:
+                on_response(index, response)
+
+        if self.transport == "tcp":
+            try:
+                self.client.execute_many(commands, received)
+            except (OSError, ValueError) as e:
+                if isinstance(e, TimeoutError):
+                    self._timeouts.inc()
+                code = RPRT_TIMEOUT if isinstance(e, TimeoutError) else -1 if isinstance(e, ValueError) else -6
+                # The rest of the batch never got an answer
+                for index in range(len(responses), len(commands)):
+                    received(index, RotctlResponse("", [], code))
+        else:
+            # The native driver and rotctl.exe can't pipeline, run the commands in turn
+            for index, command_args in enumerate(commands):
+                received(index, self._execute_response(command_args))
+        self._requests.mark_sent()
+        return responses
+
+    def _poll(self, tag):
+        start = time.perf_counter()
+        stdout, stderr = self.run_rotctl_command(["p"])
+        self._requests.mark_sent()
+        latency = time.perf_counter() - start
+        self._poll_latency.observe(latency)
+        self._polls.labels("error" if stderr else "ok").inc()
+
+        if stderr:
+            self.scheduler.record_error()
+            snapshot = PositionSnapshot(
+                time.time(), False, None, None, None, None, stderr, latency, tag, self.commanded
+            )
+        else:
+            lines = stdout.split('\n')
+            raw_az = lines[0] if lines else "0.0"
+            raw_el = lines[1] if len(lines) > 1 else "0.0"
+            try:
+                az, el = float(raw_az), float(raw_el)
+            except (ValueError, TypeError):
+                az = el = None  # Ignore if values are not valid floats
+            self.scheduler.record_position(az, el)
+            snapshot = PositionSnapshot(
+                time.time(), True, az, el, raw_az, raw_el, None, latency, tag, self.commanded
+            )
+        self.results.put(snapshot)
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                # Telemetry, streaming and metrics are listeners; a full disk in one must not stop the polls
+                if listener not in self._failing_listeners:
+                    self._failing_listeners.add(listener)
+                    self._report_error(f"listener {getattr(listener, '__qualname__', listener)}", e)
+            else:
+                self._failing_listeners.discard(listener)
+        self._next_poll = time.monotonic() + self.scheduler.next_interval() if self._polling else None
+
+    def _configure_native(self):
+        if self.transport != "native":
+            if self.native is not None:
+                self.native.close()
+                self.native = None
+            return
+        try:
+            if self.native is None:
+                self.native = Rot2ProgBackend(self.com_port, self.baud_rate or 600)
+            else:
+                self.native.set_port(self.com_port, self.baud_rate or 600)
+        except ValueError:
+            pass  # Invalid baud rate, the next command will report it
+
+    def _backend(self):
+        # Both backends share the execute()/close() interface of RotctldClient
+        if self.transport == "native" and self.native is not None:
+            return self.native, f"rotor on {self.com_port}"
+        return self.client, "rotctld"
+
+    def _resolve_merged(self, requests, response):
+        # Older set-points folded into the one just sent share its outcome
+        for kind, payload in requests:
+            if kind == "call":
+                if payload[2].set_running_or_notify_cancel():
+                    payload[2].set_result(response)
+
+    def _note_command(self, command_args):
+        # Let the scheduler know the rotor is about to move (or stop)
+        if isinstance(command_args, str):
+            command_args = command_args.split()
+        if not command_args:
+            return
+        name = str(command_args[0]).lstrip("+;|,")
+        if name in ("P", "\\set_pos") and len(command_args) >= 3:
+            try:
+                self.scheduler.set_target(command_args[1], command_args[2])
+                self.commanded = (float(command_args[1]), float(command_args[2]))
+            except ValueError:
+                pass
+        elif name in ("S", "\\stop"):
+            self.scheduler.clear_target()
+            self.commanded = None  # Nothing to head for any more
+        elif name in ("M", "K", "\\move", "\\park"):
+            self.scheduler.note_motion()
+
+    def run_rotctl_command(self, command_args):
+        """Executes one command synchronously on the worker thread, returning (stdout, stderr)."""
+        # "subprocess" keeps the old behaviour of spawning rotctl.exe per command
+        if self.transport == "subprocess":
+            return self.run_rotctl_subprocess(command_args)
+
+        backend, name = self._backend()
+        try:
+            response = backend.execute(command_args)
+            return response.output(), None
+        except RotctldError as e:
+            if e.code == RPRT_TIMEOUT:
+                self._timeouts.inc()
+            return None, f"rotctl command failed: {e}"
+        except (OSError, ValueError) as e:
+            if isinstance(e, TimeoutError):  # socket.timeout, and the Rot2Prog driver's short reads
+                self._timeouts.inc()
+            return None, f"Exception talking to {name}: {e}"
+
+    def _execute_response(self, command_args):
+        # Like run_rotctl_command, but keeps the RPRT code for protocol-level callers
+        if self.transport == "subprocess":
+            stdout, stderr = self.run_rotctl_subprocess(command_args)
+            if stderr:
+                return RotctlResponse("", [], -6)
+            return RotctlResponse("", [(None, line) for line in stdout.splitlines()], 0)
+
+        backend, _ = self._backend()
+        try:
+            return backend.execute(command_args)
+        except RotctldError as e:
+            if e.code == RPRT_TIMEOUT:
+                self._timeouts.inc()
+            return RotctlResponse("", [], e.code)
+        except ValueError:
+            return RotctlResponse("", [], -1)
+        except socket.timeout:
+            self._timeouts.inc()
+            return RotctlResponse("", [], RPRT_TIMEOUT)
+        except OSError:
+            return RotctlResponse("", [], -6)
+
+    def run_rotctl_subprocess(self, command_args):
+        rotctl_exe = os.path.join(self.hamlib_path, "rotctl.exe")
+
+        if not os.path.exists(rotctl_exe):
+            return None, f"rotctl.exe not found at {rotctl_exe}"
+
+        command = [rotctl_exe, "-m", "2", "-r", f"{self.host}:{self.port}"] + list(command_args)
+
+        try:
+            result = subprocess.run(
+                command, cwd=self.hamlib_path, capture_output=True, text=True, timeout=5,
+                creationflags=subprocess.CREATE_NO_WINDOW
+            )
+            if result.returncode == 0:
+                return result.stdout.strip(), None
+            else:
+                return None, f"rotctl command failed: {result.stderr.strip()}"
+        except subprocess.TimeoutExpired as e:
+            self._timeouts.inc()
+            return None, f"Exception running rotctl: {e}"
+        except Exception as e:
+            return None, f"Exception running rotctl: {e}"
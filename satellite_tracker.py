@@ -0,0 +1,296 @@
+"""Satellite pass prediction and tracking from a local TLE file.
+
+Propagation uses the sgp4 package's SatrecArray, which runs the SGP4 model
+for many satellites and many times in one vectorised C call, and NumPy for
+the TEME -> topocentric look-angle maths. Passes are found on a coarse time
+grid and refined by interpolation; while a pass is tracked the rotor is fed
+from a precomputed ephemeris table instead of propagating every tick.
+
+Both packages are optional: the rest of the application works without them
+and the tracker reports what is missing when it is used.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sgp4.api import Satrec, SatrecArray
+except ImportError:
+    Satrec = SatrecArray = None
+
+# Ground station, latitude/longitude in degrees (east positive), altitude in metres
+Observer = namedtuple("Observer", "latitude longitude altitude")
+
+# One visibility window; times are unix timestamps, angles in degrees
+Pass = namedtuple("Pass", "name index aos los max_elevation max_time aos_azimuth los_azimuth")
+
+WGS84_A = 6378.137  # km
+WGS84_F = 1 / 298.257223563
+UNIX_EPOCH_JD = 2440587.5
+CHUNK_STEPS = 720  # Time steps propagated per batch, bounds memory for big catalogs
+
+
+def _require():
+    if np is None or SatrecArray is None:
+        raise RuntimeError("Satellite tracking requires the numpy and sgp4 packages")
+
+
+def load_tles(path):
+    """Returns [(name, line1, line2)] from a 2- or 3-line TLE file."""
+    with open(path) as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+    tles = []
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+            name = lines[i][2:7].strip()  # No name line, fall back to the catalog number
+            line1, line2 = lines[i], lines[i + 1]
+            i += 2
+        elif i + 2 < len(lines) and lines[i + 1].startswith("1 ") and lines[i + 2].startswith("2 "):
+            name = lines[i][2:] if lines[i].startswith("0 ") else lines[i]  # 3LE names may carry a "0 " prefix
+            name = name.strip()
+            line1, line2 = lines[i + 1], lines[i + 2]
+            i += 3
+        else:
+            i += 1  # Junk line, skip it
+            continue
+        tles.append((name, line1, line2))
+    return tles
+
+
+def _julian_dates(timestamps):
+    # Split into whole and fractional days, as sgp4 wants, to keep sub-ms precision
+    days = np.asarray(timestamps, dtype=float) / 86400.0
+    whole = np.floor(days)
+    return UNIX_EPOCH_JD + whole, days - whole
+
+
+def _gmst(jd, fr):
+    # IAU 1982 Greenwich mean sidereal time in radians (UTC is close enough to UT1 for pointing)
+    t = ((jd - 2451545.0) + fr) / 36525.0
+    seconds = 67310.54841 + (876600.0 * 3600 + 8640184.812866) * t + 0.093104 * t * t - 6.2e-6 * t ** 3
+    return np.radians((seconds % 86400.0) / 240.0)
+
+
+def _observer_ecef(observer):
+    lat, lon = math.radians(observer.latitude), math.radians(observer.longitude)
+    alt = observer.altitude / 1000.0
+    e2 = WGS84_F * (2 - WGS84_F)
+    n = WGS84_A / math.sqrt(1 - e2 * math.sin(lat) ** 2)
+    return np.array([
+        (n + alt) * math.cos(lat) * math.cos(lon),
+        (n + alt) * math.cos(lat) * math.sin(lon),
+        (n * (1 - e2) + alt) * math.sin(lat),
+    ])
+
+
+def look_angles(positions, jd, fr, observer):
+    """Converts TEME positions (..., times, 3) in km to (azimuth, elevation) arrays in degrees."""
+    theta = _gmst(jd, fr)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    x, y, z = positions[..., 0], positions[..., 1], positions[..., 2]
+    ox, oy, oz = _observer_ecef(observer)
+    # TEME -> ECEF is a rotation about z by GMST, then subtract the station
+    dx = cos_t * x + sin_t * y - ox
+    dy = -sin_t * x + cos_t * y - oy
+    dz = z - oz
+
+    lat, lon = math.radians(observer.latitude), math.radians(observer.longitude)
+    sin_lat, cos_lat = math.sin(lat), math.cos(lat)
+    sin_lon, cos_lon = math.sin(lon), math.cos(lon)
+    east = -sin_lon * dx + cos_lon * dy
+    north = -sin_lat * cos_lon * dx - sin_lat * sin_lon * dy + cos_lat * dz
+    up = cos_lat * cos_lon * dx + cos_lat * sin_lon * dy + sin_lat * dz
+    azimuth = np.degrees(np.arctan2(east, north)) % 360.0
+    elevation = np.degrees(np.arctan2(up, np.hypot(east, north)))
+    return azimuth, elevation
+
+
+def _crossing(t0, t1, e0, e1, level):
+    # Linear interpolation of the grid time where elevation crosses ``level``
+    if e1 == e0:
+        return t0
+    return t0 + (level - e0) / (e1 - e0) * (t1 - t0)
+
+
+class SatelliteCatalog:
+    """A set of satellites loaded from TLEs, propagated together."""
+    def __init__(self, tles):
+        _require()
+        self.names = []
+        self.satrecs = []
+        for name, line1, line2 in tles:
+            self.names.append(name)
+            self.satrecs.append(Satrec.twoline2rv(line1, line2))
+        if not self.satrecs:
+            raise ValueError("No satellites found in TLE data")
+        self._array = SatrecArray(self.satrecs)
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_tles(path))
+
+    def __len__(self):
+        return len(self.satrecs)
+
+    def look_angles(self, timestamps, observer):
+        """Returns (azimuth, elevation) arrays of shape (satellites, times)."""
+        jd, fr = _julian_dates(timestamps)
+        error, positions, _ = self._array.sgp4(jd, fr)
+        azimuth, elevation = look_angles(positions, jd, fr, observer)
+        elevation[error != 0] = np.nan  # Decayed or diverged, never "visible"
+        return azimuth, elevation
+
+    def predict_passes(self, observer, start=None, hours=24.0, step=30.0, min_elevation=0.0):
+        """Returns every pass above ``min_elevation`` in the next ``hours``, sorted by AOS.
+
+        A pass already in progress at ``start`` gets ``start`` as its AOS.
+        """
+        start = time.time() if start is None else start
+        times = start + np.arange(0.0, hours * 3600.0 + step, step)
+        azimuth = np.empty((len(self), len(times)))
+        elevation = np.empty((len(self), len(times)))
+        for first in range(0, len(times), CHUNK_STEPS):
+            chunk = slice(first, first + CHUNK_STEPS)
+            azimuth[:, chunk], elevation[:, chunk] = self.look_angles(times[chunk], observer)
+
+        above = elevation >= min_elevation  # NaN compares False
+        edges = np.diff(above.astype(np.int8), axis=1)
+        passes = []
+        for index in np.flatnonzero(above.any(axis=1)):
+            rises = list(np.flatnonzero(edges[index] == 1) + 1)
+            sets = list(np.flatnonzero(edges[index] == -1) + 1)
+            if above[index, 0]:
+                rises.insert(0, 0)
+            if above[index, -1]:
+                sets.append(len(times))
+            for rise, set_ in zip(rises, sets):
+                passes.append(self._refine(index, rise, set_, times, azimuth[index], elevation[index], min_elevation))
+        passes.sort(key=lambda p: p.aos)
+        return passes
+
+    def _refine(self, index, rise, set_, times, azimuth, elevation, min_elevation):
+        # rise/set_ are the first grid index above and the first one below again
+        aos = times[rise] if rise == 0 else _crossing(
+            times[rise - 1], times[rise], elevation[rise - 1], elevation[rise], min_elevation)
+        los = times[-1] if set_ == len(times) else _crossing(
+            times[set_ - 1], times[set_], elevation[set_ - 1], elevation[set_], min_elevation)
+        peak = rise + int(np.argmax(elevation[rise:set_]))
+        max_time, max_elevation = times[peak], elevation[peak]
+        if 0 < peak < len(times) - 1:
+            # Parabola through the peak sample and its neighbours
+            e0, e1, e2 = elevation[peak - 1], elevation[peak], elevation[peak + 1]
+            curvature = e0 - 2 * e1 + e2
+            if curvature < 0:
+                offset = 0.5 * (e0 - e2) / curvature
+                max_time = times[peak] + offset * (times[1] - times[0])
+                max_elevation = e1 - 0.25 * (e0 - e2) * offset
+        return Pass(self.names[index], int(index), float(aos), float(los), float(max_elevation), float(max_time),
+                    float(azimuth[rise]), float(azimuth[set_ - 1]))
+
+    def ephemeris(self, pass_, observer, step=1.0, margin=60.0):
+        """Precomputes an interpolation table covering ``pass_`` (plus ``margin`` s either side)."""
+        times = np.arange(pass_.aos - margin, pass_.los + margin + step, step)
+        jd, fr = _julian_dates(times)
+        error, positions, _ = self.satrecs[pass_.index].sgp4_array(jd, fr)
+        azimuth, elevation = look_angles(positions, jd, fr, observer)
+        valid = error == 0
+        return Ephemeris(times[valid], azimuth[valid], elevation[valid])
+
+
+class Ephemeris:
+    """Az/el table for one pass, interpolated for any time inside it."""
+    def __init__(self, times, azimuth, elevation):
+        if len(times) < 2:
+            raise ValueError("Ephemeris needs at least two valid samples")
+        self.times = times
+        # Unwrapped so interpolation across north doesn't swing through 180
+        self._azimuth = np.degrees(np.unwrap(np.radians(azimuth)))
+        self._elevation = elevation
+
+    @property
+    def start(self):
+        return float(self.times[0])
+
+    @property
+    def end(self):
+        return float(self.times[-1])
+
+    @property
+    def unwrapped_azimuth(self):
+        """Azimuth samples without the 360 -> 0 jumps (may run past 360 or below 0)."""
+        return self._azimuth
+
+    def position_at(self, timestamp, unwrapped=False):
+        azimuth = float(np.interp(timestamp, self.times, self._azimuth))
+        if not unwrapped:
+            azimuth %= 360.0
+        return azimuth, float(np.interp(timestamp, self.times, self._elevation))
+
+
+class PassTracker:
+    """Turns an Ephemeris into rotor set-points.
+
+    Before AOS it parks the rotor at the AOS azimuth; during the pass it
+    yields a new set-point whenever the satellite has moved more than
+    ``threshold`` degrees from the last one sent.
+
+    With a trajectory.TrajectoryPlanner the whole pass is put on one turn of
+    the rotor's overlap range (no unwinding mid-pass) and set-points lead the
+    satellite by the planner's lead time.
+    """
+    def __init__(self, pass_, ephemeris, threshold=0.5, min_elevation=0.0, planner=None):
+        self.pass_ = pass_
+        self.ephemeris = ephemeris
+        self.threshold = threshold
+        self.min_elevation = min_elevation
+        self.planner = planner
+        self.last_setpoint = None
+        self.offset = 0.0
+        if planner is not None:
+            inside = (ephemeris.times >= pass_.aos) & (ephemeris.times <= pass_.los)
+            track = ephemeris.unwrapped_azimuth[inside]
+            if len(track) == 0:
+                track = ephemeris.unwrapped_azimuth[:1]
+            self.offset = planner.pass_offset([float(a) for a in track])
+
+    def target_at(self, timestamp):
+        """Where the satellite is at ``timestamp``; mechanical azimuth when planning."""
+        if self.planner is None:
+            return self.ephemeris.position_at(timestamp)
+        if self.offset is None:
+            # The pass doesn't fit on one turn, so the rotor has to unwind somewhere; nearest turn per set-point
+            azimuth, elevation = self.ephemeris.position_at(timestamp)
+            current = self.planner.current
+            return self.planner.wraps.nearest(azimuth, None if current is None else current[0]), elevation
+        azimuth, elevation = self.ephemeris.position_at(timestamp, unwrapped=True)
+        return azimuth + self.offset, elevation
+
+    def finished(self, now=None):
+        return (time.time() if now is None else now) > self.pass_.los
+
+    def next_setpoint(self, now=None):
+        """Returns the (az, el) to send now, or None if the last one is still good enough."""
+        now = time.time() if now is None else now
+        if now < self.pass_.aos:
+            azimuth, elevation = self.target_at(self.pass_.aos)[0], self.min_elevation
+        elif self.planner is not None:
+            azimuth, elevation = self.planner.lead_setpoint(lambda t: self.target_at(min(t, self.pass_.los)), now)
+        else:
+            azimuth, elevation = self.target_at(min(now, self.pass_.los))
+        elevation = max(elevation, 0.0)
+        if self.last_setpoint is not None:
+            last_az, last_el = self.last_setpoint
+            # Plain difference: 359 -> 1 is a real move across the stop, not a 2 degree nudge
+            if abs(azimuth - last_az) < self.threshold and abs(elevation - last_el) < self.threshold:
+                return None
+        self.last_setpoint = (azimuth, elevation)
+        if self.planner is not None:
+            self.planner.target = self.last_setpoint
+        return azimuth, elevation
@@ -0,0 +1,376 @@
+"""Timed sky scans: step through a grid of az/el points and dwell at each.
+
+For noise-floor surveys and antenna pattern measurements. A scan is a list
+of points, generated from a one-line pattern spec:
+
+    raster 0 350 10 0 60 15      az from/to/step, el from/to/step; rows are
+                                 run back and forth so the rotor never
+                                 flies back across the sky
+    spiral 180 30 20 2           centre az/el, radius, spacing (deg on the
+                                 sky); Archimedean, from the centre out
+    file points.csv              az,el[,dwell_s] per line
+
+Execution runs on its own thread against a monotonic clock. Before the scan
+starts every point gets a planned start time from the slew model, and every
+wait is computed from an absolute deadline rather than slept relative to the
+last one, so timing errors don't add up over a long scan:
+
+- the next point is commanded the moment the previous dwell ends
+- arrival is taken from polled positions (every ``poll_interval``)
+- the dwell starts at the planned time, or on arrival if the rotor is late;
+  a late point eats into the slack of the following moves rather than
+  shifting the rest of the scan
+- positions polled during the dwell are the point's samples
+
+Each point becomes one CSV row in the results file, written as it finishes,
+with its planned/actual timing, arrival error and sample statistics. The
+wall-clock start of each dwell is included so receiver or SDR logs can be
+joined on time.
+"""
+
+import csv
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from command_script import response_position
+from trajectory import SlewModel, pointing_error, setpoint_error
+
+ScanPoint = namedtuple("ScanPoint", "azimuth elevation dwell")
+
+# azimuth is mechanical (after wrap selection); planned is seconds after the scan start
+PlannedPoint = namedtuple("PlannedPoint", "index point azimuth planned")
+
+# Outcome of a run; times in seconds. drift is how far the last dwell ended from its plan
+ScanSummary = namedtuple("ScanSummary", "points completed elapsed planned drift max_late cancelled error")
+
+RESULT_COLUMNS = ("index", "azimuth", "elevation", "dwell_s", "planned_s", "commanded_s", "arrived_s", "start_s",
+                  "end_s", "late_ms", "end_error_ms", "arrival_error_deg", "samples", "mean_az", "mean_el",
+                  "max_error_deg", "start_epoch")
+
+
+def _steps(start, stop, step):
+    if step <= 0:
+        raise ValueError("Scan steps must be positive")
+    count = int(math.floor(abs(stop - start) / step + 1e-9)) + 1
+    direction = 1.0 if stop >= start else -1.0
+    return [start + direction * step * i for i in range(count)]
+
+
+def raster(az_from, az_to, az_step, el_from, el_to, el_step, dwell):
+    """Rows of constant elevation, alternating direction (boustrophedon).
+
+    Azimuth runs clockwise from ``az_from`` to ``az_to``, so 330 to 30 crosses north.
+    """
+    if az_to < az_from:
+        az_to += 360.0
+    points = []
+    for row, elevation in enumerate(_steps(el_from, el_to, el_step)):
+        azimuths = [azimuth % 360.0 for azimuth in _steps(az_from, az_to, az_step)]
+        if row % 2:
+            azimuths.reverse()
+        points.extend(ScanPoint(azimuth, elevation, dwell) for azimuth in azimuths)
+    return points
+
+
+def spiral(center_az, center_el, radius, spacing, dwell):
+    """Archimedean spiral out from the centre, points ``spacing`` degrees apart on the sky.
+
+    Azimuth offsets are stretched by 1/cos(el), so the spacing holds at
+    high elevation too; points that end up below the horizon or past the
+    zenith are left out.
+    """
+    if spacing <= 0 or radius < 0:
+        raise ValueError("Spiral radius and spacing must be positive")
+    points = [ScanPoint(center_az, center_el, dwell)]
+    # r = b * theta with one turn per ``spacing`` of radius; step theta so the arc length is ``spacing``
+    b = spacing / (2 * math.pi)
+    theta = 2 * math.pi
+    while b * theta <= radius + 1e-9:
+        r = b * theta
+        elevation = center_el + r * math.cos(theta)
+        if 0.0 <= elevation <= 90.0:
+            stretch = 1.0 / max(math.cos(math.radians(elevation)), 0.1)
+            points.append(ScanPoint((center_az + r * math.sin(theta) * stretch) % 360.0, elevation, dwell))
+        theta += spacing / math.hypot(r, b)
+    return points
+
+
+def load_points(path, dwell):
+    """Reads ``az,el[,dwell_s]`` lines; blank lines and # comments are skipped."""
+    points = []
+    with open(path, newline="") as f:
+        for number, row in enumerate(csv.reader(f), 1):
+            row = [field.strip() for field in row]
+            if not row or not row[0] or row[0].startswith("#"):
+                continue
+            try:
+                if len(row) not in (2, 3):
+                    raise ValueError
+                points.append(ScanPoint(float(row[0]), float(row[1]),
+                                        float(row[2]) if len(row) == 3 and row[2] else dwell))
+            except ValueError:
+                raise ValueError(f"{path}: line {number} is not 'az,el[,dwell_s]'")
+    return points
+
+
+def parse_pattern(spec, dwell):
+    """Points for a pattern spec (see the module docstring); raises ValueError with a usage hint."""
+    args = spec.split(None, 1)
+    kind = args[0].lower() if args else ""
+    if kind == "file" and len(args) == 2:
+        return load_points(args[1].strip(), dwell)
+    usage = {"raster": (6, "raster AZ_FROM AZ_TO AZ_STEP EL_FROM EL_TO EL_STEP"),
+             "spiral": (4, "spiral CENTER_AZ CENTER_EL RADIUS SPACING")}
+    if kind not in usage:
+        raise ValueError("Scan pattern must be 'raster ...', 'spiral ...' or 'file PATH'")
+    count, hint = usage[kind]
+    try:
+        values = [float(v) for v in spec.split()[1:]]
+    except ValueError:
+        values = []
+    if len(values) != count:
+        raise ValueError(f"Usage: {hint}")
+    return (raster if kind == "raster" else spiral)(*values, dwell)
+
+
+def plan(points, start, slew, wraps=None, settle=1.0):
+    """Planned start of each dwell, chaining moves at the slew model's rates plus ``settle`` per move."""
+    planned = []
+    t = 0.0
+    current = start
+    for index, point in enumerate(points):
+        azimuth = point.azimuth if wraps is None else wraps.nearest(point.azimuth, None if current is None else current[0])
+        target = (azimuth, point.elevation)
+        if current is not None:
+            t += slew.travel_time(current, target)
+        t += settle
+        planned.append(PlannedPoint(index, point, azimuth, t))
+        t += point.dwell
+        current = target
+    return planned
+
+
+def results_file(directory):
+    """A new timestamped results path in ``directory`` (created if needed)."""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, time.strftime("scan_%Y%m%d_%H%M%S.csv"))
+
+
+class ScanResults:
+    """CSV results file, one row per point, flushed as each point finishes."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(RESULT_COLUMNS)
+        self._file.flush()
+
+    def write(self, row):
+        values = (row.get(column, "") for column in RESULT_COLUMNS)
+        self._writer.writerow([f"{v:.3f}" if isinstance(v, float) else v for v in values])
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ScanRunner:
+    """Runs a scan through a RotorWorker on a background thread.
+
+    Set-points go out as ``call(["P", az, el])`` and positions are polled
+    with ``call(["p"])``, both tagged ``tag``/``tag_poll`` on the worker's
+    results queue. ``planner`` (a TrajectoryPlanner) provides the wrap table
+    and slew rates; without one the azimuths are sent as given.
+    """
+    def __init__(self, worker, points, results_path=None, planner=None, tag="scan", arrival_tolerance=1.0,
+                 arrival_timeout=180.0, poll_interval=0.25, settle=1.0, stop_on_cancel=True, clock=time.monotonic):
+        self.worker = worker
+        self.points = list(points)
+        self.results_path = results_path
+        self.planner = planner
+        self.tag = tag
+        self.arrival_tolerance = arrival_tolerance
+        self.arrival_timeout = arrival_timeout
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.stop_on_cancel = stop_on_cancel
+        self.clock = clock
+        self.plan = []
+        self.completed = 0       # Points finished so far, for progress display
+        self.current = None      # PlannedPoint being worked on
+        self.state = "idle"      # "moving" or "dwell" while running
+        self.max_late = 0.0
+        self._cancel = threading.Event()
+        self._future = None
+
+    @classmethod
+    def from_config(cls, worker, points, config, planner=None):
+        """Runner with the scan_* settings, writing to a new file in ``scan_results_dir``."""
+        directory = config.get("scan_results_dir", "scans")
+        return cls(worker, points, results_file(directory) if directory is not None else None, planner,
+                   arrival_tolerance=float(config.get("scan_arrival_tolerance", 1.0)),
+                   arrival_timeout=float(config.get("scan_arrival_timeout_s", 180)),
+                   poll_interval=float(config.get("scan_poll_interval_ms", 250)) / 1000,
+                   settle=float(config.get("scan_settle_s", 1.0)))
+
+    @property
+    def total(self):
+        return len(self.points)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self, position=None):
+        """Plans from ``position`` (the rotor's current az/el, if known), starts and returns a Future for the ScanSummary."""
+        slew = self.planner.slew if self.planner is not None else SlewModel()
+        wraps = self.planner.wraps if self.planner is not None else None
+        self.plan = plan(self.points, position, slew, wraps, self.settle)
+        self._future = Future()
+        threading.Thread(target=self._run, name="sky-scan", daemon=True).start()
+        return self._future
+
+    def cancel(self):
+        """Stops at the next poll or deadline; with ``stop_on_cancel`` the rotor is stopped too."""
+        if self._cancel.is_set():
+            return
+        self._cancel.set()
+        if self.stop_on_cancel:
+            self.worker.submit(["S"], tag=self.tag)
+
+    def _run(self):
+        origin = self.clock()
+        wall_origin = time.time()
+        results = None
+        error = None
+        drift = 0.0
+        try:
+            if self.results_path:
+                results = ScanResults(self.results_path)
+            for planned in self.plan:
+                if self._cancel.is_set():
+                    break
+                self.current = planned
+                row = self._point(planned, origin, wall_origin)
+                if results is not None:
+                    results.write(row)
+                if row.get("error"):
+                    if not self._cancel.is_set():
+                        error = row["error"]
+                    break
+                drift = row["end_s"] - (planned.planned + planned.point.dwell)
+                self.completed += 1
+        except Exception as e:
+            error = str(e)
+        finally:
+            if results is not None:
+                results.close()
+            self.state = "idle"
+        planned_total = self.plan[-1].planned + self.plan[-1].point.dwell if self.plan else 0.0
+        self._future.set_result(ScanSummary(len(self.plan), self.completed, self.clock() - origin, planned_total,
+                                            drift, self.max_late, self._cancel.is_set(), error))
+
+    def _point(self, planned, origin, wall_origin):
+        point = planned.point
+        target = (planned.azimuth, point.elevation)
+        row = {"index": planned.index, "azimuth": planned.azimuth, "elevation": point.elevation,
+               "dwell_s": point.dwell, "planned_s": planned.planned}
+        self.state = "moving"
+        commanded = self.clock()
+        row["commanded_s"] = commanded - origin
+        if self.planner is not None:
+            self.planner.target = target
+        response = self._call(["P", f"{target[0]:.2f}", f"{target[1]:.2f}"], self.tag, self.arrival_timeout)
+        if response is None or not response.ok:
+            row["error"] = f"point {planned.index}: set-point {target} was not accepted"
+            return row
+
+        # Arrival, polled on a fixed grid from the command time
+        deadline = commanded + self.arrival_timeout
+        next_poll = commanded
+        while True:
+            if not self._sleep_until(next_poll):
+                row["error"] = "cancelled"
+                return row
+            position = self._poll(deadline)
+            if position is not None and (setpoint_error(position[0], target[0]) <= self.arrival_tolerance
+                                         and abs(position[1] - target[1]) <= self.arrival_tolerance):
+                break
+            if self.clock() > deadline:
+                row["error"] = f"point {planned.index}: rotor did not reach {target} within {self.arrival_timeout:.0f} s"
+                return row
+            next_poll = self._next_slot(next_poll)
+        row["arrived_s"] = self.clock() - origin
+        row["arrival_error_deg"] = pointing_error(position, target)
+
+        # Early: hold until the planned start, so the scan keeps to its timetable
+        if not self._sleep_until(origin + planned.planned):
+            row["error"] = "cancelled"
+            return row
+        self.state = "dwell"
+        start = self.clock()
+        end = start + point.dwell
+        late = max(0.0, start - origin - planned.planned)
+        self.max_late = max(self.max_late, late)
+        row["start_s"] = start - origin
+        row["late_ms"] = late * 1000
+        row["start_epoch"] = wall_origin + start - origin
+
+        samples = []
+        next_poll = start
+        while next_poll < end:
+            if not self._sleep_until(next_poll):
+                row["error"] = "cancelled"
+                return row
+            # A reply that isn't back by the end of the dwell is not waited for
+            position = self._poll(end)
+            if position is not None and self.clock() <= end:
+                samples.append(position)
+            next_poll = self._next_slot(next_poll)
+        if not self._sleep_until(end):
+            row["error"] = "cancelled"
+            return row
+        finished = self.clock()
+        row["end_s"] = finished - origin
+        row["end_error_ms"] = (finished - end) * 1000
+        row["samples"] = len(samples)
+        if samples:
+            # Averaged as signed offsets from the target, so a dwell on north (359.9 and 0.1) means 0, not 180
+            mean_az = target[0] + sum((s[0] - target[0] + 180.0) % 360.0 - 180.0 for s in samples) / len(samples)
+            row["mean_az"] = mean_az % 360.0 if 0.0 <= target[0] < 360.0 else mean_az
+            row["mean_el"] = sum(s[1] for s in samples) / len(samples)
+            row["max_error_deg"] = max(pointing_error(s, target) for s in samples)
+        return row
+
+    def _next_slot(self, slot):
+        # Next poll on the grid; slots a slow reply overran are skipped rather than fired back to back
+        slot += self.poll_interval
+        behind = self.clock() - slot
+        if behind > 0:
+            slot += math.ceil(behind / self.poll_interval) * self.poll_interval
+        return slot
+
+    def _sleep_until(self, deadline):
+        # Recomputed from the absolute deadline on every wake-up, so early returns and late wake-ups don't add up
+        while True:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                return not self._cancel.is_set()
+            if self._cancel.wait(remaining):
+                return False
+
+    def _call(self, command_args, tag, timeout):
+        try:
+            return self.worker.call(command_args, tag=tag).result(timeout=max(0.0, timeout))
+        except (CancelledError, FutureTimeout):
+            return None
+
+    def _poll(self, deadline):
+        response = self._call(["p"], f"{self.tag}_poll", deadline - self.clock())
+        return None if response is None else response_position(response)
@@ -0,0 +1,364 @@
+"""Bearings to terrestrial targets: Maidenhead locators, callsigns and fixed points.
+
+Whatever can be precomputed is, in NumPy batches, and kept in an on-disk
+index (``.npz``) next to the config, so a lookup from the Set Position entry
+is a dictionary or array access with no trigonometry:
+
+- every 4-character locator square (AA00-RR99, 32400 of them)
+- every prefix and full-callsign entry of a ``cty.dat`` country file (the
+  AD1C file most logging programs use)
+- named fixed targets from a CSV file: ``name,lat,lon[,alt_m]`` or
+  ``name,locator`` per line (beacons, repeaters, a contest station...)
+
+The index remembers the station position and the size/mtime of its source
+files and is rebuilt when any of them changes. 2/6/8-character locators and
+plain "lat, lon" input are computed on the spot; for one point that is
+cheaper in plain Python than a round trip through NumPy. Two letters that
+are also a country prefix ("DL", "OH") are taken as the prefix.
+
+NumPy is optional for the rest of the application; lookups report what is
+missing when they are used, like the satellite tracker.
+"""
+
+import csv
+import math
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Station/target position, latitude/longitude in degrees (east positive), altitude in metres
+Station = namedtuple("Station", "latitude longitude altitude")
+
+# elevation is None for targets without an altitude (locators, prefixes): keep whatever was entered
+Target = namedtuple("Target", "name kind latitude longitude azimuth elevation distance_km")
+
+LOCATOR_RE = re.compile(r"^[A-R]{2}(?:[0-9]{2}(?:[A-X]{2}(?:[0-9]{2})?)?)?$")
+LATLON_RE = re.compile(r"^\s*([-+]?\d+(?:\.\d*)?)\s*[,;\s]\s*([-+]?\d+(?:\.\d*)?)\s*$")
+# Callsign suffixes that say how, not where, the station operates
+OPERATING_SUFFIXES = ("P", "M", "MM", "AM", "QRP", "A", "R", "B")
+
+INDEX_VERSION = 1
+
+
+def _require():
+    if np is None:
+        raise RuntimeError("Target lookup needs NumPy (pip install numpy)")
+
+
+def great_circle(station, latitudes, longitudes):
+    """Initial bearing (deg, 0-360) and distance (km) from ``station`` to arrays of points."""
+    lat0, lon0 = math.radians(station.latitude), math.radians(station.longitude)
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64)) - lon0
+    cos_lat = np.cos(lat)
+    y = np.sin(dlon) * cos_lat
+    x = math.cos(lat0) * np.sin(lat) - math.sin(lat0) * cos_lat * np.cos(dlon)
+    azimuth = np.degrees(np.arctan2(y, x)) % 360.0
+    # Haversine: well conditioned for the short distances VHF people care about
+    a = np.sin((lat - lat0) / 2) ** 2 + math.cos(lat0) * cos_lat * np.sin(dlon / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return azimuth, distance
+
+
+def elevation_angle(station, distance_km, altitudes_m):
+    """Elevation (deg) of targets at ``altitudes_m`` and ``distance_km``, on a spherical earth."""
+    r0 = EARTH_RADIUS_KM + station.altitude / 1000.0
+    r1 = EARTH_RADIUS_KM + np.asarray(altitudes_m, dtype=np.float64) / 1000.0
+    angle = np.asarray(distance_km, dtype=np.float64) / EARTH_RADIUS_KM
+    return np.degrees(np.arctan2(r1 * np.cos(angle) - r0, r1 * np.sin(angle)))
+
+
+# (first char, base, lon size, lat size, digits) of each locator pair
+_PAIRS = ((0, ord("A"), 20.0, 10.0, 18), (2, ord("0"), 2.0, 1.0, 10),
+          (4, ord("A"), 2.0 / 24, 1.0 / 24, 24), (6, ord("0"), 2.0 / 240, 1.0 / 240, 10))
+
+
+def locator_to_latlon(locator):
+    """Centre of one locator already checked against LOCATOR_RE; the per-query twin of locators_to_latlon()."""
+    lat = lon = 0.0
+    for index, base, lon_size, lat_size, _ in _PAIRS[:len(locator) // 2]:
+        lon += (ord(locator[index]) - base) * lon_size
+        lat += (ord(locator[index + 1]) - base) * lat_size
+    return lat - 90.0 + lat_size / 2, lon - 180.0 + lon_size / 2
+
+
+def locators_to_latlon(locators):
+    """Centres of 2/4/6/8-character Maidenhead locators, as (lat, lon) arrays; NaN for invalid ones."""
+    codes = np.array([loc.strip().upper().ljust(8)[:8] for loc in locators], dtype="S8")
+    chars = codes.view(np.uint8).reshape(-1, 8).astype(np.float64)
+    lengths = np.array([len(loc.strip()) for loc in locators])
+    lon = np.full(len(codes), -180.0)
+    lat = np.full(len(codes), -90.0)
+    valid = np.isin(lengths, (2, 4, 6, 8))
+    for index, base, lon_size, lat_size, limit in _PAIRS:
+        present = lengths > index
+        lon_digit = chars[:, index] - base
+        lat_digit = chars[:, index + 1] - base
+        valid &= ~present | ((lon_digit >= 0) & (lon_digit < limit) & (lat_digit >= 0) & (lat_digit < limit))
+        lon += np.where(present, lon_digit * lon_size, 0.0)
+        lat += np.where(present, lat_digit * lat_size, 0.0)
+    # Centre of the smallest square given
+    for index, _, lon_size, lat_size, _ in _PAIRS:
+        lon += np.where(lengths == index + 2, lon_size / 2, 0.0)
+        lat += np.where(lengths == index + 2, lat_size / 2, 0.0)
+    lat[~valid] = np.nan
+    lon[~valid] = np.nan
+    return lat, lon
+
+
+def square_index(locator):
+    """Row of a 4-character locator in the precomputed square table."""
+    locator = locator.upper()
+    return (((ord(locator[0]) - 65) * 18 + ord(locator[1]) - 65) * 10 + ord(locator[2]) - 48) * 10 + ord(locator[3]) - 48
+
+
+def all_squares():
+    """Every 4-character locator, in square_index() order."""
+    letters = "ABCDEFGHIJKLMNOPQR"
+    return [a + b + c + d for a in letters for b in letters for c in "0123456789" for d in "0123456789"]
+
+
+_OVERRIDE_LATLON = re.compile(r"<([-+\d.]+)/([-+\d.]+)>")
+
+
+def parse_cty(path):
+    """Reads a cty.dat country file; returns [(prefix, exact, entity, lat, lon), ...].
+
+    ``exact`` marks full-callsign entries (``=`` in the file). Longitudes in
+    cty.dat are west positive and are flipped here.
+    """
+    entries = []
+    entity = None
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if not line[0].isspace():
+                fields = [field.strip() for field in line.split(":")]
+                if len(fields) < 8:
+                    raise ValueError(f"{path}: bad entity line '{line.strip()}'")
+                entity = (fields[0], float(fields[4]), -float(fields[5]))
+                entries.append((fields[7].lstrip("*"), False, entity[0], entity[1], entity[2]))
+                continue
+            if entity is None:
+                raise ValueError(f"{path}: prefixes before the first entity")
+            for alias in line.strip().rstrip(";").split(","):
+                alias = alias.strip()
+                if not alias:
+                    continue
+                exact = alias.startswith("=")
+                prefix = re.split(r"[(\[<{~]", alias.lstrip("="), maxsplit=1)[0]
+                lat, lon = entity[1], entity[2]
+                override = _OVERRIDE_LATLON.search(alias)
+                if override:
+                    lat, lon = float(override.group(1)), -float(override.group(2))
+                entries.append((prefix, exact, entity[0], lat, lon))
+    return entries
+
+
+def load_targets(path):
+    """Reads named fixed targets: ``name,lat,lon[,alt_m]`` or ``name,locator``; # starts a comment."""
+    names, lats, lons, alts = [], [], [], []
+    with open(path, newline="") as f:
+        for number, row in enumerate(csv.reader(f), 1):
+            row = [field.strip() for field in row]
+            if not row or not row[0] or row[0].startswith("#"):
+                continue
+            try:
+                if len(row) == 2:
+                    if not LOCATOR_RE.match(row[1].upper()):
+                        raise ValueError
+                    lat, lon = locator_to_latlon(row[1].upper())
+                    alt = math.nan
+                elif len(row) in (3, 4):
+                    lat, lon = float(row[1]), float(row[2])
+                    alt = float(row[3]) if len(row) == 4 and row[3] else math.nan
+                else:
+                    raise ValueError
+            except ValueError:
+                raise ValueError(f"{path}: line {number} is not 'name,lat,lon[,alt_m]' or 'name,locator'")
+            names.append(row[0].upper())
+            lats.append(lat)
+            lons.append(lon)
+            alts.append(alt)
+    return names, lats, lons, alts
+
+
+def _signature(path):
+    if not path:
+        return ""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{os.path.abspath(path)}|missing"
+    return f"{os.path.abspath(path)}|{stat.st_size}|{int(stat.st_mtime)}"
+
+
+class TargetIndex:
+    """Precomputed bearings from one station; build() or load(), then lookup()."""
+    def __init__(self, station, sources, arrays):
+        self.station = station
+        self.sources = sources   # Signature string of the input files
+        self.arrays = arrays
+        self.squares = arrays["square_azimuth"], arrays["square_distance"]
+        self.prefixes = {p: i for i, p in enumerate(arrays["prefix"].tolist())}
+        self.exact = {p: i for i, p in enumerate(arrays["exact"].tolist())}
+        self.names = {n: i for i, n in enumerate(arrays["name"].tolist())}
+
+    @classmethod
+    def build(cls, station, cty_file=None, targets_file=None):
+        _require()
+        arrays = {}
+        lat, lon = locators_to_latlon(all_squares())
+        azimuth, distance = great_circle(station, lat, lon)
+        arrays["square_azimuth"] = azimuth.astype(np.float32)
+        arrays["square_distance"] = distance.astype(np.float32)
+
+        prefixes, exact = {}, {}
+        if cty_file:
+            for prefix, is_exact, entity, lat, lon in parse_cty(cty_file):
+                (exact if is_exact else prefixes).setdefault(prefix, (entity, lat, lon))
+        for kind, table in (("prefix", prefixes), ("exact", exact)):
+            keys = sorted(table)
+            values = [table[k] for k in keys]
+            azimuth, distance = great_circle(station, [v[1] for v in values], [v[2] for v in values])
+            arrays[kind] = np.array(keys, dtype=str)
+            arrays[f"{kind}_entity"] = np.array([v[0] for v in values], dtype=str)
+            arrays[f"{kind}_latlon"] = np.array([v[1:] for v in values], dtype=np.float64).reshape(-1, 2)
+            arrays[f"{kind}_azimuth"] = azimuth.astype(np.float32)
+            arrays[f"{kind}_distance"] = distance.astype(np.float32)
+
+        names, lats, lons, alts = load_targets(targets_file) if targets_file else ([], [], [], [])
+        azimuth, distance = great_circle(station, lats, lons)
+        arrays["name"] = np.array(names, dtype=str)
+        arrays["name_latlon"] = np.array(list(zip(lats, lons)), dtype=np.float64).reshape(-1, 2)
+        arrays["name_azimuth"] = azimuth
+        arrays["name_distance"] = distance
+        arrays["name_elevation"] = elevation_angle(station, distance, np.nan_to_num(alts))
+        arrays["name_elevation"][np.isnan(np.asarray(alts, dtype=np.float64))] = np.nan
+        return cls(station, _signature(cty_file) + ";" + _signature(targets_file), arrays)
+
+    def save(self, path):
+        meta = np.array([INDEX_VERSION, self.station.latitude, self.station.longitude, self.station.altitude])
+        with open(path, "wb") as f:
+            np.savez(f, meta=meta, sources=np.array(self.sources), **self.arrays)
+
+    @classmethod
+    def load(cls, path, station, cty_file=None, targets_file=None):
+        """The saved index, or None if it is missing, unreadable or was built for other inputs."""
+        _require()
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = data["meta"]
+                sources = str(data["sources"])
+                if (int(meta[0]) != INDEX_VERSION or tuple(meta[1:]) != tuple(map(float, station))
+                        or sources != _signature(cty_file) + ";" + _signature(targets_file)):
+                    return None
+                arrays = {key: data[key] for key in data.files if key not in ("meta", "sources")}
+        except (OSError, KeyError, ValueError):
+            return None
+        return cls(station, sources, arrays)
+
+    @classmethod
+    def load_or_build(cls, path, station, cty_file=None, targets_file=None):
+        index = cls.load(path, station, cty_file, targets_file) if path else None
+        if index is None:
+            index = cls.build(station, cty_file, targets_file)
+            if path:
+                try:
+                    index.save(path)
+                except OSError:
+                    pass  # Read-only install: rebuilt next time, it only takes a moment
+        return index
+
+    def lookup(self, text):
+        """Resolves a target name, locator, callsign or "lat, lon"; None if it is none of those."""
+        text = text.strip()
+        key = text.upper()
+        if not key:
+            return None
+        row = self.names.get(key)
+        if row is not None:
+            return self._row("name", row, key, "target")
+        if len(key) == 2 and (key in self.prefixes or key in self.exact):
+            # "DL", "EA", "OK"... are Maidenhead fields too, but nobody aims at a whole field
+            return self.callsign(key)
+        if LOCATOR_RE.match(key):
+            if len(key) == 4:
+                row = square_index(key)
+                field, square = divmod(row, 100)
+                lat = field % 18 * 10 + square % 10 - 89.5
+                lon = field // 18 * 20 + square // 10 * 2 - 179.0
+                return Target(key, "locator", lat, lon, float(self.squares[0][row]), None, float(self.squares[1][row]))
+            return self.locate(key, "locator", *locator_to_latlon(key))
+        match = LATLON_RE.match(text)
+        if match:
+            lat, lon = float(match.group(1)), float(match.group(2))
+            if -90 <= lat <= 90 and -180 <= lon <= 360:
+                return self.locate(f"{lat:g}, {lon:g}", "position", lat, lon)
+            return None
+        return self.callsign(key)
+
+    def callsign(self, call):
+        """Country-file match for a callsign: exact entries first, then the longest prefix."""
+        parts = [p for p in call.split("/") if p and p not in OPERATING_SUFFIXES and not p.isdigit()]
+        if not parts:
+            return None
+        for key in (call, "/".join(parts)):
+            row = self.exact.get(key)
+            if row is not None:
+                return self._row("exact", row, call, "callsign")
+        # In DL/G4ABC the shorter part says where the station is
+        base = min(parts, key=len) if len(parts) > 1 else parts[0]
+        for length in range(len(base), 0, -1):
+            row = self.prefixes.get(base[:length])
+            if row is not None:
+                return self._row("prefix", row, call, "callsign")
+        return None
+
+    def locate(self, name, kind, latitude, longitude, altitude=None):
+        # Plain math for one point: a NumPy call costs more than the trigonometry
+        lat0, lat1 = math.radians(self.station.latitude), math.radians(latitude)
+        dlon = math.radians(longitude - self.station.longitude)
+        azimuth = math.degrees(math.atan2(math.sin(dlon) * math.cos(lat1), math.cos(lat0) * math.sin(lat1)
+                                          - math.sin(lat0) * math.cos(lat1) * math.cos(dlon))) % 360.0
+        a = math.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat1) * math.sin(dlon / 2) ** 2
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+        elevation = None
+        if altitude is not None:
+            elevation = float(elevation_angle(self.station, [distance], [altitude])[0])
+        return Target(name, kind, latitude, longitude, azimuth, elevation, distance)
+
+    def _row(self, table, row, name, kind):
+        lat, lon = self.arrays[f"{table}_latlon"][row]
+        elevation = None
+        if table == "name":
+            elevation = float(self.arrays["name_elevation"][row])
+            elevation = None if math.isnan(elevation) else elevation
+        else:
+            name = f"{name} ({self.arrays[f'{table}_entity'][row]})"
+        return Target(name, kind, float(lat), float(lon), float(self.arrays[f"{table}_azimuth"][row]), elevation,
+                      float(self.arrays[f"{table}_distance"][row]))
+
+
+def load_async(path, station, cty_file=None, targets_file=None):
+    """Runs TargetIndex.load_or_build() on a background thread and returns a Future for it."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(TargetIndex.load_or_build(path, station, cty_file, targets_file))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="target-index", daemon=True).start()
+    return future
@@ -0,0 +1,286 @@
+"""Compact position telemetry: in-memory ring, fixed-record file, replay and export.
+
+Every poll becomes one fixed-size record (timestamp, az, el, commanded az/el,
+latency). Records live in a flat array-backed ring in memory and are appended
+to a binary file that is read back through mmap, so hours of high-rate
+tracking cost a few MB rather than millions of Python objects.
+
+File layout: a 16 byte header (magic, version, record size) followed by
+little-endian records of RECORD.format. Missing values are stored as NaN.
+
+Like the log file, the telemetry file rolls over at ``max_bytes``: it
+becomes ``<file>.1``, older ones move up to ``<file>.<backup_count>`` and
+the oldest is deleted, so a station left recording for months keeps a
+bounded amount of history on disk.
+"""
+
+import array
+import bisect
+import csv
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+MAGIC = b"RTLM"
+VERSION = 1
+HEADER = struct.Struct("<4sHH8x")
+# timestamp (unix s), az, el, commanded az, commanded el, latency (s)
+RECORD = struct.Struct("<dfffff")
+FIELDS = ("timestamp", "azimuth", "elevation", "commanded_azimuth", "commanded_elevation", "latency")
+NAN = float("nan")
+
+
+def _value(value):
+    return NAN if value is None else float(value)
+
+
+class TelemetryRing:
+    """Fixed-capacity ring of samples stored in one flat array of doubles."""
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._width = len(FIELDS)
+        self._data = array.array("d", bytes(8 * self._width * capacity))
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, sample):
+        with self._lock:
+            offset = self._next * self._width
+            self._data[offset:offset + self._width] = array.array("d", sample)
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, n=None):
+        """Returns up to ``n`` most recent samples as tuples, oldest first."""
+        with self._lock:
+            n = self._count if n is None else min(n, self._count)
+            start = (self._next - n) % self.capacity
+            samples = []
+            for i in range(n):
+                offset = ((start + i) % self.capacity) * self._width
+                samples.append(tuple(self._data[offset:offset + self._width]))
+            return samples
+
+    def since(self, timestamp):
+        """Returns the samples newer than ``timestamp``, oldest first."""
+        return [sample for sample in self.latest() if sample[0] > timestamp]
+
+
+class TelemetryRecorder:
+    """Appends samples to a TelemetryRing and a fixed-record telemetry file.
+
+    Meant to be registered as a RotorWorker listener; writes are buffered
+    and flushed every ``flush_every`` records. With ``max_bytes`` set the
+    file is rotated like a RotatingFileHandler (0 never rotates).
+    """
+    def __init__(self, path, capacity=100000, flush_every=50, max_bytes=0, backup_count=5):
+        self.path = path
+        self.ring = TelemetryRing(capacity)
+        self.flush_every = flush_every
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.records_written = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        if path:
+            self._file = self._open(path)
+            self._size = os.path.getsize(path)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.get("telemetry_file", "rotor_telemetry.bin") or None,
+                   int(config.get("telemetry_ring_size", 100000)),
+                   max_bytes=int(config.get("telemetry_max_bytes", 67108864)),
+                   backup_count=int(config.get("telemetry_backup_count", 5)))
+
+    @staticmethod
+    def _open(path):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        exists = size > 0
+        if exists:
+            with open(path, "rb") as f:
+                _check_header(f.read(HEADER.size), path)
+            # A crash mid-write leaves a partial record; drop it or everything after it is misaligned
+            whole = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            if whole != size:
+                os.truncate(path, whole)
+        f = open(path, "ab")
+        if not exists:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        return f
+
+    def record(self, timestamp, azimuth, elevation, commanded_azimuth=None, commanded_elevation=None, latency=None):
+        sample = (float(timestamp), _value(azimuth), _value(elevation),
+                  _value(commanded_azimuth), _value(commanded_elevation), _value(latency))
+        self.ring.append(sample)
+        if self._file is None:
+            return
+        with self._lock:
+            if self.max_bytes and self._size + RECORD.size > self.max_bytes:
+                self._rollover()
+            self._file.write(RECORD.pack(*sample))
+            self._size += RECORD.size
+            self.records_written += 1
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def record_snapshot(self, snapshot):
+        """RotorWorker listener: records every successful poll."""
+        if not snapshot.connected or snapshot.azimuth is None:
+            return
+        commanded = snapshot.commanded or (None, None)
+        self.record(snapshot.timestamp, snapshot.azimuth, snapshot.elevation,
+                    commanded[0], commanded[1], snapshot.latency)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rollover(self):
+        self._file.close()
+        try:
+            if self.backup_count > 0:
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f"{self.path}.{index}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{index + 1}")
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        except OSError:
+            pass  # Held open elsewhere (a replay, on Windows); keep appending and try again after another max_bytes
+        self._pending = 0
+        self._file = self._open(self.path)
+        self._size = HEADER.size
+
+
+def _check_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short to be a telemetry file")
+    magic, version, record_size = HEADER.unpack(data[:HEADER.size])
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} telemetry file")
+
+
+class TelemetryReader:
+    """Random access to a telemetry file through a read-only memory map."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._count = 0
+        self.refresh()
+
+    def refresh(self):
+        """Re-maps the file to pick up records appended since opening."""
+        if self._map is not None:
+            self._map.close()
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        _check_header(self._map[:HEADER.size], self.path)
+        self._count = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("telemetry record index out of range")
+        return RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+
+    def __iter__(self):
+        for fields in RECORD.iter_unpack(self._map[HEADER.size:HEADER.size + self._count * RECORD.size]):
+            yield fields
+
+    def timestamp(self, index):
+        return struct.unpack_from("<d", self._map, HEADER.size + index * RECORD.size)[0]
+
+    def index_at(self, timestamp):
+        """Index of the last record at or before ``timestamp`` (binary search over the map)."""
+        return bisect.bisect_right(_TimestampView(self), timestamp) - 1
+
+    def to_numpy(self):
+        """Returns the records as a NumPy structured array (copy-free view of the map)."""
+        # Imported here: NumPy costs more to load than the rest of the application
+        try:
+            import numpy as np
+        except ImportError:
+            raise RuntimeError("NumPy is required for to_numpy()")
+        dtype = np.dtype([(FIELDS[0], "<f8")] + [(name, "<f4") for name in FIELDS[1:]])
+        return np.frombuffer(self._map, dtype=dtype, count=self._count, offset=HEADER.size)
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for record in self:
+                writer.writerow(["" if isinstance(v, float) and math.isnan(v) else v for v in record])
+
+    def export_npy(self, path):
+        array = self.to_numpy()
+        import numpy as np
+        np.save(path, array)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class _TimestampView:
+    # Sequence adapter so bisect can search timestamps without unpacking every record
+    def __init__(self, reader):
+        self._reader = reader
+
+    def __len__(self):
+        return len(self._reader)
+
+    def __getitem__(self, index):
+        return self._reader.timestamp(index)
+
+
+class TelemetryReplay:
+    """Maps wall-clock time onto a recording played back at ``speed``x."""
+    def __init__(self, reader, speed=1.0, clock=time.monotonic):
+        if len(reader) == 0:
+            raise ValueError("Telemetry file has no records to replay")
+        self.reader = reader
+        self.speed = speed
+        self.clock = clock
+        self.start_time = reader.timestamp(0)
+        self.end_time = reader.timestamp(len(reader) - 1)
+        self._wall_start = clock()
+
+    @property
+    def finished(self):
+        return self.recording_time() >= self.end_time
+
+    def recording_time(self):
+        return self.start_time + (self.clock() - self._wall_start) * self.speed
+
+    def current(self):
+        """Returns the record that should be on screen right now."""
+        index = max(0, self.reader.index_at(self.recording_time()))
+        return self.reader[index]
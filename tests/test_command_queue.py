@@ -0,0 +1,89 @@
+import queue
+
+import pytest
+
+from command_queue import RotorCommandQueue, min_command_interval
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_setpoints_merge_into_the_newest():
+    q = RotorCommandQueue()
+    q.put("first", ["P", 10, 10])
+    q.put("status", ["_"])
+    q.put("second", ["P", 20, 20])
+    entry = q.get(timeout=0)
+    # The set-point keeps the first one's place but carries the newest target
+    assert entry.item == "second"
+    assert entry.merged == ["first"]
+    assert q.get(timeout=0).item == "status"
+    assert q.stats()["merged"] == 1
+
+
+def test_stop_jumps_the_queue_and_drops_pending_setpoints():
+    q = RotorCommandQueue()
+    q.put("info", ["_"])
+    q.put("a", ["P", 10, 10])
+    q.put("b", ["P", 20, 20])
+    dropped = q.put("stop", ["S"])
+    assert dropped == ["b", "a"]
+    assert q.get(timeout=0).item == "stop"
+    assert q.get(timeout=0).item == "info"
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0)
+    stats = q.stats()
+    assert stats["dropped"] == 2
+    assert stats["prioritized"] == 1
+
+
+def test_stop_without_pending_setpoint_drops_nothing():
+    q = RotorCommandQueue()
+    assert q.put("stop", ["\\stop"]) == []
+    assert q.get(timeout=0).kind == "stop"
+
+
+def test_control_messages_bypass_priority_and_rate_limit():
+    clock = FakeClock()
+    q = RotorCommandQueue(min_interval=1.0, clock=clock)
+    q.put("stop", ["S"])
+    q.put_control("configure")
+    assert q.get(timeout=0).item == "configure"
+
+
+def test_rate_limit_holds_commands_but_not_stops():
+    clock = FakeClock()
+    q = RotorCommandQueue(min_interval=1.0, clock=clock)
+    q.mark_sent()
+    q.put("move", ["P", 10, 10])
+    with pytest.raises(queue.Empty):
+        q.get(timeout=0)
+    q.put("stop", ["S"])
+    # The stop also cancelled the held set-point
+    assert q.get(timeout=0).item == "stop"
+    q.put("move", ["P", 10, 10])
+    clock.now += 1.0
+    assert q.get(timeout=0).item == "move"
+
+
+def test_drain_empties_every_lane():
+    q = RotorCommandQueue()
+    q.put_control("control")
+    q.put("stop", ["S"])
+    q.put("move", ["P", 1, 1])
+    assert [entry.item for entry in q.drain()] == ["control", "stop", "move"]
+    assert q.depth() == 0
+    # The pending set-point is gone too, so the next one isn't merged into it
+    q.put("next", ["P", 2, 2])
+    assert q.get(timeout=0).merged == []
+
+
+def test_min_command_interval():
+    assert min_command_interval(600, "901") == pytest.approx(25 * 10 / 600 + 0.02)
+    assert min_command_interval(None) == 0.0
+    assert min_command_interval(0) == 0.0
@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+
+from rot2prog import Rot2ProgBackend, load_serial
+from rotctld_client import RotctldError
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="FakeRot2Prog needs a pty")
+
+
+@pytest.fixture
+def fake():
+    from fake_rot2prog import FakeRot2Prog
+    if load_serial() is None:
+        pytest.skip("pyserial is not installed")
+    fake = FakeRot2Prog(slew_rate=1000.0)
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def backend(fake):
+    backend = Rot2ProgBackend(fake.device, 600, timeout=1.0)
+    yield backend
+    backend.close()
+
+
+def test_reads_the_position(backend, fake):
+    response = backend.execute("p")
+    assert response.command == "get_pos"
+    assert backend.get_position() == pytest.approx(fake.position(), abs=0.1)
+    assert backend.connected
+
+
+def test_set_point_learns_the_resolution_first(backend, fake):
+    assert backend.execute(["P", 123.4, 45.6]).ok
+    assert backend.protocol.az_resolution == 10
+    fake.rotor.stop()
+    assert backend.get_position() == pytest.approx(fake.position(), abs=0.1)
+
+
+def test_moves_and_stops(backend, fake):
+    backend.execute(["P", 30, 10])
+    deadline = time.monotonic() + 2.0
+    while backend.get_position() != pytest.approx((30.0, 10.0), abs=0.1) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert backend.get_position() == pytest.approx((30.0, 10.0), abs=0.1)
+    assert backend.execute("S").ok
+    assert not fake.rotor.moving
+
+
+def test_rejects_bad_commands_without_touching_the_port(backend, fake):
+    with pytest.raises(RotctldError) as excinfo:
+        backend.execute(["P", 999, 0])
+    assert excinfo.value.code == -1
+    with pytest.raises(RotctldError) as excinfo:
+        backend.execute("M 8 50")
+    assert excinfo.value.code == -4
+    assert fake.frames_received == 0
+
+
+def test_info_and_dump_state_are_answered_locally(backend, fake):
+    assert fake.device in backend.execute("_").get("Info")
+    assert backend.execute("dump_state").records[-1] == "done"
+    assert fake.frames_received == 0
+
+
+def test_a_dead_port_raises_oserror(fake):
+    backend = Rot2ProgBackend(fake.device + "-missing", 600, timeout=0.2)
+    with pytest.raises(OSError):
+        backend.execute("p")
+    assert not backend.connected
@@ -0,0 +1,116 @@
+import queue
+import socket
+
+import pytest
+
+from rotctld_client import RotctldClient, RotctldError
+from rotctld_proxy import PositionCache, RotctldProxy
+from rotor_simulator import SimulatedRotctld, SimulatedRotor
+from rotor_worker import RotorWorker
+
+
+@pytest.fixture
+def simulator():
+    sim = SimulatedRotctld(SimulatedRotor(az_slew=1000.0, el_slew=1000.0), port=0)
+    sim.start()
+    yield sim
+    sim.stop()
+
+
+@pytest.fixture
+def client(simulator):
+    client = RotctldClient(simulator.host, simulator.port, timeout=2.0)
+    yield client
+    client.close()
+
+
+def test_client_moves_and_reads_position(client, simulator):
+    client.set_position(120.0, 30.0)
+    assert simulator.rotor.moving or simulator.rotor.position() == (120.0, 30.0)
+    simulator.rotor.stop()
+    az, el = client.get_position()
+    assert (az, el) == pytest.approx(simulator.rotor.position())
+    assert client.last_latency is not None
+
+
+def test_client_raises_the_rprt_code(client):
+    with pytest.raises(RotctldError) as excinfo:
+        client.execute(["P", 999, 0])
+    assert excinfo.value.code == -1
+    assert client.execute("_").get("Info") == "Rotor simulator"
+
+
+def test_client_pipelines_and_returns_errors(client):
+    seen = []
+    responses = client.execute_many([["P", 10, 10], ["P", 999, 0], "p"],
+                                    on_response=lambda index, response: seen.append(index))
+    assert [response.code for response in responses] == [0, -1, 0]
+    assert responses[2].command == "get_pos"
+    assert seen == [0, 1, 2]
+
+
+def test_client_reconnects_after_the_server_restarts(simulator):
+    client = RotctldClient(simulator.host, simulator.port, timeout=2.0)
+    try:
+        client.get_position()
+        port = simulator.port
+        simulator.stop()
+        restarted = SimulatedRotctld(port=port)
+        restarted.start()
+        try:
+            assert client.get_position() == (0.0, 0.0)
+        finally:
+            restarted.stop()
+    finally:
+        client.close()
+
+
+def test_client_raises_oserror_when_nothing_listens():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    client = RotctldClient("127.0.0.1", port, timeout=1.0)
+    with pytest.raises(OSError):
+        client.get_position()
+    assert not client.connected
+
+
+@pytest.fixture
+def proxy(simulator):
+    worker = RotorWorker(queue.Queue())
+    worker.configure(simulator.host, simulator.port, "")
+    worker.start()
+    cache = PositionCache()
+    proxy = RotctldProxy(worker, cache, port=0, max_age=60.0, timeout=5.0)
+    proxy.start()
+    yield proxy
+    proxy.stop()
+    worker.stop()
+
+
+def test_proxy_serves_position_from_the_cache(proxy, simulator):
+    first = proxy.handle_line("+p")
+    assert "Azimuth: 0.000000" in first and first.endswith("RPRT 0\n")
+    assert proxy.forwarded == 1
+    # Fresh cache: no second trip to rotctld
+    assert proxy.handle_line("p") == "0.000000\n0.000000\n"
+    assert proxy.forwarded == 1
+    assert proxy.cache_hits == 1
+
+
+def test_proxy_forwards_commands_and_errors(proxy, simulator):
+    assert proxy.handle_line("P 45 10") == "RPRT 0\n"
+    assert simulator.rotor.moving or simulator.rotor.position() == (45.0, 10.0)
+    assert proxy.handle_line("P 999 10") == "RPRT -1\n"
+    assert proxy.handle_line("q") is None
+
+
+def test_proxy_over_tcp(proxy):
+    client = RotctldClient(proxy.host, proxy.port, timeout=5.0)
+    try:
+        assert client.get_position() == (0.0, 0.0)
+        assert proxy.client_count == 1
+        with pytest.raises(RotctldError):
+            client.execute(["P", 999, 0])
+    finally:
+        client.close()
@@ -0,0 +1,73 @@
+import math
+import os
+
+import pytest
+
+from telemetry import HEADER, RECORD, TelemetryReader, TelemetryRecorder, TelemetryRing
+
+
+def test_ring_keeps_the_newest_samples():
+    ring = TelemetryRing(capacity=3)
+    for i in range(5):
+        ring.append((float(i),) * 6)
+    assert len(ring) == 3
+    assert [sample[0] for sample in ring.latest()] == [2.0, 3.0, 4.0]
+    assert [sample[0] for sample in ring.latest(2)] == [3.0, 4.0]
+    assert [sample[0] for sample in ring.since(2.5)] == [3.0, 4.0]
+
+
+def test_recorder_writes_readable_records(tmp_path):
+    path = str(tmp_path / "telemetry.bin")
+    recorder = TelemetryRecorder(path)
+    recorder.record(1.0, 10.0, 20.0)
+    recorder.record(2.0, 11.0, 21.0, 12.0, 22.0, 0.05)
+    recorder.close()
+    reader = TelemetryReader(path)
+    try:
+        assert len(reader) == 2
+        assert reader[0][:3] == (1.0, 10.0, 20.0)
+        assert math.isnan(reader[0][3])
+        assert reader[-1][3] == pytest.approx(12.0)
+        assert reader.index_at(1.5) == 0
+    finally:
+        reader.close()
+
+
+def test_reopening_truncates_a_partial_trailing_record(tmp_path):
+    path = str(tmp_path / "telemetry.bin")
+    recorder = TelemetryRecorder(path)
+    recorder.record(1.0, 10.0, 20.0)
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # A crash in the middle of the next record
+    recorder = TelemetryRecorder(path)
+    assert os.path.getsize(path) == HEADER.size + RECORD.size
+    recorder.record(2.0, 11.0, 21.0)
+    recorder.close()
+    reader = TelemetryReader(path)
+    try:
+        assert [record[0] for record in reader] == [1.0, 2.0]
+    finally:
+        reader.close()
+
+
+def test_reopening_rejects_a_foreign_file(tmp_path):
+    path = tmp_path / "telemetry.bin"
+    path.write_bytes(b"not a telemetry file")
+    with pytest.raises(ValueError):
+        TelemetryRecorder(str(path))
+
+
+def test_rotation_keeps_backup_count_files(tmp_path):
+    path = str(tmp_path / "telemetry.bin")
+    recorder = TelemetryRecorder(path, max_bytes=HEADER.size + 2 * RECORD.size, backup_count=2)
+    for i in range(7):
+        recorder.record(float(i), 0.0, 0.0)
+    recorder.close()
+    assert sorted(os.listdir(tmp_path)) == ["telemetry.bin", "telemetry.bin.1", "telemetry.bin.2"]
+    for name, expected in (("telemetry.bin", [6.0]), ("telemetry.bin.1", [4.0, 5.0]), ("telemetry.bin.2", [2.0, 3.0])):
+        reader = TelemetryReader(str(tmp_path / name))
+        try:
+            assert [record[0] for record in reader] == expected
+        finally:
+            reader.close()
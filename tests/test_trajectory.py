@@ -0,0 +1,65 @@
+import pytest
+
+from trajectory import WrapTable, azimuth_error, setpoint_error
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    (359.9, 0.0, 0.1),
+    (0.0, 359.9, 0.1),
+    (10.0, 350.0, 20.0),
+    (0.0, 180.0, 180.0),
+    (360.0, 0.0, 0.0),
+    (-20.0, 340.0, 0.0),
+    (45.0, 45.0, 0.0),
+])
+def test_azimuth_error_takes_the_short_way(a, b, expected):
+    assert azimuth_error(a, b) == pytest.approx(expected)
+
+
+def test_setpoint_error_folds_only_inside_0_360():
+    assert setpoint_error(0.0, 360.0) == pytest.approx(0.0)
+    assert setpoint_error(359.5, 0.0) == pytest.approx(0.5)
+    # An overlap set-point is one mechanical position, a full turn away from its bearing
+    assert setpoint_error(40.0, 400.0) == pytest.approx(360.0)
+    assert setpoint_error(400.0, 400.0) == pytest.approx(0.0)
+    assert setpoint_error(340.0, -20.0) == pytest.approx(360.0)
+
+
+def test_wrap_table_rejects_an_empty_range():
+    with pytest.raises(ValueError):
+        WrapTable(90.0, 90.0)
+
+
+def test_nearest_without_overlap_is_the_bearing():
+    table = WrapTable(0.0, 360.0)
+    assert table.overlap == 0.0
+    assert table.nearest(370.0, None) == pytest.approx(10.0)
+    assert table.nearest(-10.0, 5.0) == pytest.approx(350.0)
+
+
+def test_nearest_prefers_the_0_360_turn_without_a_position():
+    table = WrapTable(-180.0, 540.0)
+    assert table.candidates(10.0) == [10.0, 370.0]
+    assert table.nearest(10.0, None) == 10.0
+    assert table.nearest(200.0, None) == 200.0
+
+
+def test_nearest_picks_the_turn_closest_to_the_rotor():
+    table = WrapTable(-180.0, 540.0)
+    assert table.nearest(10.0, 350.0) == 370.0
+    assert table.nearest(350.0, 5.0) == -10.0
+    assert table.nearest(180.0, 0.0) in (-180.0, 180.0)
+
+
+def test_nearest_at_the_range_limits():
+    table = WrapTable(0.0, 450.0)
+    assert table.candidates(90.0) == [90.0, 450.0]
+    assert table.nearest(90.0, 440.0) == 450.0
+    assert table.candidates(91.0) == [91.0]
+
+
+def test_nearest_clamps_when_no_turn_is_in_range():
+    table = WrapTable(10.0, 350.0)
+    assert table.candidates(5.0) == []
+    assert table.nearest(5.0, 100.0) == 10.0
+    assert table.nearest(355.0, 100.0) == 350.0
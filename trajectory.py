@@ -0,0 +1,345 @@
+"""Trajectory planning between callers and the rotor.
+
+Three pieces, all plain Python so they run without NumPy:
+
+- WrapTable: for a rotor with overlap (0-450, or -180..540 on the SPID
+  Rot2Prog) every bearing has more than one mechanical azimuth. The valid
+  turns (multiples of 360) are precomputed per whole degree, so resolving a
+  bearing is a table lookup plus one bounds check.
+- SlewModel: learns each axis' slew rate from the polled positions, so the
+  planner knows how long a move will really take.
+- TrajectoryPlanner: picks the fastest mechanical target for a set-point,
+  keeps a whole pass on one wrap, and leads moving targets so the antenna
+  arrives where the target will be instead of where it was.
+
+TrackingErrorMeter compares recorded positions with where the target was at
+that moment, which is how the effect of lead pointing is measured.
+MotionEstimator dead-reckons the position between polls for the display.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+
+def bearing(azimuth):
+    """Normalises an azimuth to [0, 360)."""
+    return azimuth % 360.0
+
+
+def azimuth_error(a, b):
+    """Difference between two azimuths in degrees, the short way round (359.9 against 0 is 0.1)."""
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def setpoint_error(azimuth, setpoint):
+    """How far a reported azimuth is from a set-point, for arrival checks.
+
+    Set-points inside 0-360 are compared the short way round, so "P 360"
+    has arrived at 0. Overlap set-points (P 400, P -20) name one mechanical
+    position, and 40 is a full turn short of 400, so those compare directly.
+    """
+    if 0.0 <= setpoint <= 360.0:
+        return azimuth_error(azimuth, setpoint)
+    return abs(azimuth - setpoint)
+
+
+class WrapTable:
+    """Mechanical azimuths available for each bearing within [min_az, max_az]."""
+    def __init__(self, min_az=0.0, max_az=360.0):
+        if max_az <= min_az:
+            raise ValueError("max_az must be above min_az")
+        self.min_az = float(min_az)
+        self.max_az = float(max_az)
+        # turns[d] lists every k for which some bearing in [d, d+1) + 360k is inside the range
+        self._turns = []
+        low = math.floor((self.min_az - 360.0) / 360.0)
+        high = math.ceil(self.max_az / 360.0)
+        for degree in range(360):
+            self._turns.append(tuple(
+                k for k in range(low, high + 1)
+                if degree + 360 * k + 1 > self.min_az and degree + 360 * k <= self.max_az
+            ))
+
+    @property
+    def overlap(self):
+        return max(0.0, self.max_az - self.min_az - 360.0)
+
+    def candidates(self, azimuth):
+        """Every mechanical azimuth that points at ``azimuth``'s bearing."""
+        b = bearing(azimuth)
+        return [b + 360.0 * k for k in self._turns[int(b)] if self.min_az <= b + 360.0 * k <= self.max_az]
+
+    def nearest(self, azimuth, current):
+        """The candidate closest to ``current``; falls back to clamping if none is in range."""
+        candidates = self.candidates(azimuth)
+        if not candidates:
+            return min(max(azimuth, self.min_az), self.max_az)
+        if current is None:
+            return min(candidates, key=lambda a: (abs(a - bearing(a)), a))  # Prefer the 0-360 turn
+        return min(candidates, key=lambda a: abs(a - current))
+
+
+class SlewModel:
+    """Per-axis slew rates (deg/s), learned from consecutive polls while slewing.
+
+    Only samples where the rotor was still well short of its commanded
+    target at the second poll count: while tracking it trails the target by a
+    degree or so and moves no faster than it, which says nothing about how
+    fast it could go.
+    """
+    def __init__(self, az_rate=6.0, el_rate=6.0, smoothing=0.2, min_step=0.2, min_remaining=3.0, max_gap=5.0):
+        self.az_rate = az_rate
+        self.el_rate = el_rate
+        self.smoothing = smoothing
+        self.min_step = min_step  # Smaller steps are jitter or the tail of a move, not a slew
+        self.min_remaining = min_remaining
+        self.max_gap = max_gap    # Polls further apart than this can't tell the rate
+        self.samples = 0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def update(self, timestamp, azimuth, elevation, target=None):
+        with self._lock:
+            last, self._last = self._last, (timestamp, azimuth, elevation)
+            if last is None:
+                return
+            dt = timestamp - last[0]
+            if not 0 < dt <= self.max_gap:
+                return
+            if target is None:
+                return
+            axes = (("az_rate", abs(azimuth - last[1]), abs(target[0] - azimuth)),
+                    ("el_rate", abs(elevation - last[2]), abs(target[1] - elevation)))
+            for axis, delta, remaining in axes:
+                if delta >= self.min_step and remaining >= max(delta, self.min_remaining):
+                    rate = delta / dt
+                    setattr(self, axis, getattr(self, axis) + self.smoothing * (rate - getattr(self, axis)))
+                    self.samples += 1
+
+    def travel_time(self, start, end):
+        """Seconds to move from (az, el) ``start`` to ``end``; both axes move at once."""
+        return max(abs(end[0] - start[0]) / max(self.az_rate, 1e-6),
+                   abs(end[1] - start[1]) / max(self.el_rate, 1e-6))
+
+
+class TrajectoryPlanner:
+    """Turns requested az/el into the set-points to actually send."""
+    def __init__(self, wraps, slew, latency=0.2, interval=0.5, max_lead=30.0, lead_enabled=True):
+        self.wraps = wraps
+        self.slew = slew
+        self.latency = latency      # Command delay: queue, rotctld and the controller reacting
+        self.interval = interval    # Time between tracking set-points
+        self.max_lead = max_lead
+        self.lead_enabled = lead_enabled
+        self.current = None         # Last polled (az, el), mechanical
+        self.target = None          # Last set-point planned, mechanical
+        self.last_lead = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        wraps = WrapTable(float(config.get("rotor_min_az", 0.0)), float(config.get("rotor_max_az", 360.0)))
+        slew = SlewModel(float(config.get("rotor_az_slew", 6.0)), float(config.get("rotor_el_slew", 6.0)))
+        return cls(wraps, slew,
+                   latency=float(config.get("trajectory_latency_ms", 200)) / 1000,
+                   interval=float(config.get("tracking_interval_ms", 500)) / 1000,
+                   lead_enabled=config.get("trajectory_lead", True))
+
+    def update(self, timestamp, azimuth, elevation):
+        self.current = (azimuth, elevation)
+        self.slew.update(timestamp, azimuth, elevation, self.target)
+
+    def update_from_snapshot(self, snapshot):
+        """RotorWorker listener: tracks the current position and feeds the slew model."""
+        if snapshot.connected and snapshot.azimuth is not None and snapshot.elevation is not None:
+            self.update(snapshot.timestamp, snapshot.azimuth, snapshot.elevation)
+
+    def resolve(self, azimuth, elevation, current=None):
+        """Fastest mechanical (az, el) for a requested position, using the overlap where it helps."""
+        current = current or self.current
+        azimuth = self.wraps.nearest(azimuth, None if current is None else current[0])
+        self.target = (azimuth, elevation)
+        return azimuth, elevation
+
+    def pass_offset(self, azimuths, current=None):
+        """Picks the turn (multiple of 360) for a whole pass of unwrapped azimuths.
+
+        Picks the offset that keeps the entire pass inside the rotor's range,
+        so it never has to unwind mid-pass, with the shortest initial slew.
+        Returns None when no turn fits (a north-crossing pass on a rotor
+        without overlap); set-points then have to go through resolve().
+        """
+        current = current or self.current
+        low, high = min(azimuths), max(azimuths)
+        start = azimuths[0]
+        best = None
+        for k in range(math.floor((self.wraps.min_az - high) / 360.0), math.ceil((self.wraps.max_az - low) / 360.0) + 1):
+            offset = 360.0 * k
+            if not (self.wraps.min_az <= low + offset and high + offset <= self.wraps.max_az):
+                continue
+            slew = 0.0 if current is None else abs(start + offset - current[0])
+            if best is None or slew < best[0]:
+                best = (slew, offset)
+        return None if best is None else best[1]
+
+    def lead_time(self, target, current=None):
+        """How far ahead to aim: command latency, the slew still to do, and half a tracking interval."""
+        current = current or self.current
+        if not self.lead_enabled:
+            return 0.0
+        travel = 0.0 if current is None else self.slew.travel_time(current, target)
+        return min(self.max_lead, self.latency + travel + self.interval / 2)
+
+    def lead_setpoint(self, position_at, now=None, current=None):
+        """Set-point for a moving target, ``position_at(t)`` -> mechanical (az, el).
+
+        The lead depends on the slew, which depends on the lead, so it's
+        iterated a few times; it converges quickly because the target moves
+        much slower than the rotor once it is on track.
+        """
+        now = time.time() if now is None else now
+        current = current or self.current
+        target = position_at(now)
+        lead = 0.0
+        for _ in range(3):
+            lead = self.lead_time(target, current)
+            target = position_at(now + lead)
+        self.last_lead = lead
+        self.target = target
+        return target
+
+
+def pointing_error(a, b):
+    """Angle in degrees between two (az, el) directions."""
+    az1, el1 = math.radians(a[0]), math.radians(a[1])
+    az2, el2 = math.radians(b[0]), math.radians(b[1])
+    cosine = math.sin(el1) * math.sin(el2) + math.cos(el1) * math.cos(el2) * math.cos(az1 - az2)
+    return math.degrees(math.acos(max(-1.0, min(1.0, cosine))))
+
+
+class TrackingErrorMeter:
+    """Rolling pointing error of the recorded position against the true target position."""
+    def __init__(self, window=120, histogram=None):
+        self.window = window
+        self.histogram = histogram  # Optional metrics histogram child
+        self.target_at = None       # Callable(timestamp) -> (az, el), None when not tracking
+        self._errors = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def start(self, target_at):
+        with self._lock:
+            self.target_at = target_at
+            self._errors.clear()
+
+    def stop(self):
+        with self._lock:
+            self.target_at = None
+
+    def update_from_snapshot(self, snapshot):
+        """RotorWorker listener."""
+        target_at = self.target_at
+        if target_at is None or not snapshot.connected or snapshot.azimuth is None or snapshot.elevation is None:
+            return
+        target = target_at(snapshot.timestamp)
+        if target is None:
+            return
+        error = pointing_error((snapshot.azimuth, snapshot.elevation), target)
+        with self._lock:
+            self._errors.append(error)
+        if self.histogram is not None:
+            self.histogram.observe(error)
+
+    def stats(self):
+        """Returns (mean, rms, max) over the window in degrees, or None without samples."""
+        with self._lock:
+            errors = list(self._errors)
+        if not errors:
+            return None
+        return (sum(errors) / len(errors), math.sqrt(sum(e * e for e in errors) / len(errors)), max(errors))
+
+
+class MotionEstimator:
+    """Dead-reckons the rotor between polls so the pointers can move at display rate.
+
+    Heading for a set-point, each axis moves at the slew model's rate and
+    stops on the target; otherwise the velocity between the last two readings
+    is carried on. Never extrapolates more than ``horizon`` seconds past a
+    reading, so a lost link freezes the pointers instead of spinning them.
+    """
+    def __init__(self, slew, horizon=5.0, settle=0.1, min_speed=0.05):
+        self.slew = slew
+        self.horizon = horizon
+        self.settle = settle        # Degrees from the target that count as arrived
+        self.min_speed = min_speed  # deg/s below which a measured velocity is noise
+        self.reading = None         # (timestamp, az, el) of the last real position
+        self.velocity = (0.0, 0.0)
+        self.target = None
+        self._target_time = None
+        self._previous_time = None
+        self._commanded = None      # Worker's set-point as of the last snapshot
+
+    def update(self, timestamp, azimuth, elevation):
+        """A real reading; the display snaps to it and predicts from here."""
+        last = self.reading
+        self._previous_time = None if last is None else last[0]
+        if last is not None and 0 < timestamp - last[0] <= self.horizon:
+            dt = timestamp - last[0]
+            self.velocity = ((azimuth - last[1]) / dt, (elevation - last[2]) / dt)
+        else:
+            self.velocity = (0.0, 0.0)
+        self.reading = (timestamp, azimuth, elevation)
+
+    def update_from_snapshot(self, snapshot):
+        if snapshot.connected and snapshot.azimuth is not None and snapshot.elevation is not None:
+            # The position was read about half a round trip before the snapshot was made
+            timestamp = snapshot.timestamp - (snapshot.latency or 0.0) / 2
+            self.update(timestamp, snapshot.azimuth, snapshot.elevation)
+            # Only a change counts: a set-point sent through command() may not have reached the worker yet
+            if snapshot.commanded != self._commanded:
+                self._commanded = snapshot.commanded
+                if snapshot.commanded is None:
+                    self.stop()
+                else:
+                    self.command(*snapshot.commanded, timestamp=timestamp)
+
+    def command(self, azimuth, elevation, timestamp=None):
+        """A new set-point was sent; the pointers start moving before the next poll confirms it."""
+        self.target = (azimuth, elevation)
+        self._target_time = time.time() if timestamp is None else timestamp
+
+    def stop(self):
+        self.target = None
+        self.velocity = (0.0, 0.0)
+
+    def predict(self, now=None):
+        """Returns (az, el, moving); ``moving`` False means the pointers can rest until the next reading."""
+        if self.reading is None:
+            return None, None, False
+        now = time.time() if now is None else now
+        t0, azimuth, elevation = self.reading
+        elapsed = min(max(0.0, now - t0), self.horizon)
+        measured = max(abs(self.velocity[0]), abs(self.velocity[1])) >= self.min_speed
+        # A target the rotor is visibly not going for (out of range, stuck) must not drag the pointers
+        fresh = self._target_time is not None and (self._previous_time is None
+                                                   or self._target_time >= self._previous_time)
+        heading = self.target is not None and (measured or fresh)
+        if heading and self._target_time > t0:
+            # Commanded after the reading: it sat there until then
+            elapsed = min(max(0.0, now - self._target_time), self.horizon)
+        az, az_moving = self._axis(azimuth, self.velocity[0], self.target[0] if heading else None,
+                                   self.slew.az_rate, elapsed)
+        el, el_moving = self._axis(elevation, self.velocity[1], self.target[1] if heading else None,
+                                   self.slew.el_rate, elapsed)
+        return az, el, (az_moving or el_moving) and now - t0 < self.horizon
+
+    def _axis(self, position, velocity, target, rate, elapsed):
+        if target is not None:
+            remaining = target - position
+            if abs(remaining) <= self.settle:
+                return position, False
+            step = min(rate * elapsed, abs(remaining))
+            return position + math.copysign(step, remaining), step < abs(remaining)
+        if abs(velocity) >= self.min_speed:
+            return position + velocity * elapsed, True
+        return position, False